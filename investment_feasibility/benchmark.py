@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+from growth_helpers import (phase_absorption, net_occupancy, phase_sqft_absorption, net_sqft_occupancy,
+                            cap_net_occupancy, forecast_rental_income, OCCUPANCY_CACHE)
+from finance import calculate_irr
+from main import residential_model, commercial_model, mixed_use_model
+
+# Benchmarks for the growth helpers, finance metrics and full model runs.
+#
+#   python benchmark.py run --output bench.json
+#   python benchmark.py compare baseline.json bench.json --threshold 0.10
+#   python benchmark.py imports
+
+DEFAULT_SCALES = [10, 1_000, 100_000]
+DEFAULT_YEARS = [20, 50]
+
+# The computational core must import with NumPy alone and within this wall-time budget
+# (enforced by tests/test_import_budget.py)
+CORE_MODULES = ["growth_helpers", "finance", "engine", "results", "instrumentation", "export", "main"]
+LAZY_MODULES = ["pandas", "matplotlib", "numpy_financial"]
+IMPORT_BUDGET_SECONDS = 0.5
+
+def synthetic_portfolio(n_products, category, seed=0):
+    """Random but reproducible product dicts shaped like the interactive inputs."""
+    rng = np.random.default_rng(seed)
+    rates = rng.choice([0.10, 0.15, 0.20, 0.25, 0.33], n_products)
+    if category == "residential":
+        units = rng.integers(20, 400, n_products)
+        rent = rng.uniform(1500, 4000, n_products)
+        dev_cost = rng.uniform(150_000, 450_000, n_products)
+        opex = rng.uniform(3000, 8000, n_products)
+        return {f"Residential {i}": {"units": int(units[i]), "rental_price": float(rent[i]), "dev_cost": float(dev_cost[i]),
+                                     "opex_per_unit": float(opex[i]), "absorption_rate": float(rates[i]),
+                                     "product_type": "detached"} for i in range(n_products)}
+    if category == "commercial":
+        sqft = rng.integers(5_000, 200_000, n_products)
+        rent = rng.uniform(1, 12, n_products)
+        dev_cost = rng.uniform(100, 400, n_products)
+        opex = rng.uniform(2, 9, n_products)
+        return {f"Commercial {i}": {"sqft": int(sqft[i]), "rental_price": float(rent[i]), "dev_cost": float(dev_cost[i]),
+                                    "opex_per_sqft": float(opex[i]), "absorption_rate": float(rates[i]),
+                                    "product_type": "office"} for i in range(n_products)}
+    if category == "mixed_use":
+        residential = synthetic_portfolio(n_products, "residential", seed)
+        commercial = synthetic_portfolio(n_products, "commercial", seed + 1)
+        return {f"Mixed-Use {i}": {"acq_cost": 2_500_000, "residential": res, "commercial": {"Retail": com}}
+                for i, (res, com) in enumerate(zip(residential.values(), commercial.values()))}
+    raise ValueError(f"Unsupported category '{category}'")
+
+def _prepare_cases(n_products, years, seed):
+    residential = synthetic_portfolio(n_products, "residential", seed)
+    commercial = synthetic_portfolio(n_products, "commercial", seed)
+    mixed_use = synthetic_portfolio(n_products, "mixed_use", seed)
+    res_rows = list(residential.values())
+    com_rows = list(commercial.values())
+    absorbed = [phase_absorption(p["units"], p["absorption_rate"], years) for p in res_rows]
+    sqft_absorbed = [phase_sqft_absorption(p["sqft"], p["absorption_rate"], years) for p in com_rows]
+    net = [net_occupancy(a) for a in absorbed]
+    cashflows = [[-p["units"] * p["dev_cost"] / 10] + [p["units"] * p["rental_price"] * 12] * years for p in res_rows]
+
+    return {
+        "phase_absorption": lambda: [phase_absorption(p["units"], p["absorption_rate"], years) for p in res_rows],
+        "net_occupancy": lambda: [net_occupancy(a) for a in absorbed],
+        "net_sqft_occupancy": lambda: [net_sqft_occupancy(a, p["sqft"]) for a, p in zip(sqft_absorbed, com_rows)],
+        "cap_net_occupancy": lambda: [cap_net_occupancy(n, p["units"]) for n, p in zip(net, res_rows)],
+        "forecast_rental_income": lambda: [forecast_rental_income(p["sqft"], p["rental_price"], 0.9, years, 0.02)
+                                           for p in com_rows],
+        "calculate_irr": lambda: [calculate_irr(cf) for cf in cashflows],
+        "residential_model": lambda: residential_model(residential, 1500000, 200, "80302", years=years),
+        "commercial_model": lambda: commercial_model(commercial, years=years),
+        "mixed_use_model": lambda: mixed_use_model(mixed_use, 200, 150, "80302", years=years),
+    }
+
+def _measure(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        # Occupancy caching would turn later repeats into cache hits
+        OCCUPANCY_CACHE.clear()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    OCCUPANCY_CACHE.clear()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def run_benchmarks(scales=None, years_list=None, repeat=3, only=None, seed=0):
+    results = []
+    for n_products in scales or DEFAULT_SCALES:
+        for years in years_list or DEFAULT_YEARS:
+            cases = _prepare_cases(n_products, years, seed)
+            for name, func in cases.items():
+                if only and name not in only:
+                    continue
+                seconds, peak = _measure(func, repeat if n_products < 100_000 else 1)
+                results.append({
+                    "name": name,
+                    "products": n_products,
+                    "years": years,
+                    "seconds": seconds,
+                    "peak_memory_bytes": peak,
+                    "throughput": n_products * years / seconds if seconds > 0 else None,
+                })
+                print(f"{name:<24} {n_products:>8,} products x {years:>2} yrs  "
+                      f"{seconds:>9.4f}s  {peak / 1e6:>9.2f} MB  {results[-1]['throughput'] or 0:>14,.0f} product-years/s")
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+def compare_runs(baseline, candidate, threshold=0.10, min_seconds=0.005, min_memory_bytes=64 * 1024):
+    """
+    Match benchmarks by (name, products, years) and flag those whose wall time or peak
+    memory grew by more than `threshold` (fractional) relative to the baseline. Changes
+    smaller than `min_seconds` or `min_memory_bytes` in absolute terms are treated as
+    noise, so small cases do not flag on timer jitter or a few stray allocations.
+    """
+    base = {(r["name"], r["products"], r["years"]): r for r in baseline["results"]}
+    rows = []
+    for r in candidate["results"]:
+        key = (r["name"], r["products"], r["years"])
+        if key not in base:
+            continue
+        old = base[key]
+        time_change = r["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+        memory_change = r["peak_memory_bytes"] / old["peak_memory_bytes"] - 1 if old["peak_memory_bytes"] else 0.0
+        rows.append({
+            "name": r["name"], "products": r["products"], "years": r["years"],
+            "time_change": time_change, "memory_change": memory_change,
+            "regression": (time_change > threshold and r["seconds"] - old["seconds"] > min_seconds)
+                          or (memory_change > threshold
+                              and r["peak_memory_bytes"] - old["peak_memory_bytes"] > min_memory_bytes),
+        })
+    return rows
+
+def check_import_budget(budget=IMPORT_BUDGET_SECONDS, repeat=5):
+    """
+    Import the core modules in fresh interpreters (best of `repeat`) and check that the
+    import fits the time budget without loading any of LAZY_MODULES.
+    """
+    probe = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {', '.join(CORE_MODULES)}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': elapsed, 'loaded': loaded}))\n"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = [json.loads(subprocess.run([sys.executable, "-c", probe], cwd=here, capture_output=True,
+                                      text=True, check=True).stdout) for _ in range(repeat)]
+    seconds = min(run["seconds"] for run in runs)
+    loaded = sorted({m for run in runs for m in run["loaded"]})
+    return {"seconds": seconds, "budget": budget, "eagerly_loaded": loaded,
+            "ok": seconds <= budget and not loaded}
+
+def _main(argv=None):
+    parser = argparse.ArgumentParser(description="Investment feasibility benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run benchmarks and write results as JSON")
+    run.add_argument("--output", default="bench.json")
+    run.add_argument("--scales", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_SCALES)
+    run.add_argument("--years", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_YEARS)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--only", type=lambda s: s.split(","), default=None)
+
+    compare = sub.add_parser("compare", help="flag regressions between two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--threshold", type=float, default=0.10)
+    compare.add_argument("--min-seconds", type=float, default=0.005)
+    compare.add_argument("--min-memory-bytes", type=int, default=64 * 1024)
+
+    imports = sub.add_parser("imports", help="enforce the core import-time budget")
+    imports.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS)
+
+    args = parser.parse_args(argv)
+    if args.command == "imports":
+        result = check_import_budget(args.budget)
+        print(f"Core import: {result['seconds']:.3f}s (budget {result['budget']:.3f}s)")
+        if result["eagerly_loaded"]:
+            print(f"Eagerly loaded heavy modules: {', '.join(result['eagerly_loaded'])}")
+        print("OK" if result["ok"] else "FAILED")
+        return 0 if result["ok"] else 1
+
+    if args.command == "run":
+        report = run_benchmarks(args.scales, args.years, args.repeat, args.only)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(report['results'])} results to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    rows = compare_runs(baseline, candidate, args.threshold, args.min_seconds, args.min_memory_bytes)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"{row['name']:<24} {row['products']:>8,} x {row['years']:>2}  time {row['time_change']:+7.1%}  "
+              f"memory {row['memory_change']:+7.1%}  {flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,185 @@
+import numpy as np
+from instrumentation import stage
+from growth_helpers import (batch_phase_absorption, batch_occupancy, round_like_python, DEFAULT_CHURN_RATE,
+                            DEFAULT_REABSORPTION_RATE, DEFAULT_EARLY_OCCUPANCY_RATE, OCCUPANCY_CACHE)
+
+# Batched product cash-flow kernels. Each argument may be a scalar or an array of
+# length N; every yearly output is an N x years matrix and `cashflows` is
+# N x (years + 1) with the development cost as the period-0 outflow, matching the
+# per-product cash flows built in main.residential_model / main.commercial_model.
+# Occupancy goes through `cache` (an OccupancyCache); pass cache=None for inputs that
+# rarely repeat, such as Monte Carlo draws.
+
+def _as_columns(*values):
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in values])
+    return [a.reshape(-1) for a in arrays]
+
+def residential_cashflows(units, rental_price, dev_cost, opex_per_unit, absorption_rate, years=20,
+                          churn_rate=DEFAULT_CHURN_RATE, reabsorption_rate=DEFAULT_REABSORPTION_RATE,
+                          early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE, cache=OCCUPANCY_CACHE):
+    units, rental_price, dev_cost, opex_per_unit, absorption_rate, churn_rate, reabsorption_rate, early_occupancy_rate = \
+        _as_columns(units, rental_price, dev_cost, opex_per_unit, absorption_rate,
+                    churn_rate, reabsorption_rate, early_occupancy_rate)
+
+    occupancy = (cache.occupancy if cache is not None else batch_occupancy)(
+        units, absorption_rate, years, churn_rate, reabsorption_rate, early_occupancy_rate)
+    with stage("revenue_opex", rows=units.size):
+        revenue = occupancy * rental_price[:, None] * 12
+        opex = occupancy * opex_per_unit[:, None]
+        noi = revenue - opex
+        development_cost = units * dev_cost
+
+    return {
+        "occupancy": occupancy,
+        "revenue": revenue,
+        "opex": opex,
+        "noi": noi,
+        "development_cost": development_cost,
+        "cashflows": np.hstack([-development_cost[:, None], noi]),
+    }
+
+def commercial_cashflows(sqft, rental_price, dev_cost, opex_per_sqft, absorption_rate, years=20,
+                         churn_rate=DEFAULT_CHURN_RATE, reabsorption_rate=DEFAULT_REABSORPTION_RATE,
+                         early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE, cache=OCCUPANCY_CACHE, round_revenue=True):
+    sqft, rental_price, dev_cost, opex_per_sqft, absorption_rate, churn_rate, reabsorption_rate, early_occupancy_rate = \
+        _as_columns(sqft, rental_price, dev_cost, opex_per_sqft, absorption_rate,
+                    churn_rate, reabsorption_rate, early_occupancy_rate)
+
+    with stage("absorption", rows=sqft.size):
+        absorbed = batch_phase_absorption(sqft, absorption_rate, years)
+    occupancy = (cache.occupancy if cache is not None else batch_occupancy)(
+        sqft, absorption_rate, years, churn_rate, reabsorption_rate, early_occupancy_rate, commercial=True)
+    with stage("revenue_opex", rows=sqft.size):
+        revenue = occupancy * rental_price[:, None] * 12
+        if round_revenue:
+            revenue = round_like_python(revenue)
+        # Yearly opex is charged on newly absorbed sqft, as in commercial_model
+        opex = absorbed * opex_per_sqft[:, None]
+        noi = revenue - opex
+        development_cost = sqft * dev_cost
+
+    return {
+        "absorbed": absorbed,
+        "occupancy": occupancy,
+        "revenue": revenue,
+        "opex": opex,
+        "noi": noi,
+        "development_cost": development_cost,
+        "cashflows": np.hstack([-development_cost[:, None], noi]),
+    }
+
+KERNELS = {"residential": residential_cashflows, "commercial": commercial_cashflows}
+
+def product_columns(custom_products: dict, category: str):
+    """Kernel keyword arguments (one array per input) for a residential or commercial products dict."""
+    products = list(custom_products.values())
+    category = category.lower()
+    if category == "residential":
+        return {
+            "units": np.array([p["units"] for p in products], dtype=float),
+            "rental_price": np.array([p["rental_price"] for p in products], dtype=float),
+            "dev_cost": np.array([p["dev_cost"] for p in products], dtype=float),
+            "opex_per_unit": np.array([p["opex_per_unit"] for p in products], dtype=float),
+            "absorption_rate": np.array([p["absorption_rate"] for p in products], dtype=float),
+        }
+    if category == "commercial":
+        return {
+            "sqft": np.array([p["sqft"] for p in products], dtype=float),
+            "rental_price": np.array([p["rental_price"] for p in products], dtype=float),
+            "dev_cost": np.array([p.get("dev_cost", 0) for p in products], dtype=float),
+            "opex_per_sqft": np.array([p.get("opex_per_sqft", 6.0) for p in products], dtype=float),
+            "absorption_rate": np.array([p["absorption_rate"] for p in products], dtype=float),
+        }
+    raise ValueError(f"Unsupported category '{category}'")
+
+def product_cashflows(custom_products: dict, category: str, years=20):
+    """Run the matching kernel over a products dict as passed to residential_model / commercial_model."""
+    columns = product_columns(custom_products, category)
+    return KERNELS[category.lower()](**columns, years=years)
+
+def _components(spec, size_key):
+    # One side of a mixed-use project: a single component (has size_key) or a dict of named ones
+    if not isinstance(spec, dict) or not spec:
+        return []
+    if size_key in spec:
+        return [(spec.get("product_type", size_key), spec)]
+    return [(name, component) for name, component in spec.items() if isinstance(component, dict)]
+
+# Commercial development cost per SF for mixed-use components that give no dev_cost
+DEFAULT_DEV_COST_PER_SQFT_COM = 150
+
+def mixed_use_components(custom_products: dict, dev_cost_per_sqft_com):
+    """
+    Flatten mixed-use projects into component rows for the kernels:
+    {"residential": (project_rows, columns), "commercial": (project_rows, columns)}, where
+    project_rows gives each component's project position and columns are kernel arguments.
+    Defaults follow mixed_use_model: residential opex 5000 and absorption 0.25; commercial
+    dev_cost falls back to dev_cost_per_sqft_com.
+    """
+    res_rows, res_values, com_rows, com_values = [], [], [], []
+    for idx, vals in enumerate(custom_products.values()):
+        for _, res in _components(vals.get("residential"), "units"):
+            if res.get("units", 0) > 0:
+                res_rows.append(idx)
+                res_values.append((res["units"], res["rental_price"], res["dev_cost"],
+                                   res.get("opex_per_unit", 5000), res.get("absorption_rate", 0.25)))
+        for com_name, com in _components(vals.get("commercial"), "sqft"):
+            try:
+                if com.get("sqft", 0) <= 0:
+                    continue
+                com_values.append(tuple(float(v) for v in (
+                    com["sqft"], com.get("rental_price", 0), com.get("dev_cost", dev_cost_per_sqft_com),
+                    com.get("opex_per_sqft", 6.0), com.get("absorption_rate", 0.25),
+                    com.get("churn_rate", DEFAULT_CHURN_RATE), com.get("reabsorption_rate", DEFAULT_REABSORPTION_RATE),
+                    com.get("early_occupancy_rate", DEFAULT_EARLY_OCCUPANCY_RATE))))
+                com_rows.append(idx)
+            except Exception as e:
+                print(f"⚠️ Error processing commercial product '{com_name}': {e}")
+
+    def columns(names, values):
+        matrix = np.array(values, dtype=float).reshape(-1, len(names))
+        return {name: matrix[:, i] for i, name in enumerate(names)}
+
+    return {
+        "residential": (np.array(res_rows, dtype=np.int64), columns(
+            ["units", "rental_price", "dev_cost", "opex_per_unit", "absorption_rate"], res_values)),
+        "commercial": (np.array(com_rows, dtype=np.int64), columns(
+            ["sqft", "rental_price", "dev_cost", "opex_per_sqft", "absorption_rate",
+             "churn_rate", "reabsorption_rate", "early_occupancy_rate"], com_values)),
+    }
+
+def group_sum(values, rows, n_groups):
+    """Sum the rows of `values` into n_groups groups; `rows` (each row's group) must be non-decreasing."""
+    totals = np.zeros((n_groups,) + values.shape[1:])
+    if rows.size:
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        totals[rows[starts]] = np.add.reduceat(values, starts, axis=0)
+    return totals
+
+def mixed_use_cashflows(custom_products: dict, dev_cost_per_sqft_com, years=20, cache=OCCUPANCY_CACHE):
+    """
+    Mixed-use projects through the same kernels as standalone products: every residential
+    and commercial component is one kernel row, summed back per project. Commercial
+    revenue is left unrounded, as mixed_use_model has always reported it. `cashflows`
+    carries the project's acquisition plus development cost at period 0.
+    """
+    n_projects = len(custom_products)
+    components = mixed_use_components(custom_products, dev_cost_per_sqft_com)
+    totals = {key: np.zeros((n_projects, years)) for key in ("revenue", "opex", "noi")}
+    development_cost = np.zeros(n_projects)
+
+    for category, (rows, columns) in components.items():
+        if not rows.size:
+            continue
+        extra = {"round_revenue": False} if category == "commercial" else {}
+        flows = KERNELS[category](**columns, years=years, cache=cache, **extra)
+        with stage("group_by", rows=rows.size):
+            for key, total in totals.items():
+                total += group_sum(flows[key], rows, n_projects)
+            development_cost += group_sum(flows["development_cost"], rows, n_projects)
+
+    acq_cost = np.array([vals.get("acq_cost", 0) for vals in custom_products.values()], dtype=float)
+    totals["development_cost"] = development_cost
+    totals["acquisition_cost"] = acq_cost
+    totals["cashflows"] = np.hstack([-(acq_cost + development_cost)[:, None], totals["noi"]])
+    return totals
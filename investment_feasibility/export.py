@@ -0,0 +1,214 @@
+import json
+import os
+import struct
+import numpy as np
+
+# Lossless result exports: numeric columns are written as raw floats, never as the
+# "$1,234" / "12.34%" strings used for console display. pandas is imported only by the
+# frame exports, so the matrix format below loads with numpy alone.
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+def numeric_results(df):
+    import pandas as pd
+
+    # Model frames hold None for metrics that are not calculable; store those as NaN
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            converted = pd.to_numeric(df[col], errors="coerce")
+            if converted.notna().sum() == df[col].notna().sum():
+                df[col] = converted.astype(float)
+    return df
+
+def export_results(df, file_name, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write a results frame with numeric columns preserved. The format follows the file
+    extension (.csv or .parquet); large frames are written chunk_rows at a time.
+    """
+    df = numeric_results(df)
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext == ".csv":
+        df.to_csv(file_name, index=False, chunksize=chunk_rows)
+    elif ext == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+        schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+        with pq.ParquetWriter(file_name, schema) as writer:
+            for start in range(0, max(len(df), 1), chunk_rows):
+                chunk = df.iloc[start:start + chunk_rows]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    else:
+        raise ValueError(f"Unsupported export file type '{ext}' (expected .csv or .parquet)")
+    return file_name
+
+# Per-product yearly matrices (occupancy, revenue, opex, NOI, cash flow) in one
+# memory-mappable file:
+#
+#   MATRIX_MAGIC | header length (uint32) | JSON header | product names (JSON) | matrices
+#
+# The header records the category, years, product count, model version and assumptions,
+# and each matrix's shape and byte offset. Matrices are little-endian float64, C-ordered
+# products x years (cash flows products x (years + 1), period 0 = development outflow)
+# and 64-byte aligned, so open_matrices() maps the file once and serves every matrix as a
+# zero-copy view.
+
+MATRIX_MAGIC = b"FEASMAT1"
+MATRIX_FORMAT_VERSION = 1
+MATRIX_FIELDS = ["occupancy", "revenue", "opex", "noi", "cashflows"]
+
+_MATRIX_ALIGN = 64
+
+def _matrix_aligned(offset):
+    return -(-offset // _MATRIX_ALIGN) * _MATRIX_ALIGN
+
+def export_matrices(file_name, matrices: dict, products, metadata=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write products x years matrices (any of MATRIX_FIELDS, e.g. a kernel result from
+    engine.product_cashflows) for `products` (names, in row order). `metadata` is stored
+    in the header alongside the layout.
+    """
+    products = [str(name) for name in products]
+    fields = [field for field in MATRIX_FIELDS if field in matrices]
+    arrays = {field: np.asarray(matrices[field]) for field in fields}
+    for field, array in arrays.items():
+        if array.ndim != 2 or array.shape[0] != len(products):
+            raise ValueError(f"'{field}' must be a {len(products)} x years matrix, got shape {array.shape}")
+
+    names = json.dumps(products).encode()
+    header = dict(metadata or {}, version=MATRIX_FORMAT_VERSION, products=len(products), names_bytes=len(names),
+                  names_offset=0, matrices={field: {"shape": list(a.shape), "offset": 0} for field, a in arrays.items()})
+    # Offsets are part of the header, so settle them before writing
+    while True:
+        header_bytes = json.dumps(header).encode()
+        offset = len(MATRIX_MAGIC) + 4 + len(header_bytes)
+        layout = {"names_offset": offset}
+        offset += len(names)
+        for field, array in arrays.items():
+            offset = _matrix_aligned(offset)
+            layout[field] = offset
+            offset += array.size * 8
+        if layout["names_offset"] == header["names_offset"] and all(
+                header["matrices"][field]["offset"] == layout[field] for field in fields):
+            break
+        header["names_offset"] = layout["names_offset"]
+        for field in fields:
+            header["matrices"][field]["offset"] = layout[field]
+
+    tmp_name = f"{file_name}.tmp"
+    with open(tmp_name, "wb") as f:
+        f.write(MATRIX_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes + names)
+        for field, array in arrays.items():
+            f.seek(header["matrices"][field]["offset"])
+            for start in range(0, array.shape[0], chunk_rows):
+                np.ascontiguousarray(array[start:start + chunk_rows], dtype="<f8").tofile(f)
+        f.truncate(offset)
+    os.replace(tmp_name, file_name)
+    return file_name
+
+# What each category's matrices hold, recorded in the file header. Every category writes
+# all MATRIX_FIELDS and cash flows start with the development outflow only; land and
+# acquisition costs are left out, as standalone products share them per category.
+# Residential and commercial occupancy counts units and sqft; a mixed-use project mixes
+# both, so its occupancy is economic (revenue over revenue at full occupancy).
+MATRIX_CONVENTIONS = {
+    "residential": {"occupancy": "occupied units", "period_0": "development cost"},
+    "commercial": {"occupancy": "occupied sqft", "period_0": "development cost"},
+    "mixed_use": {"occupancy": "economic occupancy (share of full-occupancy revenue)",
+                  "period_0": "development cost"},
+}
+
+def _mixed_use_matrices(custom_products: dict, dev_cost_per_sqft_com, years):
+    from engine import mixed_use_cashflows, mixed_use_components, group_sum
+
+    flows = mixed_use_cashflows(custom_products, dev_cost_per_sqft_com, years)
+    potential = np.zeros(len(custom_products))
+    for category, (rows, columns) in mixed_use_components(custom_products, dev_cost_per_sqft_com).items():
+        size = columns["units"] if category == "residential" else columns["sqft"]
+        potential += group_sum(size * columns["rental_price"] * 12, rows, len(custom_products))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        occupancy = np.where(potential[:, None] > 0, flows["revenue"] / potential[:, None], np.nan)
+    return dict(flows, occupancy=occupancy,
+                cashflows=np.hstack([-flows["development_cost"][:, None], flows["noi"]]))
+
+def export_product_matrices(file_name, custom_products: dict, category: str, years=20,
+                            dev_cost_per_sqft_com=None):
+    """
+    Run the batched kernels for a residential, commercial or mixed-use products dict and
+    export its matrices. Every category writes the same fields; the header's
+    "conventions" entry (MATRIX_CONVENTIONS) says what they hold.
+    """
+    from engine import product_cashflows, DEFAULT_DEV_COST_PER_SQFT_COM
+    from result_cache import MODEL_VERSION, assumptions
+
+    category = category.lower().replace("-", "_")
+    if category == "mixed_use":
+        if dev_cost_per_sqft_com is None:
+            dev_cost_per_sqft_com = DEFAULT_DEV_COST_PER_SQFT_COM
+        flows = _mixed_use_matrices(custom_products, dev_cost_per_sqft_com, years)
+    else:
+        flows = product_cashflows(custom_products, category, years)
+    metadata = {"category": category, "years": years, "model_version": MODEL_VERSION,
+                "assumptions": assumptions(years), "conventions": MATRIX_CONVENTIONS[category]}
+    return export_matrices(file_name, flows, custom_products.keys(), metadata)
+
+class ProductMatrices:
+    """
+    Read-only view of a file written by export_matrices. matrices[field] is a zero-copy
+    products x years view; row(name) gives a product's row index.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, "rb") as f:
+            if f.read(len(MATRIX_MAGIC)) != MATRIX_MAGIC:
+                raise ValueError(f"{file_name} is not a product matrix file")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            self.header = json.loads(f.read(header_len))
+        if self.header["version"] != MATRIX_FORMAT_VERSION:
+            raise ValueError(f"{file_name} has matrix format version {self.header['version']}, "
+                             f"expected {MATRIX_FORMAT_VERSION}")
+        self.fields = list(self.header["matrices"])
+        self._map = np.memmap(file_name, dtype=np.uint8, mode="r")
+        self._names = None
+        self._index = None
+
+    def __len__(self):
+        return self.header["products"]
+
+    def __contains__(self, field):
+        return field in self.header["matrices"]
+
+    def __getitem__(self, field):
+        layout = self.header["matrices"][field]
+        rows, cols = layout["shape"]
+        start = layout["offset"]
+        return self._map[start:start + rows * cols * 8].view("<f8").reshape(rows, cols)
+
+    @property
+    def products(self):
+        if self._names is None:
+            start = self.header["names_offset"]
+            self._names = json.loads(self._map[start:start + self.header["names_bytes"]].tobytes())
+        return self._names
+
+    def row(self, name):
+        if self._index is None:
+            self._index = {product: i for i, product in enumerate(self.products)}
+        return self._index[name]
+
+    def close(self):
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def open_matrices(file_name):
+    return ProductMatrices(file_name)
@@ -1,4 +1,6 @@
-import numpy_financial as npf
+import numpy as np
+import instrumentation
+from instrumentation import stage, count
 
 def calculate_residential_dev_cost(units, dev_cost_per_unit):
     return units * dev_cost_per_unit
@@ -18,22 +20,183 @@ def calculate_development_cost(units_or_sqft, dev_cost_per_sqft, avg_sqft_per_un
         total_sqft = units_or_sqft
     return total_sqft * dev_cost_per_sqft
 
+# Rates scanned to bracket each row's IRR before refining it
+IRR_RATE_GRID = np.concatenate([
+    [-0.9999, -0.999, -0.99, -0.975, -0.95, -0.925],
+    np.linspace(-0.9, 1.0, 77),
+    np.geomspace(1.1, 1000, 30)
+])
+
+def _npv_and_slope(cashflows, rates, periods=None):
+    if periods is None:
+        periods = np.arange(cashflows.shape[1])
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        discount = (1 + rates)[:, None] ** -periods
+        npv = np.sum(cashflows * discount, axis=1)
+        slope = np.sum(-periods * cashflows * discount, axis=1) / (1 + rates)
+    return npv, slope
+
+def batch_irr(cashflows, guess=None, tol=1e-10, max_iter=100):
+    """
+    IRR for every row of a 2D cash-flow array (rows = projects, columns = periods).
+    Each row is bracketed on IRR_RATE_GRID, keeping the sign change closest to zero
+    (the root npf.irr would pick), then refined with Newton steps that fall back to
+    bisection whenever a step leaves the bracket. `guess` (scalar or per-row array)
+    warm-starts the refinement. Rows without a real IRR come back as NaN.
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    with stage("irr_solve", rows=cashflows.shape[0]):
+        irr, iterations = _solve_irr(cashflows, guess, tol, max_iter)
+    _count_solves(irr, iterations)
+    return irr
+
+def _count_solves(irr, iterations):
+    if instrumentation.ENABLED:
+        count("irr_rows", irr.size)
+        count("irr_iterations", iterations)
+        count("irr_failures", int(np.isnan(irr).sum()))
+
+def _solve_irr(cashflows, guess, tol, max_iter, periods=None):
+    # `periods` are the (possibly fractional) discounting exponents; defaults to 0..T-1
+    n_rows, n_periods = cashflows.shape
+    irr = np.full(n_rows, np.nan)
+    if n_rows == 0 or n_periods < 2:
+        return irr, 0
+    if periods is None:
+        periods = np.arange(n_periods)
+
+    grid = IRR_RATE_GRID
+    with np.errstate(over="ignore", invalid="ignore"):
+        grid_npv = cashflows @ ((1 + grid)[:, None] ** -periods).T
+
+    lo_npv, hi_npv = grid_npv[:, :-1], grid_npv[:, 1:]
+    crossing = np.isfinite(lo_npv) & np.isfinite(hi_npv) & (np.sign(lo_npv) != np.sign(hi_npv))
+    crossing &= ~((lo_npv == 0) & (hi_npv == 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Linear interpolation of the root inside each bracket, used to rank brackets
+        estimate = grid[:-1] - lo_npv * np.diff(grid) / (hi_npv - lo_npv)
+    distance = np.where(crossing, np.abs(estimate), np.inf)
+    bracket = np.argmin(distance, axis=1)
+    rows = np.flatnonzero(np.isfinite(distance[np.arange(n_rows), bracket]))
+    if rows.size == 0:
+        return irr, 0
+
+    cf = cashflows[rows]
+    k = bracket[rows]
+    lo, hi = grid[k], grid[k + 1]
+    f_lo = grid_npv[rows, k]
+
+    if guess is None:
+        x = 0.5 * (lo + hi)
+    else:
+        x = np.broadcast_to(np.asarray(guess, dtype=float), (n_rows,))[rows].copy()
+        outside = ~((x > lo) & (x < hi))
+        x[outside] = 0.5 * (lo[outside] + hi[outside])
+
+    active = np.arange(rows.size)
+    iterations = 0
+    for _ in range(max_iter):
+        iterations += 1
+        f, slope = _npv_and_slope(cf[active], x[active], periods)
+
+        exact = f == 0
+        same_side = np.sign(f) == np.sign(f_lo[active])
+        lo[active] = np.where(same_side, x[active], lo[active])
+        f_lo[active] = np.where(same_side, f, f_lo[active])
+        hi[active] = np.where(same_side, hi[active], x[active])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = x[active] - f / slope
+        bisect = ~np.isfinite(step) | (step <= lo[active]) | (step >= hi[active])
+        step = np.where(bisect, 0.5 * (lo[active] + hi[active]), step)
+
+        done = exact | (np.abs(step - x[active]) <= tol * (1 + np.abs(x[active]))) | (hi[active] - lo[active] <= tol)
+        x[active] = np.where(exact, x[active], step)
+        active = active[~done]
+        if active.size == 0:
+            break
+
+    irr[rows] = x
+    return irr, iterations
+
+def year_fractions(dates):
+    # Actual/365 year fractions from the first date, as spreadsheet XIRR uses
+    days = np.asarray(dates, dtype="datetime64[D]")
+    return (days - days[0]).astype(float) / 365.0
+
+def batch_xirr(cashflows, dates, guess=None, tol=1e-10, max_iter=100):
+    """
+    Annualized IRR of every row of an N x T cash-flow matrix whose columns fall on
+    `dates` (shared by all rows, e.g. month starts from monthly.month_dates). Solved
+    like batch_irr with period t discounted by (1 + rate) ** (days_t / 365).
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    periods = year_fractions(dates)
+    if periods.size != cashflows.shape[1]:
+        raise ValueError(f"Got {periods.size} dates for {cashflows.shape[1]} cash-flow periods")
+    with stage("irr_solve", rows=cashflows.shape[0]):
+        irr, iterations = _solve_irr(cashflows, guess, tol, max_iter, periods)
+    _count_solves(irr, iterations)
+    return irr
+
+def calculate_xirr(cashflows, dates):
+    irr = batch_xirr([cashflows], dates)[0]
+    return None if np.isnan(irr) else float(irr)
+
 def calculate_irr(cashflows):
-    try:
-        irr = npf.irr(cashflows)
-        return irr if irr is not None and not isinstance(irr, complex) else None
-    except Exception as e:
-        print(f"IRR calculation error: {e}")
-        return None
+    irr = batch_irr([cashflows])[0]
+    return None if np.isnan(irr) else float(irr)
 
 def calculate_equity_multiple(cashflows):
-    if not cashflows or cashflows[0] >= 0:
-        return None
-    try:
-        total_inflows = sum(cashflows[1:])
-        return total_inflows / abs(cashflows[0])
-    except ZeroDivisionError:
+    if len(cashflows) == 0:
         return None
+    em = batch_equity_multiple([cashflows])[0]
+    return None if np.isnan(em) else float(em)
+
+def batch_equity_multiple(cashflows):
+    # Inflows after period 0 over the initial outlay; NaN unless period 0 is an outflow
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    outlay = cashflows[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        em = cashflows[:, 1:].sum(axis=1) / np.abs(outlay)
+    return np.where(outlay < 0, em, np.nan)
+
+def batch_break_even_year(cashflows):
+    # First period whose cumulative cash flow is non-negative; NaN if never reached
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    recovered = np.cumsum(cashflows, axis=1) >= 0
+    year = np.argmax(recovered, axis=1).astype(float)
+    year[~recovered.any(axis=1)] = np.nan
+    return year
+
+def batch_npv(cashflows, discount_rates):
+    """
+    NPV of every row at every discount rate, discounting period t by (1 + rate) ** t.
+    Returns an N x len(discount_rates) matrix (the NPV curve of each row).
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    rates = np.atleast_1d(np.asarray(discount_rates, dtype=float))
+    discount = (1 + rates)[:, None] ** -np.arange(cashflows.shape[1])
+    return cashflows @ discount.T
+
+def batch_metrics(cashflows, discount_rates=None, irr_guess=None):
+    """
+    Summary metrics for an N x T cash-flow matrix in one call.
+    Returns a dict of per-row arrays: irr, equity_multiple, break_even_year and,
+    when discount_rates is given, npv (N x len(discount_rates)).
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    metrics = {
+        "irr": batch_irr(cashflows, guess=irr_guess),
+        "equity_multiple": batch_equity_multiple(cashflows),
+        "break_even_year": batch_break_even_year(cashflows),
+    }
+    if discount_rates is not None:
+        metrics["npv"] = batch_npv(cashflows, discount_rates)
+    return metrics
+
+def calculate_npv(cashflows, discount_rate):
+    return float(batch_npv([cashflows], [discount_rate])[0, 0])
 
 def run_scenario(name, rent_per_unit, dev_cost_per_unit, units, opex_per_unit, absorption_years):
     print(f"\n--- Scenario: {name} ---")
@@ -60,20 +223,22 @@ def run_scenario(name, rent_per_unit, dev_cost_per_unit, units, opex_per_unit, a
     print(f"Equity Multiple: {equity_multiple:.2f}x\n")
 
 def find_break_even_year(cashflows):
-    cumulative = 0
-    for year, cf in enumerate(cashflows):
-        cumulative += cf
-        if cumulative >= 0:
-            return year
-    return None
+    if len(cashflows) == 0:
+        return None
+    year = batch_break_even_year([cashflows])[0]
+    return None if np.isnan(year) else int(year)
 
 # Optional: Run scenarios
-scenarios = [
-    {"name": "Base Case", "rent_per_unit": 3600, "dev_cost_per_unit": 450000, "units": 50, "opex_per_unit": 5000, "absorption_years": 5},
-    {"name": "High Rent", "rent_per_unit": 4200, "dev_cost_per_unit": 450000, "units": 50, "opex_per_unit": 5000, "absorption_years": 5},
-    {"name": "Low Rent, High Cost", "rent_per_unit": 3000, "dev_cost_per_unit": 480000, "units": 50, "opex_per_unit": 6000, "absorption_years": 5},
-]
+def example_scenarios():
+    return [
+        {"name": "Base Case", "rent_per_unit": 3600, "dev_cost_per_unit": 450000, "units": 50, "opex_per_unit": 5000, "absorption_years": 5},
+        {"name": "High Rent", "rent_per_unit": 4200, "dev_cost_per_unit": 450000, "units": 50, "opex_per_unit": 5000, "absorption_years": 5},
+        {"name": "Low Rent, High Cost", "rent_per_unit": 3000, "dev_cost_per_unit": 480000, "units": 50, "opex_per_unit": 6000, "absorption_years": 5},
+    ]
+
+# Kept for callers of the original module-level list; three dicts cost nothing to build
+scenarios = example_scenarios()
+
 if __name__ == "__main__":
     for scenario in scenarios:
         run_scenario(**scenario)
-
@@ -0,0 +1,149 @@
+import numpy as np
+from finance import batch_metrics
+
+# Debt financing layered onto unlevered cash-flow rows (period 0 = development outlay,
+# periods 1..T = NOI), for N deals at once.
+#
+# Each deal draws a construction loan of ltc x outlay at period 0 and pays interest only
+# on it until the end of construction_years. The permanent loan then takes it out: sized
+# at ltv x value (forward NOI / cap_rate), optionally capped so forward NOI covers the
+# amortizing payment sizing_dscr times, interest-only for io_years and amortizing over
+# amort_years after that. The difference between the two loans is paid to (or called
+# from) equity at conversion, and whatever is outstanding is repaid at exit_year (the
+# horizon by default). A deal that exits before conversion repays the construction loan.
+#
+# Every term may be a scalar or one value per deal. Schedules come from the closed-form
+# annuity balance on an N x T grid, so no step loops over loans or years.
+
+DEFAULT_LTC = 0.65
+DEFAULT_CONSTRUCTION_RATE = 0.08
+DEFAULT_CONSTRUCTION_YEARS = 2
+DEFAULT_LTV = 0.65
+DEFAULT_PERM_RATE = 0.065
+DEFAULT_AMORT_YEARS = 30
+DEFAULT_IO_YEARS = 0
+DEFAULT_CAP_RATE = 0.06
+
+def annuity_factor(rate, amort_years):
+    """Level annual payment per dollar of principal for a fully amortizing loan."""
+    rate, amort_years = np.broadcast_arrays(np.asarray(rate, dtype=float), np.asarray(amort_years, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        factor = rate / (1 - (1 + rate) ** -amort_years)
+        return np.where(rate == 0, 1 / amort_years, factor)
+
+def remaining_balance(principal, rate, amort_years, payments_made):
+    """Balance of a level-payment loan after `payments_made` payments (arrays broadcast)."""
+    principal, rate, amort_years, payments_made = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (principal, rate, amort_years, payments_made)))
+    paid = np.clip(payments_made, 0, amort_years)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        growth_n = (1 + rate) ** amort_years
+        balance = principal * (growth_n - (1 + rate) ** paid) / (growth_n - 1)
+        return np.where(rate == 0, principal * (1 - paid / amort_years), balance)
+
+def _terms(n, **terms):
+    return {name: np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy() for name, value in terms.items()}
+
+def finance_cashflows(cashflows, ltc=DEFAULT_LTC, construction_rate=DEFAULT_CONSTRUCTION_RATE,
+                      construction_years=DEFAULT_CONSTRUCTION_YEARS, ltv=DEFAULT_LTV, perm_rate=DEFAULT_PERM_RATE,
+                      amort_years=DEFAULT_AMORT_YEARS, io_years=DEFAULT_IO_YEARS, cap_rate=DEFAULT_CAP_RATE,
+                      sizing_dscr=None, exit_year=None):
+    """
+    Loan schedules and levered cash flows for an N x (T + 1) matrix of unlevered rows.
+
+    Returns N x T arrays of interest, principal, debt_service, balance (outstanding at
+    year end, after any payoff) and dscr (NOI / debt service, NaN without debt service);
+    the N x (T + 1) levered_cashflows; and per-deal construction_loan, permanent_loan,
+    conversion_year, exit_year, exit_balance and the minimum / average DSCR over the
+    permanent loan's years (min_dscr / avg_dscr).
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    n, years = cashflows.shape[0], cashflows.shape[1] - 1
+    if years < 1:
+        raise ValueError("Financing needs at least one year of NOI after the development period")
+    t = _terms(n, ltc=ltc, construction_rate=construction_rate, construction_years=construction_years, ltv=ltv,
+               perm_rate=perm_rate, amort_years=amort_years, io_years=io_years, cap_rate=cap_rate,
+               exit_year=years if exit_year is None else exit_year)
+    rows = np.arange(n)
+    exit_at = np.clip(np.round(t["exit_year"]), 1, years).astype(int)
+    conversion = np.minimum(np.clip(np.round(t["construction_years"]), 0, years).astype(int), exit_at)
+    refinanced = conversion < exit_at
+    noi = cashflows[:, 1:]
+
+    construction_loan = t["ltc"] * np.maximum(-cashflows[:, 0], 0)
+
+    # The permanent loan is sized on the first year of NOI it has to cover
+    forward_noi = np.maximum(noi[rows, np.minimum(conversion, years - 1)], 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        permanent_loan = np.where(t["cap_rate"] > 0, t["ltv"] * forward_noi / t["cap_rate"], 0)
+        if sizing_dscr is not None:
+            constant = annuity_factor(t["perm_rate"], t["amort_years"])
+            permanent_loan = np.fmin(permanent_loan, forward_noi / (np.asarray(sizing_dscr, dtype=float) * constant))
+    permanent_loan = np.where(refinanced, permanent_loan, 0.0)
+
+    year = np.arange(1, years + 1)[None, :]
+    in_construction = year <= conversion[:, None]
+    construction_interest = np.where(in_construction, (construction_loan * t["construction_rate"])[:, None], 0.0)
+
+    # Payment number on the permanent loan, and amortizing payments made before / after it
+    age = year - conversion[:, None]
+    in_permanent = (age >= 1) & (year <= exit_at[:, None])
+    io = t["io_years"][:, None]
+    principal_args = (permanent_loan[:, None], t["perm_rate"][:, None], t["amort_years"][:, None])
+    opening = np.where(in_permanent, remaining_balance(*principal_args, age - 1 - io), 0.0)
+    closing = np.where(in_permanent, remaining_balance(*principal_args, age - io), 0.0)
+
+    interest = construction_interest + opening * t["perm_rate"][:, None]
+    principal = opening - closing
+    debt_service = interest + principal
+
+    exit_balance = np.where(refinanced, closing[rows, exit_at - 1], construction_loan)
+    # The permanent loan is funded in the conversion year, its first payment falls a year later
+    funded = refinanced[:, None] & (year == conversion[:, None])
+    balance = (np.where(year < conversion[:, None], construction_loan[:, None], 0.0)
+               + np.where(funded, permanent_loan[:, None], 0.0)
+               + np.where(year < exit_at[:, None], closing, 0.0))
+
+    levered = cashflows.copy()
+    levered[:, 0] += construction_loan
+    levered[:, 1:] -= debt_service
+    # Conversion swaps the construction loan for the permanent one; an unrefinanced loan is repaid at exit
+    levered[rows, conversion] += permanent_loan - construction_loan
+    levered[rows, exit_at] -= np.where(refinanced, exit_balance, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dscr = np.where(debt_service > 0, noi / debt_service, np.nan)
+    covered = in_permanent & (debt_service > 0)
+    counts = covered.sum(axis=1)
+    min_dscr = np.where(counts > 0, np.where(covered, dscr, np.inf).min(axis=1), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_dscr = np.where(counts > 0, np.where(covered, dscr, 0.0).sum(axis=1) / counts, np.nan)
+
+    return {
+        "interest": interest,
+        "principal": principal,
+        "debt_service": debt_service,
+        "balance": balance,
+        "dscr": dscr,
+        "levered_cashflows": levered,
+        "construction_loan": construction_loan,
+        "permanent_loan": permanent_loan,
+        "conversion_year": conversion,
+        "exit_year": exit_at,
+        "exit_balance": exit_balance,
+        "min_dscr": min_dscr,
+        "avg_dscr": avg_dscr,
+    }
+
+def levered_metrics(cashflows, **terms):
+    """Levered IRR, equity multiple and break-even year plus DSCR summaries for each row."""
+    financing = finance_cashflows(cashflows, **terms)
+    metrics = batch_metrics(financing["levered_cashflows"])
+    return {
+        "levered_irr": metrics["irr"],
+        "levered_equity_multiple": metrics["equity_multiple"],
+        "levered_break_even_year": metrics["break_even_year"],
+        "min_dscr": financing["min_dscr"],
+        "avg_dscr": financing["avg_dscr"],
+        "financing": financing,
+    }
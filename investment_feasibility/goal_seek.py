@@ -0,0 +1,144 @@
+import numpy as np
+from engine import KERNELS, product_columns
+from finance import batch_irr, batch_equity_multiple
+
+# Goal seek: solve one input per product so that a metric hits a target, for a whole
+# portfolio at once. Every iteration re-runs the batched kernel for the products that
+# are still unsolved and narrows each product's bracket with an Illinois (modified
+# regula falsi) step, falling back to bisection when the secant is unusable.
+#
+#   goal_seek(products, "residential", "rental_price", "irr", 0.12)
+#   goal_seek(products, "commercial", "dev_cost", "break_even_year", 8)
+
+# Input fields that can be solved for; "opex" resolves to opex_per_unit / opex_per_sqft
+VARIABLES = ["rental_price", "dev_cost", "opex", "absorption_rate"]
+METRICS = ["irr", "equity_multiple", "break_even_year"]
+
+# Default search range per product, as multiples of its current value (absorption is absolute)
+DEFAULT_BOUNDS = {
+    "rental_price": (0.0, 20.0),
+    "dev_cost": (0.0, 20.0),
+    "opex": (0.0, 20.0),
+    "absorption_rate": (0.01, 1.0),
+}
+
+def _variable_column(variable, category):
+    if variable == "opex":
+        return "opex_per_unit" if category == "residential" else "opex_per_sqft"
+    if variable not in VARIABLES:
+        raise ValueError(f"Unsupported goal-seek variable '{variable}' (expected one of {', '.join(VARIABLES)})")
+    return variable
+
+def _objective(cashflows, metric, target, irr_guess=None):
+    """
+    Signed distance of each row from the target, increasing as the deal improves.
+    Returns (gap, achieved metric, IRR for warm-starting the next solve).
+    """
+    if metric == "irr":
+        irr = batch_irr(cashflows, guess=irr_guess)
+        # No IRR: the flows never recover (worse than any target) or never cost anything
+        missing = np.where(cashflows.sum(axis=1) < 0, -np.inf, np.inf)
+        return np.where(np.isnan(irr), missing, irr - target), irr, irr
+    if metric == "equity_multiple":
+        achieved = batch_equity_multiple(cashflows)
+        return np.where(np.isnan(achieved), np.inf, achieved - target), achieved, None
+    if metric == "break_even_year":
+        # Breaking even by year `target` means the cumulative cash flow is non-negative by then
+        cumulative = np.cumsum(cashflows, axis=1)
+        recovered = cumulative >= 0
+        achieved = np.where(recovered.any(axis=1), np.argmax(recovered, axis=1), np.nan)
+        return cumulative[:, :int(target) + 1].max(axis=1), achieved, None
+    raise ValueError(f"Unsupported goal-seek metric '{metric}' (expected one of {', '.join(METRICS)})")
+
+def goal_seek(custom_products: dict, category: str, variable: str, metric: str, target: float, years=20,
+              bounds=None, xtol=1e-9, max_iter=100):
+    """
+    Solve `variable` for every product so that `metric` reaches `target`.
+
+    bounds is a (low, high) pair of multiples of each product's current value (absolute
+    values for absorption_rate), defaulting to DEFAULT_BOUNDS. The solved value is the
+    end of the final bracket that meets the target, so for break_even_year it is the
+    threshold at which the product first breaks even by the target year. Returns a dict
+    of per-product arrays: value (NaN where the target is not reachable inside the
+    bounds), achieved metric, converged flag, plus the product names.
+    """
+    category = category.lower()
+    column = _variable_column(variable, category)
+    kernel = KERNELS[category]
+    columns = product_columns(custom_products, category)
+    current = columns[column]
+
+    low, high = bounds or DEFAULT_BOUNDS[variable]
+    if variable == "absorption_rate":
+        lo = np.full(current.shape, float(low))
+        hi = np.full(current.shape, float(high))
+    else:
+        lo, hi = current * low, current * high
+
+    # Absorption changes the occupancy schedule on every step, so skip the shared cache
+    cache_kwargs = {"cache": None} if variable == "absorption_rate" else {}
+
+    def evaluate(rows, values, irr_guess=None):
+        inputs = {name: col[rows] for name, col in columns.items()}
+        inputs[column] = values
+        cashflows = kernel(**inputs, years=years, **cache_kwargs)["cashflows"]
+        return _objective(cashflows, metric, target, irr_guess)
+
+    all_rows = np.arange(current.size)
+    f_lo, _, _ = evaluate(all_rows, lo)
+    f_hi, _, _ = evaluate(all_rows, hi)
+
+    converged = np.zeros(current.size, dtype=bool)
+    irr_guess = np.full(current.size, np.nan)
+
+    # Only products whose target lies inside their bracket can be solved
+    bracketed = (np.sign(f_lo) != np.sign(f_hi)) | (f_lo == 0) | (f_hi == 0)
+    active = np.flatnonzero(bracketed)
+    # Illinois bookkeeping: which end was retained last time (-1 low, +1 high, 0 none)
+    retained = np.zeros(current.size, dtype=np.int8)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        a, b, fa, fb = lo[active], hi[active], f_lo[active], f_hi[active]
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            x = (a * fb - b * fa) / (fb - fa)
+        bisect = ~np.isfinite(x) | (x <= np.minimum(a, b)) | (x >= np.maximum(a, b))
+        x = np.where(bisect, 0.5 * (a + b), x)
+
+        guess = irr_guess[active]
+        f, _, irr = evaluate(active, x, guess if np.isfinite(guess).all() else None)
+        if irr is not None:
+            irr_guess[active] = irr
+
+        same_as_lo = np.sign(f) == np.sign(fa)
+        lo[active] = np.where(same_as_lo, x, a)
+        f_lo[active] = np.where(same_as_lo, f, fa)
+        hi[active] = np.where(same_as_lo, b, x)
+        f_hi[active] = np.where(same_as_lo, fb, f)
+
+        # Halve the stale end's value when the same end survives twice in a row
+        keep = np.where(same_as_lo, 1, -1).astype(np.int8)
+        stale = keep == retained[active]
+        f_lo[active] = np.where(stale & (keep == -1), 0.5 * f_lo[active], f_lo[active])
+        f_hi[active] = np.where(stale & (keep == 1), 0.5 * f_hi[active], f_hi[active])
+        retained[active] = keep
+
+        done = (f == 0) | (np.abs(hi[active] - lo[active]) <= xtol * (1 + np.abs(x)))
+        converged[active[done]] = True
+        active = active[~done]
+
+    # Report the bracket end that meets the target, which matters for stepwise metrics
+    # (break-even year) and inputs (absorption rates truncate to whole units)
+    solved = np.flatnonzero(converged)
+    value = np.where((f_lo >= 0) & ((f_hi < 0) | (f_lo <= f_hi)), lo, hi)
+    achieved = np.full(current.size, np.nan)
+    if solved.size:
+        _, achieved[solved], _ = evaluate(solved, value[solved])
+
+    return {
+        "products": list(custom_products),
+        "value": np.where(converged, value, np.nan),
+        "achieved": achieved,
+        "converged": converged,
+    }
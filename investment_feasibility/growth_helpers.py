@@ -1,10 +1,9 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import threading
 import numpy as np
-import numpy_financial as npf
+from collections import OrderedDict
+from instrumentation import stage
 
 inflation = 0.03
-import numpy_financial as npf
 
 # Residential Helper Functions!!
 
@@ -105,6 +104,167 @@ def cap_net_occupancy(net_units, total_units):
             break
     return capped
 
+# Batched Helper Functions!!
+# Vectorized counterparts of the per-product helpers above. Every argument may be a
+# scalar or an array of length N; results are N x years matrices. The list-based
+# functions remain the reference behavior these must reproduce.
+
+def round_like_python(values, digits=2):
+    """
+    np.round agreeing with the builtin round() the reference helpers use. np.round scales
+    by 10**digits before rounding, which can push a value like 2.675 across the .5 tie
+    that round() resolves on the exact decimal; values that land near a tie go through
+    round() itself.
+    """
+    values = np.asarray(values, dtype=float)
+    scaled = values * 10.0 ** digits
+    rounded = np.rint(scaled) / 10.0 ** digits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, digits) for value in values[near_tie].tolist()]
+    return rounded
+
+def batch_phase_absorption(totals, absorption_rates, years):
+    totals = np.atleast_1d(np.asarray(totals, dtype=float))
+    rates = np.broadcast_to(np.asarray(absorption_rates, dtype=float), totals.shape)
+    step = np.trunc(totals * rates)[:, None]
+    cumulative = np.minimum(step * np.arange(1, years + 1), totals[:, None])
+    return np.diff(cumulative, axis=1, prepend=0.0)
+
+def batch_net_occupancy(absorbed, churn_rates=DEFAULT_CHURN_RATE, reabsorption_rates=DEFAULT_REABSORPTION_RATE,
+                        early_occupancy_rates=DEFAULT_EARLY_OCCUPANCY_RATE, first_year_early_only=False):
+    absorbed = np.asarray(absorbed, dtype=float)
+    churn_rates = np.asarray(churn_rates, dtype=float).reshape(-1, 1)
+    reabsorption_rates = np.asarray(reabsorption_rates, dtype=float).reshape(-1, 1)
+    early_occupancy_rates = np.asarray(early_occupancy_rates, dtype=float).reshape(-1, 1)
+
+    churned = round_like_python(absorbed * churn_rates)
+    reabsorbed = round_like_python(churned * reabsorption_rates)
+    pre_rental = round_like_python(absorbed * early_occupancy_rates)
+    if first_year_early_only:
+        # Commercial leases only pre-lease in the first year (see net_sqft_occupancy)
+        pre_rental[:, 1:] = 0
+        return absorbed - churned + reabsorbed + pre_rental
+    return round_like_python(absorbed - churned + reabsorbed + pre_rental)
+
+def batch_cap_net_occupancy(net_units, totals):
+    net_units = np.asarray(net_units, dtype=float)
+    totals = np.asarray(totals, dtype=float).reshape(-1, 1)
+    cumulative = np.cumsum(net_units, axis=1)
+    before = np.hstack([np.zeros((cumulative.shape[0], 1)), cumulative[:, :-1]])
+    # Once the running total reaches capacity every later year is zero
+    full = np.logical_or.accumulate(cumulative >= totals, axis=1)
+    was_full = np.hstack([np.zeros((full.shape[0], 1), dtype=bool), full[:, :-1]])
+    return np.where(was_full, 0.0, np.minimum(net_units, totals - before))
+
+def batch_occupancy(totals, absorption_rates, years, churn_rates=DEFAULT_CHURN_RATE,
+                    reabsorption_rates=DEFAULT_REABSORPTION_RATE, early_occupancy_rates=DEFAULT_EARLY_OCCUPANCY_RATE,
+                    commercial=False):
+    """
+    Occupied units (or leased sqft when commercial=True) per year for N products.
+    Equivalent to cap_net_occupancy(net_occupancy(phase_absorption(...))) for residential
+    and cap_net_occupancy(net_sqft_occupancy(phase_sqft_absorption(...))) for commercial.
+    """
+    totals = np.atleast_1d(np.asarray(totals, dtype=float))
+    shape = totals.shape
+    with stage("absorption", rows=shape[0]):
+        absorbed = batch_phase_absorption(totals, absorption_rates, years)
+    with stage("net_occupancy", rows=shape[0]):
+        net = batch_net_occupancy(
+            absorbed,
+            churn_rates=np.broadcast_to(churn_rates, shape),
+            reabsorption_rates=np.broadcast_to(reabsorption_rates, shape),
+            early_occupancy_rates=np.broadcast_to(early_occupancy_rates, shape),
+            first_year_early_only=commercial
+        )
+    with stage("occupancy_capping", rows=shape[0]):
+        return batch_cap_net_occupancy(net, totals)
+
+class OccupancyCache:
+    """
+    Bounded LRU cache of occupancy schedules keyed on
+    (total, absorption rate, churn, reabsorption, early occupancy, years, commercial).
+    Schedules are stored read-only so callers cannot corrupt shared entries. `hits`
+    counts product rows served without recomputation, `misses` counts schedules computed.
+    Lookups and updates hold a lock, so threads (e.g. the service's thread workers) can
+    share one cache; schedules are computed outside it.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def occupancy(self, totals, absorption_rates, years, churn_rates=DEFAULT_CHURN_RATE,
+                  reabsorption_rates=DEFAULT_REABSORPTION_RATE, early_occupancy_rates=DEFAULT_EARLY_OCCUPANCY_RATE,
+                  commercial=False):
+        """Drop-in for batch_occupancy that only computes schedules it has not seen."""
+        columns = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in
+                                        (totals, absorption_rates, churn_rates, reabsorption_rates, early_occupancy_rates)])
+        params = np.column_stack([c.ravel() for c in columns])
+        if params.shape[0] == 0:
+            return np.zeros((0, years))
+        unique, inverse = np.unique(params, axis=0, return_inverse=True)
+
+        keys = [(*row, years, bool(commercial)) for row in unique.tolist()]
+        with self._lock:
+            schedules = [self._entries.get(key) for key in keys]
+            for key, schedule in zip(keys, schedules):
+                if schedule is not None:
+                    self._entries.move_to_end(key)
+        missing = [i for i, schedule in enumerate(schedules) if schedule is None]
+
+        if missing:
+            computed = batch_occupancy(*unique[missing].T[:2], years, *unique[missing].T[2:], commercial=commercial)
+            for i, schedule in zip(missing, computed):
+                schedule = schedule.copy()
+                schedule.setflags(write=False)
+                schedules[i] = schedule
+
+        with self._lock:
+            for i in missing:
+                self._store(keys[i], schedules[i])
+            self.misses += len(missing)
+            self.hits += params.shape[0] - len(missing)
+        matrix = np.stack(schedules)[inverse.ravel()]
+        matrix.setflags(write=False)
+        return matrix
+
+    def _store(self, key, schedule):
+        self._entries[key] = schedule
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __getstate__(self):
+        # Locks cannot be pickled; a copy sent to another process gets its own
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+# Shared cache used by the models and batched kernels
+OCCUPANCY_CACHE = OccupancyCache()
+
 # Example usage:
 if __name__ == "__main__":
     # Example residential absorption - "Apartments and SF"
@@ -1,8 +1,16 @@
+PRODUCT_CATEGORIES = {
+    "Residential": ["Detached", "Attached", "Multi-Family"],
+    "Commercial": ["Industrial", "Office", "Retail", "Data Centers", "Hotel"]
+}
+
+# Fields the residential_model / commercial_model read without a default
+REQUIRED_FIELDS = {
+    "residential": ["units", "rental_price", "dev_cost", "opex_per_unit", "absorption_rate"],
+    "commercial": ["sqft", "rental_price", "absorption_rate"],
+}
+
 def get_user_inputs():
-    product_categories = {
-        "Residential": ["Detached", "Attached", "Multi-Family"],
-        "Commercial": ["Industrial", "Office", "Retail", "Data Centers", "Hotel"]
-    }
+    product_categories = PRODUCT_CATEGORIES
 
     project_data = []
 
@@ -102,3 +110,85 @@ def _get_positive_int(prompt):
         except ValueError:
             print("Invalid input. Enter an integer.")
 
+def validate_entry(entry):
+    required_keys = ["product", "category"]
+    if not all(k in entry for k in required_keys):
+        return False
+
+    cat = entry.get("category", "").lower()
+
+    if cat == "residential" and "units" not in entry:
+        return False
+    if cat == "commercial" and "sqft" not in entry:
+        return False
+    if cat == "mixed-use":
+        res_valid = "residential" in entry and any(
+            isinstance(v, dict) and "units" in v for v in entry["residential"].values()
+        )
+        com_valid = "commercial" in entry and any(
+            isinstance(v, dict) and "sqft" in v for v in entry["commercial"].values()
+        )
+        return res_valid and com_valid
+
+    return True
+
+def normalize_entries(product_input):
+    """Split raw product entries into residential, commercial and mixed-use product dicts."""
+    residential_products = {}
+    commercial_products = {}
+    mixed_use_products = {}
+
+    for entry in product_input:
+        if not isinstance(entry, dict):
+            print(f"⚠️ Skipping invalid entry: {entry}")
+            continue
+
+        # Normalize keys
+        entry = {k.strip().lower(): v for k, v in entry.items()}
+
+        if not validate_entry(entry):
+            print(f"⚠️ Skipping incomplete entry: {entry.get('product', 'Unknown')}")
+            continue
+
+        name = entry.get("product", "Unnamed")
+        category = entry.get("category", "").strip().lower()
+
+        if "acq cost" in entry:
+            entry["acq_cost"] = entry.pop("acq cost")
+
+        if category == "residential":
+            residential_products[name] = entry
+        elif category == "commercial":
+            if "square_feet" in entry:
+                entry["sqft"] = entry.pop("square_feet")
+            if "opex_per_unit" in entry:
+                entry["opex_per_sqft"] = entry.pop("opex_per_unit")
+            elif "opex" in entry:
+                entry["opex_per_sqft"] = entry.pop("opex")
+            if "opex_per_sqft" not in entry:
+                entry["opex_per_sqft"] = 6.0
+            commercial_products[name] = entry
+        elif category == "mixed-use":
+            if "residential" in entry:
+                for k, v in entry["residential"].items():
+                    if "opex" not in v and "opex_per_unit" in v:
+                        v["opex_per_unit"] = v.pop("opex_per_unit")
+            if "commercial" in entry:
+                for k, v in entry["commercial"].items():
+                    if "opex" not in v and "opex_per_sqft" in v:
+                        v["opex_per_sqft"] = v.pop("opex_per_sqft")
+
+            res_data = entry.get("residential", {})
+            com_data = entry.get("commercial", {})
+            has_valid_res = isinstance(res_data, dict) and any(
+                isinstance(v, dict) and "units" in v for v in res_data.values()
+            )
+            has_valid_com = isinstance(com_data, dict) and any(
+                isinstance(v, dict) and "sqft" in v for v in com_data.values()
+            )
+            if has_valid_res and has_valid_com:
+                mixed_use_products[name] = entry
+            else:
+                print(f"⚠️ Skipping mixed-use entry '{name}' — incomplete residential or commercial data")
+
+    return residential_products, commercial_products, mixed_use_products
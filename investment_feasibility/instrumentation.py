@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+# Opt-in per-stage instrumentation for the model pipeline. Enable with enable() or by
+# setting FEASIBILITY_PROFILE=1. While disabled, stage() hands back a shared no-op
+# context manager and count() returns immediately, so instrumented code pays only a
+# function call and a flag check.
+
+ENABLED = os.environ.get("FEASIBILITY_PROFILE") == "1"
+
+_stages = {}
+_counters = {}
+
+class _Stage:
+    __slots__ = ("name", "rows", "start")
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        stats = _stages.get(self.name)
+        if stats is None:
+            stats = _stages[self.name] = {"calls": 0, "seconds": 0.0, "rows": 0}
+        stats["calls"] += 1
+        stats["seconds"] += elapsed
+        stats["rows"] += self.rows
+        return False
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+def reset():
+    _stages.clear()
+    _counters.clear()
+
+def stage(name, rows=0):
+    """Time a block: `with stage("irr_solve", rows=n): ...`"""
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, rows)
+
+def count(name, value=1):
+    if not ENABLED:
+        return
+    _counters[name] = _counters.get(name, 0) + value
+
+def snapshot():
+    return {
+        "stages": {name: dict(stats) for name, stats in _stages.items()},
+        "counters": dict(_counters),
+    }
+
+def dump_json(file_name):
+    with open(file_name, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+    return file_name
@@ -0,0 +1,303 @@
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from inputs import normalize_entries, REQUIRED_FIELDS
+
+# Bulk portfolio loading from CSV, JSON / JSON Lines or Parquet.
+#
+# Tabular files hold one row per product with the same fields get_user_inputs collects:
+#   category, product, acq_cost | land_cost, units | sqft, rental_price, dev_cost,
+#   opex_per_unit | opex_per_sqft, absorption_rate, product_type
+# acq_cost is the product's own land cost. land_cost (get_user_inputs' "acq cost") is the
+# land cost shared by the product's whole category, to be charged once: as with
+# get_user_inputs it is kept as the products' acq_cost and also recorded per category in
+# the `land_costs` dict the caller passes (see rollup.portfolio_rollup). Residential or
+# commercial rows giving another land_cost than their category already has are rejected.
+# On mixed-use rows it is the project's own land cost.
+# Mixed-use projects are spread over one row per component: category "Mixed-Use",
+# `project` naming the project, `component` set to "residential" or "commercial" and
+# `product` naming the component (e.g. "Detached", "Retail").
+# A .json file may also hold a list of nested entries exactly as get_user_inputs returns.
+# Product names must be unique within a category (and component names within a mixed-use
+# project); later rows repeating a name are rejected, across chunks as well.
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Characters read from a .json portfolio at a time while decoding its entries
+JSON_BLOCK_SIZE = 1 << 20
+
+COLUMN_ALIASES = {"acq cost": "land_cost", "square_feet": "sqft", "opex": "opex_cost"}
+
+NUMERIC_COLUMNS = ["acq_cost", "land_cost", "units", "sqft", "rental_price", "dev_cost",
+                   "opex_per_unit", "opex_per_sqft", "opex_cost", "absorption_rate"]
+
+_JSON_SEPARATOR = re.compile(r"[\s,]*")
+
+def _iter_json_entries(path, block_size=JSON_BLOCK_SIZE):
+    # Entries of a top-level JSON array, decoded one at a time so the file is never held whole
+    decoder = json.JSONDecoder()
+    with open(path) as f:
+        buffer = f.read(block_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} must hold a JSON array of portfolio entries")
+        idx = 1
+        while True:
+            idx = _JSON_SEPARATOR.match(buffer, idx).end()
+            if buffer.startswith("]", idx):
+                return
+            try:
+                entry, end = decoder.raw_decode(buffer, idx)
+            except json.JSONDecodeError:
+                # The entry runs past the buffer; read on (a truncated file still fails)
+                more = f.read(block_size)
+                if not more:
+                    raise
+                buffer, idx = buffer[idx:] + more, 0
+                continue
+            yield entry
+            idx = end
+
+def _is_nested(entry):
+    return isinstance(entry, dict) and isinstance(entry.get("residential", entry.get("commercial")), dict)
+
+def _json_chunks(path, chunksize):
+    # Flat rows become DataFrames like the other formats; chunks holding nested entries
+    # (as get_user_inputs returns them) are passed through as lists for normalize_entries
+    entries = _iter_json_entries(path)
+    while True:
+        chunk = [entry for _, entry in zip(range(chunksize), entries)]
+        if not chunk:
+            return
+        yield chunk if any(_is_nested(entry) for entry in chunk) else pd.DataFrame(chunk)
+
+def _read_chunks(path, chunksize):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        yield from _json_chunks(path, chunksize)
+    elif ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunksize)
+    elif ext in (".jsonl", ".ndjson"):
+        yield from pd.read_json(path, lines=True, chunksize=chunksize)
+    elif ext == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet portfolios requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported portfolio file type '{ext}' (expected .csv, .json, .jsonl or .parquet)")
+
+def _prepare(df):
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    df = df.rename(columns=COLUMN_ALIASES)
+    for col in ["category", "product", "project", "component", "product_type"]:
+        if col not in df.columns:
+            df[col] = None
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else np.nan
+
+    df["category"] = df["category"].astype("string").str.strip().str.lower()
+    df["component"] = df["component"].astype("string").str.strip().str.lower()
+    df["acq_cost"] = df["acq_cost"].fillna(df["land_cost"])
+    # Commercial rows may give opex under the residential or generic name, as main accepts
+    commercial = (df["category"] == "commercial").fillna(False)
+    df.loc[commercial, "opex_per_sqft"] = (df.loc[commercial, "opex_per_sqft"]
+                                           .fillna(df.loc[commercial, "opex_per_unit"])
+                                           .fillna(df.loc[commercial, "opex_cost"])
+                                           .fillna(6.0))
+    return df
+
+def _product_keys(df):
+    # Names that must be unique: category and product, plus project and component for mixed-use
+    mixed = (df["category"] == "mixed-use").fillna(False)
+    parts = [df["category"], df["project"].astype("string").where(mixed, ""),
+             df["component"].where(mixed, ""), df["product"].astype("string")]
+    return pd.Series(["\x1f".join(map(str, key)) for key in zip(*(part.fillna("") for part in parts))],
+                     index=df.index, dtype="object")
+
+def validate_rows(df, seen=None, land_costs=None):
+    """
+    Vectorized counterpart of validate_entry for tabular rows. Returns a Series of
+    rejection reasons aligned with df (empty string for valid rows). Rows repeating an
+    earlier row's product name are rejected; `seen` carries the names accepted from
+    earlier chunks and is updated with this chunk's. `land_costs` likewise carries the
+    category land costs ({"Residential": cost, ...}); rows conflicting with them are
+    rejected.
+    """
+    reasons = pd.Series("", index=df.index, dtype="object")
+
+    def reject(mask, reason):
+        mask = mask.fillna(True) & (reasons == "")
+        reasons[mask] = reason
+
+    reject(df["product"].isna() | df["category"].isna(), "missing product or category")
+    reject(~df["category"].isin(["residential", "commercial", "mixed-use"]), "unknown category")
+
+    mixed = df["category"] == "mixed-use"
+    reject(mixed & df["project"].isna(), "mixed-use component without project")
+    reject(mixed & ~df["component"].isin(["residential", "commercial"]), "mixed-use component must be residential or commercial")
+
+    kind = df["category"].where(~mixed, df["component"])
+    for category, fields in REQUIRED_FIELDS.items():
+        rows = kind == category
+        for field in fields:
+            reject(rows & df[field].isna(), f"missing or non-numeric {field}")
+        size = "units" if category == "residential" else "sqft"
+        reject(rows & (df[size] <= 0), f"{size} must be positive")
+        reject(rows & ~df["absorption_rate"].between(0, 1, inclusive="right"), "absorption_rate must be in (0, 1]")
+
+    if land_costs is not None:
+        for category in ("residential", "commercial"):
+            rows = (reasons == "") & (df["category"] == category).fillna(False) & df["land_cost"].notna()
+            if rows.any():
+                cost = land_costs.setdefault(category.capitalize(), float(df.loc[rows, "land_cost"].iloc[0]))
+                reject(rows & (df["land_cost"] != cost), "land_cost differs from the category's land cost")
+
+    valid = reasons == ""
+    keys = _product_keys(df)
+    duplicate = valid & keys.where(valid).duplicated()
+    if seen is not None:
+        duplicate |= valid & keys.isin(seen)
+        seen.update(keys[valid & ~duplicate])
+    reject(duplicate, "duplicate product name")
+    return reasons
+
+def _row_dicts(df, columns):
+    # Drop missing fields per row so products look like the interactive entries
+    records = df[columns].to_dict("records")
+    return [{k: v for k, v in rec.items() if not (isinstance(v, float) and np.isnan(v)) and v is not None
+             and v is not pd.NA} for rec in records]
+
+def _product_entries(df, category):
+    size = "units" if category == "residential" else "sqft"
+    opex = "opex_per_unit" if category == "residential" else "opex_per_sqft"
+    columns = ["product", "acq_cost", size, "rental_price", "dev_cost", opex, "absorption_rate", "product_type"]
+    entries = {}
+    for rec in _row_dicts(df, columns):
+        rec[size] = int(rec[size])
+        rec["category"] = category.capitalize()
+        rec.setdefault("product_type", str(rec["product"]).lower())
+        entries[rec["product"]] = rec
+    return entries
+
+def _mixed_use_components(df):
+    projects = {}
+    columns = ["project", "component", "product", "acq_cost", "units", "sqft", "rental_price", "dev_cost",
+               "opex_per_unit", "opex_per_sqft", "absorption_rate", "product_type"]
+    for rec in _row_dicts(df, columns):
+        project = projects.setdefault(rec["project"], {
+            "category": "Mixed-Use", "product": rec["project"], "acq_cost": rec.get("acq_cost", 0),
+            "residential": {}, "commercial": {}
+        })
+        component = rec.pop("component")
+        name = rec.pop("product")
+        for key in ["project", "acq_cost"] + (["sqft", "opex_per_sqft"] if component == "residential"
+                                              else ["units", "opex_per_unit"]):
+            rec.pop(key, None)
+        size = "units" if component == "residential" else "sqft"
+        rec[size] = int(rec[size])
+        rec.setdefault("product_type", str(name).lower())
+        project[component][name] = rec
+    return projects
+
+def _split_chunk(df, rejected, seen, land_costs):
+    df = _prepare(df)
+    reasons = validate_rows(df, seen, land_costs)
+    bad = reasons != ""
+    if bad.any():
+        rejected.append(pd.DataFrame({"product": df.loc[bad, "product"], "reason": reasons[bad]}))
+    df = df[~bad]
+    residential = _product_entries(df[df["category"] == "residential"], "residential")
+    commercial = _product_entries(df[df["category"] == "commercial"], "commercial")
+    return residential, commercial, df[df["category"] == "mixed-use"]
+
+def _unique_entries(entries, seen):
+    # Nested entries keep the first of any repeated category / product name
+    unique = []
+    for entry in entries:
+        fields = {str(k).strip().lower(): v for k, v in entry.items()} if isinstance(entry, dict) else {}
+        key = "\x1f".join([str(fields.get("category", "")).strip().lower(), "", "", str(fields.get("product", "Unnamed"))])
+        if fields and key in seen:
+            print(f"⚠️ Skipping duplicate product name: {fields.get('product', 'Unnamed')}")
+            continue
+        seen.add(key)
+        unique.append(entry)
+    return unique
+
+def _take_land_costs(entries, land_costs):
+    # Residential and commercial get_user_inputs entries carry their category's land cost
+    # as "acq cost"; it is recorded once per category
+    kept = []
+    for entry in entries:
+        fields = {str(k).strip().lower(): v for k, v in entry.items()} if isinstance(entry, dict) else {}
+        category = str(fields.get("category", "")).strip().capitalize()
+        land = [k for k in entry if str(k).strip().lower() in ("acq cost", "land_cost")] \
+            if category in ("Residential", "Commercial") else []
+        if land:
+            try:
+                cost = float(entry[land[0]])
+            except (TypeError, ValueError):
+                print(f"⚠️ Skipping entry with non-numeric land cost: {fields.get('product', 'Unnamed')}")
+                continue
+            if land_costs.setdefault(category, cost) != cost:
+                print(f"⚠️ Skipping entry whose land cost differs from the {category} land cost: "
+                      f"{fields.get('product', 'Unnamed')}")
+                continue
+        kept.append(entry)
+    return kept
+
+def _finish_mixed_use(mixed_rows):
+    projects = _mixed_use_components(pd.concat(mixed_rows)) if mixed_rows else {}
+    complete = {}
+    for name, project in projects.items():
+        if project["residential"] and project["commercial"]:
+            complete[name] = project
+        else:
+            print(f"⚠️ Skipping mixed-use entry '{name}' — incomplete residential or commercial data")
+    return complete
+
+def _report(rejected):
+    if rejected:
+        rejected = pd.concat(rejected)
+        print(f"⚠️ Skipped {len(rejected)} invalid portfolio rows:")
+        for reason, count in rejected["reason"].value_counts().items():
+            print(f"   • {reason}: {count}")
+
+def iter_portfolio_chunks(path, chunksize=DEFAULT_CHUNK_SIZE, land_costs=None):
+    """
+    Stream a portfolio file, yielding (residential, commercial, mixed_use) product dicts
+    per chunk of rows. Mixed-use components are held back and yielded with the final chunk,
+    since a project's rows may straddle chunk boundaries. Category land costs found in the
+    file are recorded in `land_costs` ({"Residential": cost, ...}) as they are read.
+    """
+    rejected, mixed_rows, seen = [], [], set()
+    land_costs = {} if land_costs is None else land_costs
+    for chunk in _read_chunks(path, chunksize):
+        if isinstance(chunk, list):
+            # Nested entries as produced by get_user_inputs
+            yield normalize_entries(_take_land_costs(_unique_entries(chunk, seen), land_costs))
+            continue
+        residential, commercial, mixed = _split_chunk(chunk, rejected, seen, land_costs)
+        if not mixed.empty:
+            mixed_rows.append(mixed)
+        if residential or commercial:
+            yield residential, commercial, {}
+    mixed_use = _finish_mixed_use(mixed_rows)
+    if mixed_use:
+        yield {}, {}, mixed_use
+    _report(rejected)
+
+def load_portfolio(path, chunksize=DEFAULT_CHUNK_SIZE, land_costs=None):
+    """
+    Load a whole portfolio file into the (residential, commercial, mixed_use) dicts main.py
+    runs; category land costs are recorded in `land_costs` (see iter_portfolio_chunks).
+    """
+    residential, commercial, mixed_use = {}, {}, {}
+    for res, com, mix in iter_portfolio_chunks(path, chunksize, land_costs):
+        residential.update(res)
+        commercial.update(com)
+        mixed_use.update(mix)
+    return residential, commercial, mixed_use
@@ -1,235 +1,156 @@
-import numpy_financial as npf
-import pandas as pd
-from growth_helpers import (phase_absorption, net_occupancy, DEFAULT_CHURN_RATE,
-                            DEFAULT_REABSORPTION_RATE, phase_sqft_absorption,DEFAULT_EARLY_OCCUPANCY_RATE,
-                            commercial_churn, net_sqft_occupancy,forecast_rental_income,
-                            cap_net_occupancy)
-from inputs import get_user_inputs
-from finance import (calculate_equity_multiple, find_break_even_year, calculate_irr,
-                     calculate_development_cost, calculate_residential_dev_cost, calculate_commercial_dev_cost)
+import sys
+import numpy as np
+from inputs import normalize_entries
+import instrumentation
+from instrumentation import stage
+from engine import mixed_use_cashflows, DEFAULT_DEV_COST_PER_SQFT_COM
+from result_cache import product_results, ResultCache
+from rollup import portfolio_rollup
+from financing import levered_metrics
+from results import ResultStore, RESIDENTIAL_COLUMNS, COMMERCIAL_COLUMNS, LEVERED_COLUMNS, MIXED_USE_COLUMNS
+from finance import batch_metrics
+
+def residential_model(custom_products: dict, shared_acq_cost: float, dev_cost_per_sqft: float, zip_code: str, years: int = 20,
+                      store: ResultStore = None, result_cache: ResultCache = None):
+    if store is None:
+        store = ResultStore(custom_products.keys(), years, RESIDENTIAL_COLUMNS, int_columns=["Units"])
+
+    if custom_products:
+        # Every product in one batched pass; unchanged products come from result_cache if given
+        results = product_results(custom_products, "residential", years, result_cache)
 
-def fetch_average_sqft(zip_code, product_type=None):
-    defaults = {
-        "detached": 1600,
-        "townhome": 1300,
-        "multifamily": 950
-    }
-    return defaults.get(product_type, 1250)
-
-def residential_model(custom_products: dict, shared_acq_cost: float, dev_cost_per_sqft: float, zip_code: str, years: int = 20):
-    results = []
-    portfolio_cashflows = [0] * years  # to sum across products (excluding acq cost)
-    for name, vals in custom_products.items():
-        avg_sqft = fetch_average_sqft(zip_code, product_type=vals.get("product_type", "").lower())
-
-        absorbed = phase_absorption(vals["units"], vals["absorption_rate"], years)
-        net_units = cap_net_occupancy(net_occupancy(
-            absorbed,
-            churn_rate=DEFAULT_CHURN_RATE,
-            reabsorption_rate=DEFAULT_REABSORPTION_RATE,
-            early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE
-        ), vals["units"])
-
-        revenue_schedule = [units * vals["rental_price"] * 12 for units in net_units]
-        total_revenue = sum(revenue_schedule)
-        total_dev_cost = calculate_residential_dev_cost(vals["units"], vals["dev_cost"])
-
-        yearly_opex = [vals["opex_per_unit"] * occupied for occupied in net_units]
-        yearly_noi = [revenue_schedule[i] - yearly_opex[i] for i in range(years)]
-        total_opex = sum(yearly_opex)
+        # Exclude acquisition cost at product level
+        store.cashflows[:] = results["cashflows"]
+
+        store.fill(
+            Units=[vals["units"] for vals in custom_products.values()],
+            Total_Revenue=results["total_revenue"],
+            Acquisition_Cost=0,  # for display only
+            Development_Cost=results["development_cost"],
+            Total_OpEx=results["total_opex"],
+            NOI=results["total_revenue"] - results["total_opex"],
+            IRR=results["irr"],
+            Equity_Multiple=results["equity_multiple"],
+            Break_Even_Year=results["break_even_year"]
+        )
+    with stage("dataframe_build", rows=len(store)):
+        df = store.to_frame()
+    return df, store.portfolio_cashflows().tolist()
+
+def commercial_model(custom_products: dict, years=20, store: ResultStore = None, result_cache: ResultCache = None,
+                     financing: dict = None):
+    # financing: loan terms for financing.finance_cashflows; DSCR then reports true debt
+    # coverage (minimum over the permanent loan) and levered returns are added
+    if store is None:
+        columns = COMMERCIAL_COLUMNS + (LEVERED_COLUMNS if financing is not None else [])
+        store = ResultStore(custom_products.keys(), years, columns, int_columns=["SqFt_Planned"])
+
+    if custom_products:
+        # Every product in one batched pass; unchanged products come from result_cache if given
+        results = product_results(custom_products, "commercial", years, result_cache)
+        sqft = np.array([vals["sqft"] for vals in custom_products.values()], dtype=float)
+        acq_cost = np.array([vals.get("acq_cost", 0) for vals in custom_products.values()], dtype=float)
+        opex_per_sqft = np.array([vals.get("opex_per_sqft", 6.0) for vals in custom_products.values()], dtype=float)
+
+        total_revenue = results["total_revenue"]
+        total_dev_cost = results["development_cost"]
+        total_opex = opex_per_sqft * sqft
         noi = total_revenue - total_opex
 
         # Exclude acquisition cost at product level
-        cashflows = [-total_dev_cost] + yearly_noi
-        irr = calculate_irr(cashflows)
-        equity_multiple = calculate_equity_multiple(cashflows)
-        be_year = find_break_even_year(cashflows)
-
-
-        for i in range(years):
-            portfolio_cashflows[i] += yearly_noi[i]
-
-        results.append({
-            "Product": name,
-            "Units": vals["units"],
-            "Total_Revenue": total_revenue,
-            "Acquisition_Cost": 0,  # for display only
-            "Development_Cost": total_dev_cost,
-            "Total_OpEx": total_opex,
-            "NOI": noi,
-            "IRR": irr,
-            "Equity_Multiple": equity_multiple,
-            "Break_Even_Year": be_year
-        })
-    return pd.DataFrame(results), portfolio_cashflows
-
-def commercial_model(custom_products: dict, years=20):
-    results = []
-    portfolio_cashflows = [0] * years
-    for prod_name, vals in custom_products.items():
-        absorbed_schedule = phase_sqft_absorption(vals["sqft"], vals["absorption_rate"], years)
-
-        raw_net_units = net_sqft_occupancy(
-            absorbed_schedule,
-            total_sqft=vals["sqft"],
-            churn_rate=DEFAULT_CHURN_RATE,
-            reabsorption_rate=DEFAULT_REABSORPTION_RATE,
-            early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE
+        store.cashflows[:] = results["cashflows"]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cap_rate = np.where(acq_cost != 0, noi / acq_cost, np.nan)  # optional display
+            dscr = np.where(total_dev_cost > 0, noi / total_dev_cost, np.nan)
+        if financing is not None:
+            levered = levered_metrics(store.cashflows, **financing)
+            dscr = levered["min_dscr"]
+            store.fill(Levered_IRR=levered["levered_irr"], Levered_Equity_Multiple=levered["levered_equity_multiple"])
+
+        store.fill(
+            SqFt_Planned=sqft,
+            Total_Revenue=total_revenue,
+            Acquisition_Cost=0,
+            Development_Cost=total_dev_cost,
+            Total_OpEx=total_opex,
+            NOI=noi,
+            Net_Cash_Flow=noi - total_dev_cost,
+            DSCR=dscr,
+            Capitalization_Rate=cap_rate,
+            IRR=results["irr"],
+            Equity_Multiple=results["equity_multiple"],
+            Break_Even_Year=results["break_even_year"]
+        )
+    with stage("dataframe_build", rows=len(store)):
+        df = store.to_frame()
+    return df, store.portfolio_cashflows().tolist()
+
+def mixed_use_model(custom_products, dev_cost_per_sqft_res, dev_cost_per_sqft_com, zip_code, years=20,
+                    store: ResultStore = None):
+    if store is None:
+        store = ResultStore(custom_products.keys(), years, MIXED_USE_COLUMNS, labels={"Category": "Mixed-Use"})
+
+    if custom_products:
+        # Every residential and commercial component in one batched pass, summed per project
+        flows = mixed_use_cashflows(custom_products, dev_cost_per_sqft_com, years)
+        total_revenue = flows["revenue"].sum(axis=1)
+        total_opex = flows["opex"].sum(axis=1)
+        total_noi = total_revenue - total_opex
+        total_cons_cost = flows["acquisition_cost"] + flows["development_cost"]
+
+        store.cashflows[:] = flows["cashflows"]
+        store.fill(
+            Total_Revenue=total_revenue,
+            Acquisition_Cost=flows["acquisition_cost"],
+            Development_Cost=flows["development_cost"],
+            Total_OpEx=total_opex,
+            NOI=total_noi,
+            Net_Cash_Flow=total_noi - total_cons_cost
         )
 
-        net_units = cap_net_occupancy(raw_net_units, vals["sqft"])
-
-        revenue_schedule = [round(units * vals["rental_price"] * 12, 2) for units in net_units]
-        total_revenue = sum(revenue_schedule)
-
-        dev_cost_per_sqft = vals.get("dev_cost", 0)
-        total_dev_cost = calculate_commercial_dev_cost(vals["sqft"], dev_cost_per_sqft)
-        opex_per_sqft = vals.get("opex_per_sqft", 6.0)
-        total_opex = opex_per_sqft * vals["sqft"]
+    metrics = batch_metrics(store.cashflows)
+    store.fill(
+        IRR=metrics["irr"],
+        Equity_Multiple=metrics["equity_multiple"],
+        Break_Even_Year=metrics["break_even_year"]
+    )
+    with stage("dataframe_build", rows=len(store)):
+        return store.to_frame()
 
-        yearly_noi = [revenue_schedule[i] - absorbed_schedule[i] * opex_per_sqft for i in range(years)]
-        NOI = total_revenue - total_opex
+def fetch_average_sqft(zip_code, product_type=None):
+    """Average sqft for a ZIP and product type; see market_data.fetch_average_sqft."""
+    # Imported on call so the dataset is only opened by callers that need it
+    from market_data import fetch_average_sqft as market_average_sqft
+    return market_average_sqft(zip_code, product_type)
+
+def format_for_display(df):
+    # String formatting for console output only; exports keep the numeric columns
+    df = df.copy()
+    currency_cols = [
+        "Total_Revenue", "Acquisition_Cost", "Development_Cost",
+        "Total_OpEx", "NOI", "Net_Cash_Flow"
+    ]
+    for col in currency_cols:
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: f"${x:,.0f}")
 
-        # Exclude acquisition cost at product level
-        cashflows = [-total_dev_cost] + yearly_noi
-        irr = calculate_irr(cashflows)
-        equity_multiple = calculate_equity_multiple(cashflows)
-        break_even_year = find_break_even_year(cashflows)
-
-        # Add product cashflow to portfolio-level cashflow
-        for i in range(years):
-            portfolio_cashflows[i] += yearly_noi[i]
-
-        net_cash_flow = NOI - total_dev_cost
-        cap_rate = NOI / vals.get("acq_cost", 1) if vals.get("acq_cost", 0) else None  # optional display
-        dscr = NOI / total_dev_cost if total_dev_cost > 0 else None
-
-        results.append({
-            "Product": prod_name,
-            "SqFt_Planned": vals["sqft"],
-            "Total_Revenue": total_revenue,
-            "Acquisition_Cost": 0,
-            "Development_Cost": total_dev_cost,
-            "Total_OpEx": total_opex,
-            "NOI": NOI,
-            "Net_Cash_Flow": net_cash_flow,
-            "DSCR": dscr,
-            "Capitalization_Rate": cap_rate,
-            "IRR": irr,
-            "Equity_Multiple": equity_multiple,
-            "Break_Even_Year": break_even_year,
-        })
-    return pd.DataFrame(results), portfolio_cashflows
-
-def mixed_use_model(custom_products, dev_cost_per_sqft_res, dev_cost_per_sqft_com, zip_code, years=20):
-    results = []
-
-    for name, vals in custom_products.items():
-        res_vals = vals.get("residential", {})
-        com_vals = vals.get("commercial", {})
-        acq_cost = vals.get("acq_cost", 0)
-
-        # ----------- Residential Component -----------
-        res_total_rev = 0
-        res_dev_cost = 0
-        res_opex = 0
-        res_cashflow = [0] * years
-
-        if res_vals and res_vals.get("units", 0) > 0:
-            avg_sqft_res = fetch_average_sqft(zip_code, product_type=res_vals.get("product_type", "").lower())
-            units = res_vals["units"]
-            rent = res_vals["rental_price"]
-            opex_per_unit = res_vals.get("opex_per_unit", 5000)
-            absorption_rate = res_vals.get("absorption_rate", 0.25)
-
-            res_absorbed = phase_absorption(units, absorption_rate, years)
-            res_net_units = cap_net_occupancy(net_occupancy(
-                res_absorbed,
-                churn_rate=DEFAULT_CHURN_RATE,
-                reabsorption_rate=DEFAULT_REABSORPTION_RATE,
-                early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE
-            ), units)
-
-            res_revenue = [u * rent * 12 for u in res_net_units]
-            res_opex_list = [u * opex_per_unit for u in res_net_units]
-            res_cashflow = [res_revenue[i] - res_opex_list[i] for i in range(years)]
-
-            res_total_rev = sum(res_revenue)
-            res_opex = sum(res_opex_list)
-            res_dev_cost = units * res_vals["dev_cost"]
-
-        # ----------- Commercial Component -----------
-        com_total_rev = 0
-        com_dev_cost = 0
-        com_opex = 0
-        com_cashflow = [0] * years
-
-        if com_vals and isinstance(com_vals, dict):
-            for com_name, com_prod in com_vals.items():
-                try:
-                    com_sqft = com_prod.get("sqft", 0)
-                    if com_sqft <= 0:
-                        continue
-
-                    absorption_rate = com_prod.get("absorption_rate", 0.25)
-                    churn_rate = com_prod.get("churn_rate", DEFAULT_CHURN_RATE)
-                    reabsorption_rate = com_prod.get("reabsorption_rate", DEFAULT_REABSORPTION_RATE)
-                    early_occupancy_rate = com_prod.get("early_occupancy_rate", DEFAULT_EARLY_OCCUPANCY_RATE)
-                    rent = com_prod.get("rental_price", 0)
-                    opex_rate = com_prod.get("opex_per_sqft", 6.0)
-                    dev_cost_rate = com_prod.get("dev_cost", dev_cost_per_sqft_com)
-
-                    com_absorbed = phase_sqft_absorption(com_sqft, absorption_rate, years)
-                    com_net_units = cap_net_occupancy(net_sqft_occupancy(
-                        com_absorbed,
-                        total_sqft=com_sqft,
-                        churn_rate=churn_rate,
-                        reabsorption_rate=reabsorption_rate,
-                        early_occupancy_rate=early_occupancy_rate
-                    ), com_sqft)
-
-                    com_revenue = [sf * rent * 12 for sf in com_net_units]
-                    com_opex_list = [a * opex_rate for a in com_absorbed]
-                    com_cf = [com_revenue[i] - com_opex_list[i] for i in range(years)]
-
-                    com_total_rev += sum(com_revenue)
-                    com_opex += sum(com_opex_list)
-                    com_dev_cost += com_sqft * dev_cost_rate
-                    com_cashflow = [com_cashflow[i] + com_cf[i] for i in range(years)]
-                except Exception as e:
-                    print(f"⚠️ Error processing commercial product '{com_name}': {e}")
-
-        # ----------- Combined Metrics -----------
-        total_revenue = res_total_rev + com_total_rev
-        total_dev_cost = res_dev_cost + com_dev_cost
-        total_opex = res_opex + com_opex
-        total_cons_cost = acq_cost + total_dev_cost
-        total_noi = total_revenue - total_opex
+    formats = {
+        "IRR": lambda x: f"{x:.2%}",
+        "Levered_IRR": lambda x: f"{x:.2%}",
+        "DSCR": lambda x: f"{x:.2f}",
+        "Capitalization_Rate": lambda x: f"{x:.2%}",
+        "Equity_Multiple": lambda x: f"{x:.2f}x",
+        "Levered_Equity_Multiple": lambda x: f"{x:.2f}x",
+        "Break_Even_Year": lambda x: f"Year {x:.0f}",
+    }
+    for col, fmt in formats.items():
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: fmt(x) if x is not None and not np.isnan(x) else "N/A")
+    return df
 
-        combined_cashflow = [res + com for res, com in zip(res_cashflow, com_cashflow)]
-        cashflows = [-total_cons_cost] + combined_cashflow
-
-        irr = calculate_irr(cashflows)
-        equity_multiple = calculate_equity_multiple(cashflows)
-        break_even_year = find_break_even_year(cashflows)
-
-        results.append({
-            "Product": name,
-            "Category": "Mixed-Use",
-            "Total_Revenue": total_revenue,
-            "Acquisition_Cost": acq_cost,
-            "Development_Cost": total_dev_cost,
-            "Total_OpEx": total_opex,
-            "NOI": total_noi,
-            "Net_Cash_Flow": total_noi - total_cons_cost,
-            "IRR": irr,
-            "Equity_Multiple": equity_multiple,
-            "Break_Even_Year": break_even_year
-        })
-
-    return pd.DataFrame(results)
-
-def format_and_display_results(df, category_label, file_name, portfolio_irr=None, portfolio_em=None, portfolio_be=None):
+def format_and_display_results(df, category_label, file_name, portfolio_irr=None, portfolio_em=None, portfolio_be=None,
+                               max_rows=50):
     if df.empty:
         print(f"\nNo data to display for {category_label} developments.\n")
         return
@@ -238,31 +159,20 @@ def format_and_display_results(df, category_label, file_name, portfolio_irr=None
     print(f"{category_label.upper()} DEVELOPMENT SUMMARY")
     print(f"{'=' * 60}")
 
-    currency_cols = [
-        "Total_Revenue", "Acquisition_Cost", "Development_Cost",
-        "Total_OpEx", "NOI", "Net_Cash_Flow"
-    ]
-    for col in currency_cols:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: f"${x:,.0f}")
-
-    if "IRR" in df.columns:
-        df["IRR"] = df["IRR"].apply(lambda x: f"{x:.2%}" if x is not None else "N/A")
-    if "DSCR" in df.columns:
-        df["DSCR"] = df["DSCR"].apply(lambda x: f"{x:.2f}" if x is not None else "N/A")
-    if "Capitalization_Rate" in df.columns:
-        df["Capitalization_Rate"] = df["Capitalization_Rate"].apply(lambda x: f"{x:.2%}" if x is not None else "N/A")
-    if "Equity_Multiple" in df.columns:
-        df["Equity_Multiple"] = df["Equity_Multiple"].apply(lambda x: f"{x:.2f}x" if x is not None else "N/A")
-    if "Break_Even_Year" in df.columns:
-        df["Break_Even_Year"] = df["Break_Even_Year"].apply(lambda x: f"Year {x}" if x is not None else "N/A")
+    # pandas-backed export is only loaded when results are actually written
+    from export import export_results, numeric_results
 
-    if "IRR" in df.columns:
-        df.sort_values(by="IRR", ascending=False, inplace=True)
-        df.reset_index(drop=True, inplace=True)
+    numeric_df = numeric_results(df)
+    if "IRR" in numeric_df.columns:
+        numeric_df.sort_values(by="IRR", ascending=False, na_position="last", inplace=True)
+        numeric_df.reset_index(drop=True, inplace=True)
 
-    display_df = df.drop(columns=[col for col in df.columns if col.startswith("Annual_")], errors="ignore")
-    print(display_df.to_string(index=False))
+    # Only the printed slice is formatted
+    display_df = numeric_df.head(max_rows).drop(columns=[col for col in df.columns if col.startswith("Annual_")],
+                                                errors="ignore")
+    print(format_for_display(display_df).to_string(index=False))
+    if len(numeric_df) > max_rows:
+        print(f"... {len(numeric_df) - max_rows} more rows in {file_name}")
 
     # 👇 NEW: Portfolio-Level Metrics
     print(f"\n📊 PORTFOLIO-LEVEL METRICS ({category_label.upper()}):")
@@ -274,161 +184,110 @@ def format_and_display_results(df, category_label, file_name, portfolio_irr=None
         print(f"   • Break-Even Year: Year {portfolio_be}")
 
     print(f"\nExported summary to: {file_name}\n")
-    df.to_csv(file_name, index=False)
-
-def validate_entry(entry):
-    required_keys = ["product", "category"]
-    if not all(k in entry for k in required_keys):
-        return False
-
-    cat = entry.get("category", "").lower()
-
-    if cat == "residential" and "units" not in entry:
-        return False
-    if cat == "commercial" and "sqft" not in entry:
-        return False
-    if cat == "mixed-use":
-        res_valid = "residential" in entry and any(
-            isinstance(v, dict) and "units" in v for v in entry["residential"].values()
-        )
-        com_valid = "commercial" in entry and any(
-            isinstance(v, dict) and "sqft" in v for v in entry["commercial"].values()
-        )
-        return res_valid and com_valid
-
-    return True
+    with stage("csv_export", rows=len(numeric_df)):
+        export_results(numeric_df, file_name)
+
+def portfolio_inputs(path=None):
+    """
+    (residential, commercial, mixed_use, land_costs) from a portfolio file, or asked for
+    interactively without one. land_costs maps "Residential" / "Commercial" to the land
+    cost shared by the category, which get_user_inputs asks for once per category and a
+    file gives as its land_cost ("acq cost") field.
+    """
+    land_costs = {}
+    if path:
+        # Non-interactive run: python main.py portfolio.csv|.json|.jsonl|.parquet
+        from loader import load_portfolio
+        return (*load_portfolio(path, land_costs=land_costs), land_costs)
+
+    from inputs import get_user_inputs
+    product_input = get_user_inputs()
+    land_costs.update({entry["category"]: entry["acq cost"] for entry in product_input
+                       if entry["category"] in ("Residential", "Commercial")})
+    return (*normalize_entries(product_input), land_costs)
 
 if __name__ == "__main__":
-    residential_products = {}
-    commercial_products = {}
-    mixed_use_products = {}
+    # --no-cache recomputes every product instead of reusing the on-disk result cache;
+    # --matrices also writes each category's per-product yearly matrices (see export.export_matrices)
+    args = [arg for arg in sys.argv[1:] if arg not in ("--no-cache", "--matrices")]
+    result_cache = ResultCache(enabled="--no-cache" not in sys.argv[1:])
 
-    product_input = get_user_inputs()
-
-    for entry in product_input:
-        if not isinstance(entry, dict):
-            print(f"⚠️ Skipping invalid entry: {entry}")
-            continue
-
-        # Normalize keys
-        entry = {k.strip().lower(): v for k, v in entry.items()}
-
-        if not validate_entry(entry):
-            print(f"⚠️ Skipping incomplete entry: {entry.get('product', 'Unknown')}")
-            continue
-
-        name = entry.get("product", "Unnamed")
-        category = entry.get("category", "").strip().lower()
-
-        if "acq cost" in entry:
-            entry["acq_cost"] = entry.pop("acq cost")
-
-        if category == "residential":
-            residential_products[name] = entry
-        elif category == "commercial":
-            if "square_feet" in entry:
-                entry["sqft"] = entry.pop("square_feet")
-            if "opex_per_unit" in entry:
-                entry["opex_per_sqft"] = entry.pop("opex_per_unit")
-            elif "opex" in entry:
-                entry["opex_per_sqft"] = entry.pop("opex")
-            if "opex_per_sqft" not in entry:
-                entry["opex_per_sqft"] = 6.0
-            commercial_products[name] = entry
-        elif category == "mixed-use":
-            if "residential" in entry:
-                for k, v in entry["residential"].items():
-                    if "opex" not in v and "opex_per_unit" in v:
-                        v["opex_per_unit"] = v.pop("opex_per_unit")
-            if "commercial" in entry:
-                for k, v in entry["commercial"].items():
-                    if "opex" not in v and "opex_per_sqft" in v:
-                        v["opex_per_sqft"] = v.pop("opex_per_sqft")
-
-            res_data = entry.get("residential", {})
-            com_data = entry.get("commercial", {})
-            has_valid_res = isinstance(res_data, dict) and any(
-                isinstance(v, dict) and "units" in v for v in res_data.values()
-            )
-            has_valid_com = isinstance(com_data, dict) and any(
-                isinstance(v, dict) and "sqft" in v for v in com_data.values()
-            )
-            if has_valid_res and has_valid_com:
-                mixed_use_products[name] = entry
-            else:
-                print(f"⚠️ Skipping mixed-use entry '{name}' — incomplete residential or commercial data")
+    residential_products, commercial_products, mixed_use_products, land_costs = portfolio_inputs(
+        args[0] if args else None)
 
     print("\n" + "="*60)
     print("🔍 RUNNING FEASIBILITY ANALYSIS")
     print("="*60)
 
+    # Per-product cash-flow rows (acquisition excluded) feed the portfolio rollup
+    groups = []
     if residential_products:
-        df_res, res_cashflows = residential_model(
+        res_store = ResultStore(residential_products.keys(), 20, RESIDENTIAL_COLUMNS, int_columns=["Units"])
+        df_res, _ = residential_model(
             residential_products,
-            shared_acq_cost=1500000,  # total land cost
+            shared_acq_cost=0,  # land is charged by the rollup
             dev_cost_per_sqft=200,
-            zip_code="80302"
+            zip_code="80302",
+            store=res_store,
+            result_cache=result_cache
         )
-
-        total_res_dev_cost = sum(row["Development_Cost"] for row in df_res.to_dict('records'))
-        res_portfolio_cashflow = [-1500000 - total_res_dev_cost] + res_cashflows
-        portfolio_irr = calculate_irr(res_portfolio_cashflow)
-        portfolio_em = calculate_equity_multiple(res_portfolio_cashflow)
-        portfolio_be = find_break_even_year(res_portfolio_cashflow)
-
-        print(f"\n🏠 Residential Portfolio IRR: {portfolio_irr:.2%}")
-        print(f"🏠 Residential Equity Multiple: {portfolio_em:.2f}x")
-        print(f"🏠 Residential Break-Even Year: Year {portfolio_be}")
-
-        format_and_display_results(df_res, "Residential", "residential_development_output.csv")
-    else:
-        print("\n⚠️ No commercial products entered.")
+        groups.append(("Residential", residential_products, res_store.cashflows, land_costs.get("Residential")))
 
     if commercial_products:
         print("\n🏢 Processing Commercial Products...")
-        df_com, com_cashflows = commercial_model(
+        com_store = ResultStore(commercial_products.keys(), 20, COMMERCIAL_COLUMNS, int_columns=["SqFt_Planned"])
+        df_com, _ = commercial_model(
             commercial_products,
-            years=20
+            years=20,
+            store=com_store,
+            result_cache=result_cache
         )
-        shared_com_acq_cost = 826829
-        total_com_dev_cost = sum(row["Development_Cost"] for row in df_com.to_dict('records'))
-        com_portfolio_cashflow = [-shared_com_acq_cost - total_com_dev_cost] + com_cashflows
-        portfolio_irr = calculate_irr(com_portfolio_cashflow)
-        portfolio_em = calculate_equity_multiple(com_portfolio_cashflow)
-        portfolio_be = find_break_even_year(com_portfolio_cashflow)
-
-        print(f"\n🏢 Commercial Portfolio IRR: {portfolio_irr:.2%}")
-        print(f"🏢 Commercial Equity Multiple: {portfolio_em:.2f}x")
-        print(f"🏢 Commercial Break-Even Year: Year {portfolio_be}")
-
-        format_and_display_results(df_com, "Commercial", "commercial_development_output.csv")
-    else:
-        print("\n⚠️ No commercial products entered.")
+        groups.append(("Commercial", commercial_products, com_store.cashflows, land_costs.get("Commercial")))
 
     if mixed_use_products:
         print("\n🏙️ Processing Mixed-Use Products...")
+        mix_store = ResultStore(mixed_use_products.keys(), 20, MIXED_USE_COLUMNS, labels={"Category": "Mixed-Use"})
         df_mix = mixed_use_model(
             mixed_use_products,
             dev_cost_per_sqft_res=200,
-            dev_cost_per_sqft_com=150,
-            zip_code="80302"
+            dev_cost_per_sqft_com=DEFAULT_DEV_COST_PER_SQFT_COM,
+            zip_code="80302",
+            store=mix_store
         )
-        total_acq_cost = sum(row["Acquisition_Cost"] for row in df_mix.to_dict("records"))
-        total_dev_cost = sum(row["Development_Cost"] for row in df_mix.to_dict("records"))
-        total_noi = sum(row["NOI"] for row in df_mix.to_dict("records"))
+        # Each project's own land cost is charged on its deal node by the rollup
+        mix_rows = mix_store.cashflows.copy()
+        mix_rows[:, 0] += mix_store["Acquisition_Cost"]
+        groups.append(("Mixed-Use", mixed_use_products, mix_rows, None))
+
+    # Deal -> product type -> category -> portfolio, with every node's metrics in one batch
+    rolled = portfolio_rollup(groups)
 
-        # Cash flow: [-Acq + Dev Cost] + [NOI for 20 years]
-        annual_noi = total_noi / 20
-        mixed_use_cashflows = [-total_acq_cost - total_dev_cost] + [annual_noi] * 20
+    def node_metrics(*path):
+        row = rolled["index"][path]
+        irr, em, be = rolled["irr"][row], rolled["equity_multiple"][row], rolled["break_even_year"][row]
+        return (None if np.isnan(irr) else float(irr), None if np.isnan(em) else float(em),
+                None if np.isnan(be) else int(be))
 
-        portfolio_irr = calculate_irr(mixed_use_cashflows)
-        portfolio_em = calculate_equity_multiple(mixed_use_cashflows)
-        portfolio_be = find_break_even_year(mixed_use_cashflows)
+    def print_metrics(icon, label, irr, em, be):
+        print(f"\n{icon} {label} Portfolio IRR: {irr:.2%}" if irr is not None else f"\n{icon} {label} Portfolio IRR: Not calculable")
+        print(f"{icon} {label} Equity Multiple: {em:.2f}x" if em is not None else f"{icon} {label} Equity Multiple: Not calculable")
+        print(f"{icon} {label} Break-Even Year: Year {be}" if be is not None else f"{icon} {label} Break-Even Year: Not reached")
 
-        print(f"\n🏙️ Mixed-Use Portfolio IRR: {portfolio_irr:.2%}")
-        print(f"🏙️ Mixed-Use Equity Multiple: {portfolio_em:.2f}x")
-        print(f"🏙️ Mixed-Use Break-Even Year: Year {portfolio_be}")
+    if residential_products:
+        print_metrics("🏠", "Residential", *node_metrics("Residential"))
+        format_and_display_results(df_res, "Residential", "residential_development_output.csv")
+    else:
+        print("\n⚠️ No residential products entered.")
 
+    if commercial_products:
+        print_metrics("🏢", "Commercial", *node_metrics("Commercial"))
+        format_and_display_results(df_com, "Commercial", "commercial_development_output.csv")
+    else:
+        print("\n⚠️ No commercial products entered.")
+
+    if mixed_use_products:
+        portfolio_irr, portfolio_em, portfolio_be = node_metrics("Mixed-Use")
+        print_metrics("🏙️", "Mixed-Use", portfolio_irr, portfolio_em, portfolio_be)
         format_and_display_results(
             df_mix,
             "Mixed-Use",
@@ -440,3 +299,22 @@ if __name__ == "__main__":
     else:
         print("\n⚠️ No mixed-use products entered.")
 
+    if len(groups) > 1:
+        print_metrics("📊", "Total", *node_metrics())
+
+    if "--matrices" in sys.argv[1:]:
+        from export import export_product_matrices
+        for category, products, file_name in [
+                ("residential", residential_products, "residential_development_matrices.fmat"),
+                ("commercial", commercial_products, "commercial_development_matrices.fmat"),
+                ("mixed_use", mixed_use_products, "mixed_use_development_matrices.fmat")]:
+            if products:
+                with stage("matrix_export", rows=len(products)):
+                    export_product_matrices(file_name, products, category, years=20)
+                print(f"Exported {category.replace('_', '-')} cash-flow matrices to: {file_name}")
+
+    result_cache.close()
+
+    if instrumentation.ENABLED:
+        profile_file = instrumentation.dump_json("feasibility_profile.json")
+        print(f"\n⏱️ Stage timings written to: {profile_file}")
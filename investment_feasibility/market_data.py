@@ -0,0 +1,237 @@
+import argparse
+import csv
+import json
+import os
+import struct
+import numpy as np
+
+# Per-ZIP, per-product-type market benchmarks (average sqft, rents and costs).
+#
+# The source is a CSV with one row per (zip_code, product_type) and any of the FIELDS
+# columns; compile_market_data turns it into a compact binary file:
+#
+#   MAGIC | header length (uint32) | JSON header | index | records
+#
+# `records` holds one float64 row of FIELDS per (zip_code, product_type), sorted by ZIP
+# then product type, with NaN where the source had no value. `index` is a dense int32
+# (100000 x product types) table mapping a 5-digit ZIP and a product-type code to its
+# record (-1 when absent), so a lookup is two array reads. Both are memory-mapped, so
+# opening the file costs nothing up front and only the pages that lookups touch are read.
+
+MAGIC = b"FEASMKT1"
+FORMAT_VERSION = 1
+
+FIELDS = ["avg_sqft", "rental_price", "dev_cost", "opex"]
+
+N_ZIPS = 100_000
+
+# Offsets of the index and record arrays are aligned to this many bytes
+_ALIGN = 64
+
+DEFAULT_MARKET_DATA_PATH = os.environ.get(
+    "FEASIBILITY_MARKET_DATA", os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_data.bin"))
+
+# Average sqft used when the dataset has no entry for a ZIP / product type
+DEFAULT_AVERAGE_SQFT = {"detached": 1600, "attached": 1300, "multi-family": 950}
+FALLBACK_AVERAGE_SQFT = 1250
+
+# Spellings seen in inputs and source data, mapped to the product types get_user_inputs produces
+PRODUCT_TYPE_ALIASES = {
+    "townhome": "attached",
+    "townhouse": "attached",
+    "multifamily": "multi-family",
+    "multi family": "multi-family",
+    "data center": "data centers",
+}
+
+def normalize_product_type(product_type):
+    product_type = str(product_type or "").strip().lower()
+    return PRODUCT_TYPE_ALIASES.get(product_type, product_type)
+
+def zip_index(zip_code):
+    """Integer 0-99999 for a ZIP given as int or string (ZIP+4 allowed); -1 if it is not one."""
+    digits = str(zip_code).strip().split("-")[0]
+    if isinstance(zip_code, (int, np.integer)):
+        digits = digits.zfill(5)
+    if len(digits) != 5 or not digits.isdigit():
+        return -1
+    return int(digits)
+
+def _zip_indices(zip_codes):
+    zip_codes = np.asarray(zip_codes)
+    if np.issubdtype(zip_codes.dtype, np.integer):
+        return np.where((zip_codes >= 0) & (zip_codes < N_ZIPS), zip_codes, -1).astype(np.int64)
+    unique, inverse = np.unique(zip_codes.astype(str), return_inverse=True)
+    return np.array([zip_index(z) for z in unique], dtype=np.int64)[inverse.reshape(zip_codes.shape)]
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+def compile_market_data(source, path=DEFAULT_MARKET_DATA_PATH):
+    """
+    Compile a CSV of zip_code, product_type and FIELDS columns (all optional but the
+    keys) into the binary format above. Returns the number of records written.
+    """
+    rows = {}
+    with open(source, newline="") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        missing = {"zip_code", "product_type"} - set(reader.fieldnames)
+        if missing:
+            raise ValueError(f"Market data file is missing column(s): {', '.join(sorted(missing))}")
+        for line, row in enumerate(reader, start=2):
+            zip_code = zip_index(row["zip_code"])
+            if zip_code < 0:
+                raise ValueError(f"Line {line}: '{row['zip_code']}' is not a 5-digit ZIP code")
+            product_type = normalize_product_type(row["product_type"])
+            if not product_type:
+                raise ValueError(f"Line {line}: missing product_type")
+            key = (zip_code, product_type)
+            if key in rows:
+                raise ValueError(f"Line {line}: duplicate entry for ZIP {zip_code:05d} / {product_type}")
+            values = []
+            for field in FIELDS:
+                value = (row.get(field) or "").strip()
+                try:
+                    values.append(float(value) if value else np.nan)
+                except ValueError:
+                    raise ValueError(f"Line {line}: {field} must be numeric, got '{value}'")
+            rows[key] = values
+
+    product_types = sorted({product_type for _, product_type in rows})
+    codes = {product_type: i for i, product_type in enumerate(product_types)}
+    keys = sorted(rows, key=lambda key: (key[0], codes[key[1]]))
+    records = np.array([rows[key] for key in keys], dtype="<f8").reshape(-1, len(FIELDS))
+    index = np.full((N_ZIPS, len(product_types)), -1, dtype="<i4")
+    for i, (zip_code, product_type) in enumerate(keys):
+        index[zip_code, codes[product_type]] = i
+
+    header = {"version": FORMAT_VERSION, "fields": FIELDS, "product_types": product_types, "records": len(keys)}
+    header.update(index_offset=0, records_offset=0)
+    # The offsets are part of the header, so settle them before writing
+    while True:
+        header_bytes = json.dumps(header).encode()
+        index_offset = _aligned(len(MAGIC) + 4 + len(header_bytes))
+        if index_offset == header["index_offset"]:
+            break
+        header.update(index_offset=index_offset, records_offset=_aligned(index_offset + index.nbytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        f.seek(header["index_offset"])
+        f.write(index.tobytes())
+        f.seek(header["records_offset"])
+        f.write(records.tobytes())
+    os.replace(tmp_path, path)
+    return len(keys)
+
+class MarketData:
+    """
+    Read-only view of a compiled market data file. lookup() returns one entry;
+    bulk_lookup() resolves whole arrays of ZIPs and product types at once.
+    """
+
+    def __init__(self, path=DEFAULT_MARKET_DATA_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled market data file")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {header['version']}, expected {FORMAT_VERSION}; recompile it")
+        self.fields = header["fields"]
+        self.product_types = header["product_types"]
+        self._codes = {product_type: i for i, product_type in enumerate(self.product_types)}
+        n_records = header["records"]
+        # np.memmap cannot map zero bytes, so an empty dataset gets empty in-memory arrays
+        if n_records:
+            self.index = np.memmap(path, dtype="<i4", mode="r", offset=header["index_offset"],
+                                   shape=(N_ZIPS, len(self.product_types)))
+            self.records = np.memmap(path, dtype="<f8", mode="r", offset=header["records_offset"],
+                                     shape=(n_records, len(self.fields)))
+        else:
+            self.index = np.empty((N_ZIPS, 0), dtype="<i4")
+            self.records = np.empty((0, len(self.fields)))
+
+    def __len__(self):
+        return self.records.shape[0]
+
+    def _rows(self, zip_codes, product_types):
+        zips = _zip_indices(zip_codes)
+        unique, inverse = np.unique(np.asarray(product_types, dtype=object).astype(str), return_inverse=True)
+        codes = np.array([self._codes.get(normalize_product_type(t), -1) for t in unique], dtype=np.int64)
+        codes = codes[inverse.reshape(np.shape(product_types))]
+        zips, codes = np.broadcast_arrays(zips, codes)
+        found = (zips >= 0) & (codes >= 0)
+        rows = np.full(zips.shape, -1, dtype=np.int64)
+        rows[found] = self.index[zips[found], codes[found]]
+        return rows
+
+    def lookup(self, zip_code, product_type):
+        """Dict of FIELDS for one ZIP / product type, or None when the dataset has no entry."""
+        zip_code, code = zip_index(zip_code), self._codes.get(normalize_product_type(product_type), -1)
+        if zip_code < 0 or code < 0:
+            return None
+        row = int(self.index[zip_code, code])
+        if row < 0:
+            return None
+        return {field: float(value) for field, value in zip(self.fields, self.records[row])}
+
+    def bulk_lookup(self, zip_codes, product_types, field=None):
+        """
+        Vectorized lookup for arrays of ZIPs and product types (broadcast together).
+        Returns an array of `field`, or a dict of arrays for every field when field is
+        None; entries missing from the dataset are NaN.
+        """
+        rows = self._rows(zip_codes, product_types)
+        found = rows >= 0
+        columns = [field] if field is not None else self.fields
+        out = {}
+        for name in columns:
+            values = np.full(rows.shape, np.nan)
+            values[found] = self.records[rows[found], self.fields.index(name)]
+            out[name] = values
+        return out[field] if field is not None else out
+
+_MARKET_DATA = {}
+
+def load_market_data(path=None):
+    """Shared MarketData for `path` (default DEFAULT_MARKET_DATA_PATH); None when no file is compiled."""
+    path = path or DEFAULT_MARKET_DATA_PATH
+    if path not in _MARKET_DATA:
+        _MARKET_DATA[path] = MarketData(path) if os.path.exists(path) else None
+    return _MARKET_DATA[path]
+
+def fetch_average_sqft(zip_code, product_type=None, market_data=None):
+    """Average sqft for a ZIP and product type from the market dataset, else the product type's default."""
+    if market_data is None:
+        market_data = load_market_data()
+    product_type = normalize_product_type(product_type)
+    if market_data is not None:
+        entry = market_data.lookup(zip_code, product_type)
+        if entry is not None and not np.isnan(entry["avg_sqft"]):
+            return entry["avg_sqft"]
+    return DEFAULT_AVERAGE_SQFT.get(product_type, FALLBACK_AVERAGE_SQFT)
+
+def bulk_average_sqft(zip_codes, product_types, market_data=None):
+    """fetch_average_sqft over arrays of ZIPs and product types."""
+    if market_data is None:
+        market_data = load_market_data()
+    product_types = np.asarray(product_types, dtype=object)
+    unique, inverse = np.unique(product_types.astype(str), return_inverse=True)
+    defaults = np.array([DEFAULT_AVERAGE_SQFT.get(normalize_product_type(t), FALLBACK_AVERAGE_SQFT) for t in unique],
+                        dtype=float)[inverse.reshape(product_types.shape)]
+    if market_data is None:
+        return np.broadcast_to(defaults, np.broadcast_shapes(np.shape(zip_codes), defaults.shape)).copy()
+    values = market_data.bulk_lookup(zip_codes, product_types, "avg_sqft")
+    return np.where(np.isnan(values), defaults, values)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile per-ZIP market data into a memory-mapped lookup file")
+    parser.add_argument("source", help="CSV with zip_code, product_type and any of: " + ", ".join(FIELDS))
+    parser.add_argument("output", nargs="?", default=DEFAULT_MARKET_DATA_PATH)
+    args = parser.parse_args()
+    count = compile_market_data(args.source, args.output)
+    print(f"Compiled {count} market data records into {args.output}")
@@ -0,0 +1,204 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from engine import residential_cashflows, commercial_cashflows
+from finance import batch_metrics
+from growth_helpers import DEFAULT_CHURN_RATE, DEFAULT_REABSORPTION_RATE, DEFAULT_EARLY_OCCUPANCY_RATE
+
+# Drivers sampled as multipliers of the deal's own input (1.0 = deal as entered)
+SCALED_DRIVERS = ["rental_price", "dev_cost", "opex_per_unit", "opex_per_sqft", "absorption_rate"]
+
+# Drivers sampled as absolute rates, defaulting to the growth_helpers assumptions
+RATE_DRIVERS = {
+    "churn_rate": DEFAULT_CHURN_RATE,
+    "reabsorption_rate": DEFAULT_REABSORPTION_RATE,
+    "early_occupancy_rate": DEFAULT_EARLY_OCCUPANCY_RATE,
+}
+
+DEFAULT_DISTRIBUTIONS = {
+    "rental_price": {"dist": "normal", "mean": 1.0, "sd": 0.08},
+    "dev_cost": {"dist": "triangular", "low": 0.95, "mode": 1.0, "high": 1.20},
+    "opex_per_unit": {"dist": "normal", "mean": 1.0, "sd": 0.10},
+    "opex_per_sqft": {"dist": "normal", "mean": 1.0, "sd": 0.10},
+    "absorption_rate": {"dist": "uniform", "low": 0.75, "high": 1.25},
+    "churn_rate": {"dist": "uniform", "low": 0.10, "high": 0.30},
+}
+
+# Fixed histogram bins so chunk results can be merged by adding counts. IRR bins are
+# fine up to 100% and coarser up to 1000%; values beyond the edges land in the overflow
+# bins, whose share each summary reports as out_of_range
+IRR_BINS = np.concatenate([np.linspace(-1.0, 1.0, 4001), np.linspace(1.0, 10.0, 1801)[1:]])
+EM_BINS = np.linspace(0.0, 20.0, 4001)
+
+def sample_driver(spec, size, rng):
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        return np.full(size, float(spec["value"]))
+    if dist == "normal":
+        return rng.normal(spec["mean"], spec["sd"], size)
+    if dist == "lognormal":
+        return rng.lognormal(spec["mean"], spec["sigma"], size)
+    if dist == "uniform":
+        return rng.uniform(spec["low"], spec["high"], size)
+    if dist == "triangular":
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    raise ValueError(f"Unsupported distribution '{dist}'")
+
+class StreamingHistogram:
+    """
+    Fixed-bin histogram that aggregates values chunk by chunk. Counts are integers, so
+    merging chunk histograms gives the same totals in any order; quantiles are read
+    off the cumulative counts by interpolating inside the bin (between the outer edge
+    and the observed minimum or maximum for the under- and overflow bins).
+    """
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)  # [underflow, bins..., overflow]
+        self.missing = 0
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        finite = values[np.isfinite(values)]
+        self.missing += values.size - finite.size
+        if finite.size:
+            self.counts += np.bincount(np.searchsorted(self.edges, finite, side="right"),
+                                       minlength=self.counts.size)
+            self.total += float(finite.sum())
+            self.minimum = min(self.minimum, float(finite.min()))
+            self.maximum = max(self.maximum, float(finite.max()))
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.missing += other.missing
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def quantile(self, q):
+        if not self.count:
+            return np.nan
+        target = q * self.count
+        cumulative = np.cumsum(self.counts)
+        idx = int(np.searchsorted(cumulative, target, side="left"))
+        lo = self.edges[idx - 1] if idx > 0 else self.minimum
+        hi = self.edges[idx] if idx < self.edges.size else self.maximum
+        before = cumulative[idx] - self.counts[idx]
+        frac = (target - before) / self.counts[idx] if self.counts[idx] else 0.0
+        return float(np.clip(lo + frac * (hi - lo), self.minimum, self.maximum))
+
+    def out_of_range(self):
+        # Share of the values outside the bin edges, whose quantiles are only interpolated
+        return float(self.counts[0] + self.counts[-1]) / self.count if self.count else np.nan
+
+    def summary(self, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        summary = {"count": self.count, "not_calculable": self.missing, "mean": self.mean(),
+                   "min": self.minimum if self.count else np.nan,
+                   "max": self.maximum if self.count else np.nan,
+                   "out_of_range": self.out_of_range()}
+        for q in quantiles:
+            summary[f"p{round(q * 100)}"] = self.quantile(q)
+        return summary
+
+def chunk_rng(seed, chunk_index):
+    # Each chunk owns an independent stream derived from (seed, chunk_index), so a chunk
+    # draws the same numbers no matter which process evaluates it
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+def sample_deal_inputs(deal, distributions, size, rng):
+    inputs = {}
+    for driver in SCALED_DRIVERS:
+        if driver not in deal:
+            continue
+        spec = distributions.get(driver)
+        scale = sample_driver(spec, size, rng) if spec else np.ones(size)
+        inputs[driver] = np.maximum(deal[driver] * scale, 0.0)
+    for driver, default in RATE_DRIVERS.items():
+        spec = distributions.get(driver)
+        rate = sample_driver(spec, size, rng) if spec else np.full(size, deal.get(driver, default))
+        inputs[driver] = np.clip(rate, 0.0, 1.0)
+    inputs["absorption_rate"] = np.clip(inputs["absorption_rate"], 0.0, 1.0)
+    return inputs
+
+def evaluate_draws(deal, category, inputs, years=20):
+    if category == "residential":
+        flows = residential_cashflows(deal["units"], inputs["rental_price"], inputs["dev_cost"],
+                                      inputs.get("opex_per_unit", 5000), inputs["absorption_rate"], years,
+                                      inputs["churn_rate"], inputs["reabsorption_rate"],
+                                      inputs["early_occupancy_rate"], cache=None)
+    elif category == "commercial":
+        flows = commercial_cashflows(deal["sqft"], inputs["rental_price"], inputs["dev_cost"],
+                                     inputs.get("opex_per_sqft", 6.0), inputs["absorption_rate"], years,
+                                     inputs["churn_rate"], inputs["reabsorption_rate"],
+                                     inputs["early_occupancy_rate"], cache=None)
+    else:
+        raise ValueError(f"Unsupported category '{category}'")
+    # Sampled drivers almost never repeat, so occupancy bypasses the shared cache
+    return batch_metrics(flows["cashflows"])
+
+def _run_chunk(task):
+    deal, category, distributions, years, seed, chunk_index, size = task
+    rng = chunk_rng(seed, chunk_index)
+    metrics = evaluate_draws(deal, category, sample_deal_inputs(deal, distributions, size, rng), years)
+    return {
+        "irr": StreamingHistogram(IRR_BINS).update(metrics["irr"]),
+        "equity_multiple": StreamingHistogram(EM_BINS).update(metrics["equity_multiple"]),
+        "break_even_year": StreamingHistogram(np.arange(years + 2) - 0.5).update(metrics["break_even_year"]),
+    }
+
+def run_monte_carlo(deal, category, distributions=None, draws=100_000, chunk_size=10_000, seed=0,
+                    years=20, workers=None):
+    """
+    Monte Carlo over one deal (a residential or commercial product dict as used by the
+    models). Draws are generated and evaluated in chunks of `chunk_size` and folded into
+    running histograms, so memory does not grow with `draws`. With workers > 1 chunks run
+    in a process pool; per-chunk seeding makes the result identical to a serial run.
+    """
+    distributions = DEFAULT_DISTRIBUTIONS if distributions is None else distributions
+    category = category.lower()
+    n_chunks = -(-draws // chunk_size)
+    tasks = ((deal, category, distributions, years, seed, i, min(chunk_size, draws - i * chunk_size))
+             for i in range(n_chunks))
+
+    totals = {
+        "irr": StreamingHistogram(IRR_BINS),
+        "equity_multiple": StreamingHistogram(EM_BINS),
+        "break_even_year": StreamingHistogram(np.arange(years + 2) - 0.5),
+    }
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk_results = pool.map(_run_chunk, tasks)
+            for result in chunk_results:
+                for key, hist in result.items():
+                    totals[key].merge(hist)
+    else:
+        for task in tasks:
+            for key, hist in _run_chunk(task).items():
+                totals[key].merge(hist)
+
+    report = {key: hist.summary() for key, hist in totals.items()}
+    report["draws"] = draws
+    report["histograms"] = totals
+    return report
+
+if __name__ == "__main__":
+    example_deal = {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000,
+                    "absorption_rate": 0.15}
+    report = run_monte_carlo(example_deal, "residential", draws=100_000, seed=42)
+    print("------ Monte Carlo: Detached (100,000 draws) ------")
+    for metric in ["irr", "equity_multiple", "break_even_year"]:
+        stats = report[metric]
+        print(f"\n{metric}:")
+        for key, value in stats.items():
+            print(f"  {key}: {value:,.4f}" if isinstance(value, float) else f"  {key}: {value}")
@@ -0,0 +1,120 @@
+import numpy as np
+from instrumentation import stage
+from growth_helpers import (round_like_python, DEFAULT_CHURN_RATE, DEFAULT_REABSORPTION_RATE,
+                            DEFAULT_EARLY_OCCUPANCY_RATE, OCCUPANCY_CACHE)
+from engine import residential_cashflows, commercial_cashflows, mixed_use_cashflows, product_columns
+
+# Monthly-resolution cash flows for N products. The yearly flows come from the batched
+# (and cached) kernels of engine.py and are spread over the 12 months of each year by a
+# lease-up profile, so the monthly run costs one annual run plus a broadcast rather than
+# 12x the annual work. Profiles average 1 over the year, which keeps every yearly total
+# equal to the annual engine; only the timing inside the year changes. Rents are monthly
+# and opex annual, as entered.
+#
+# Outputs are N x (12 * years) matrices; `cashflows` is N x (12 * years + 1) with the
+# development cost at month 0. Pair them with month_dates() and finance.batch_xirr.
+
+MONTHS_PER_YEAR = 12
+
+LEASE_UP_PROFILES = {
+    # Occupancy held level through the year
+    "flat": np.ones(MONTHS_PER_YEAR),
+    # The year's occupancy builds up steadily, back-loading revenue within the year
+    "linear": (2 * np.arange(MONTHS_PER_YEAR) + 1) / MONTHS_PER_YEAR,
+}
+
+def _profile(lease_up):
+    profile = LEASE_UP_PROFILES[lease_up] if isinstance(lease_up, str) else np.asarray(lease_up, dtype=float)
+    if profile.shape != (MONTHS_PER_YEAR,) or profile.sum() <= 0:
+        raise ValueError("lease_up must be a profile name or 12 non-negative monthly weights")
+    return profile * MONTHS_PER_YEAR / profile.sum()
+
+def _spread(annual, profile):
+    # N x years -> N x (12 * years), each year's value scaled by the monthly weights
+    return (annual[:, :, None] * profile).reshape(annual.shape[0], -1)
+
+def month_dates(start, years=20):
+    """Dates of month 0 .. 12 * years (month starts), for batch_xirr on monthly cash flows."""
+    months = np.datetime64(start, "M") + np.arange(MONTHS_PER_YEAR * years + 1)
+    return months.astype("datetime64[D]")
+
+def _monthly(annual, profile):
+    # Spread a yearly kernel result over the months; the yearly result rides along as
+    # "annual" so to_annual can hand it back unchanged
+    monthly = {key: _spread(annual[key], profile) / MONTHS_PER_YEAR for key in ("revenue", "opex", "noi")}
+    if "occupancy" in annual:
+        monthly["occupancy"] = _spread(annual["occupancy"], profile)
+    if "absorbed" in annual:
+        monthly["absorbed"] = _spread(annual["absorbed"], profile) / MONTHS_PER_YEAR
+    for key in ("development_cost", "acquisition_cost"):
+        if key in annual:
+            monthly[key] = annual[key]
+    monthly["cashflows"] = np.hstack([annual["cashflows"][:, :1], monthly["noi"]])
+    monthly["annual"] = annual
+    return monthly
+
+def residential_monthly(units, rental_price, dev_cost, opex_per_unit, absorption_rate, years=20, lease_up="flat",
+                        churn_rate=DEFAULT_CHURN_RATE, reabsorption_rate=DEFAULT_REABSORPTION_RATE,
+                        early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE, cache=OCCUPANCY_CACHE):
+    profile = _profile(lease_up)
+    annual = residential_cashflows(units, rental_price, dev_cost, opex_per_unit, absorption_rate, years,
+                                   churn_rate, reabsorption_rate, early_occupancy_rate, cache=cache)
+    with stage("monthly_spread", rows=annual["noi"].shape[0]):
+        return _monthly(annual, profile)
+
+def commercial_monthly(sqft, rental_price, dev_cost, opex_per_sqft, absorption_rate, years=20, lease_up="flat",
+                       churn_rate=DEFAULT_CHURN_RATE, reabsorption_rate=DEFAULT_REABSORPTION_RATE,
+                       early_occupancy_rate=DEFAULT_EARLY_OCCUPANCY_RATE, cache=OCCUPANCY_CACHE):
+    profile = _profile(lease_up)
+    # Opex follows newly absorbed sqft and revenue is rounded to cents, as in commercial_model
+    annual = commercial_cashflows(sqft, rental_price, dev_cost, opex_per_sqft, absorption_rate, years,
+                                  churn_rate, reabsorption_rate, early_occupancy_rate, cache=cache)
+    with stage("monthly_spread", rows=annual["noi"].shape[0]):
+        return _monthly(annual, profile)
+
+def product_monthly(custom_products: dict, category: str, years=20, lease_up="flat"):
+    """Monthly counterpart of engine.product_cashflows for a residential or commercial products dict."""
+    columns = product_columns(custom_products, category)
+    kernel = residential_monthly if category.lower() == "residential" else commercial_monthly
+    return kernel(**columns, years=years, lease_up=lease_up)
+
+def mixed_use_monthly(custom_products: dict, dev_cost_per_sqft_com, years=20, lease_up="flat"):
+    """
+    Monthly flows for mixed-use projects shaped as mixed_use_model expects: the projects'
+    yearly flows from engine.mixed_use_cashflows, spread over the months. The project's
+    acquisition cost joins its development cost at month 0.
+    """
+    profile = _profile(lease_up)
+    annual = mixed_use_cashflows(custom_products, dev_cost_per_sqft_com, years)
+    with stage("monthly_spread", rows=len(custom_products)):
+        return _monthly(annual, profile)
+
+def to_annual(monthly: dict, round_revenue=False):
+    """
+    Aggregate a monthly result to the yearly layout of engine.py. Results of the monthly
+    kernels carry the yearly run they were spread from, which is returned as is, so they
+    match the annual engine exactly. Other monthly matrices have their flows summed per
+    year and occupancy averaged; round_revenue=True then rounds yearly revenue to cents
+    as commercial_cashflows does.
+    """
+    if "annual" in monthly:
+        return monthly["annual"]
+
+    def yearly(values):
+        return values.reshape(values.shape[0], -1, MONTHS_PER_YEAR).sum(axis=2)
+
+    annual = {}
+    if "occupancy" in monthly:
+        annual["occupancy"] = yearly(monthly["occupancy"]) / MONTHS_PER_YEAR
+    if "absorbed" in monthly:
+        annual["absorbed"] = yearly(monthly["absorbed"])
+    annual["revenue"] = yearly(monthly["revenue"])
+    if round_revenue:
+        annual["revenue"] = round_like_python(annual["revenue"])
+    annual["opex"] = yearly(monthly["opex"])
+    annual["noi"] = annual["revenue"] - annual["opex"]
+    for key in ("development_cost", "acquisition_cost"):
+        if key in monthly:
+            annual[key] = monthly[key]
+    annual["cashflows"] = np.hstack([monthly["cashflows"][:, :1], annual["noi"]])
+    return annual
@@ -0,0 +1,245 @@
+import numpy as np
+from engine import residential_cashflows, commercial_cashflows
+from finance import batch_irr, batch_npv
+from growth_helpers import OccupancyCache
+from inputs import PRODUCT_CATEGORIES
+
+# Product-mix optimizer: choose units (residential) or sqft (commercial) per product type
+# to maximize portfolio IRR or NPV under acquisition, development-capital, acreage and
+# minimum-mix constraints.
+#
+# Candidates describe each product's economics as get_user_inputs collects them, plus
+# optional `density` (units or sqft per acre), `min` / `max` quantities and a `step`
+# that quantities snap to:
+#
+#   candidates = {
+#       "Detached": {"category": "Residential", "rental_price": 2800, "dev_cost": 320000,
+#                    "opex_per_unit": 5000, "absorption_rate": 0.2, "max": 300},
+#       "Office": {"category": "Commercial", "rental_price": 3.5, "dev_cost": 250,
+#                  "opex_per_sqft": 6.0, "absorption_rate": 0.25, "max": 200000},
+#   }
+#   best = optimize_mix(candidates, dev_budget=60_000_000, max_acres=40, land_cost_per_acre=250_000)
+#
+# Candidate mixes are evaluated in batches: every (mix, product) pair is one row through
+# the batched kernels, and snapping quantities to `step` keeps occupancy schedules
+# repeating so most of them come from the optimizer's occupancy cache.
+
+# Units per acre (residential) or building sqft per acre (commercial) when a candidate gives no density
+DEFAULT_DENSITY = {
+    "detached": 6,
+    "attached": 12,
+    "multi-family": 30,
+    "industrial": 15_000,
+    "office": 20_000,
+    "retail": 10_000,
+    "data centers": 20_000,
+    "hotel": 25_000,
+}
+
+DEFAULT_STEP = {"Residential": 5, "Commercial": 1_000}
+
+OBJECTIVES = ["irr", "npv"]
+
+def _product_arrays(candidates):
+    names = list(candidates)
+    categories = []
+    for name, vals in candidates.items():
+        category = vals.get("category", "Residential" if name in PRODUCT_CATEGORIES["Residential"] else "Commercial")
+        if category not in PRODUCT_CATEGORIES:
+            raise ValueError(f"Product '{name}' must be Residential or Commercial, got '{category}'")
+        categories.append(category)
+
+    residential = np.array([c == "Residential" for c in categories])
+    get = lambda key, default=None: np.array([vals.get(key, default) for vals in candidates.values()], dtype=float)
+    opex = np.where(residential, get("opex_per_unit", 5000), get("opex_per_sqft", 6.0))
+    density = np.array([vals.get("density", DEFAULT_DENSITY.get(str(vals.get("product_type", name)).lower(), np.nan))
+                        for name, vals in candidates.items()], dtype=float)
+    if np.isnan(density).any():
+        missing = [n for n, d in zip(names, density) if np.isnan(d)]
+        raise ValueError(f"No density for {', '.join(missing)}; pass 'density' (units or sqft per acre)")
+
+    step = np.array([vals.get("step", DEFAULT_STEP[c]) for vals, c in zip(candidates.values(), categories)], dtype=float)
+    return {
+        "names": names,
+        "categories": categories,
+        "residential": residential,
+        "rental_price": get("rental_price"),
+        "dev_cost": get("dev_cost"),
+        "opex": opex,
+        "absorption_rate": get("absorption_rate"),
+        "density": density,
+        "step": step,
+        "min": get("min", 0),
+        "max": get("max"),
+    }
+
+class MixEvaluator:
+    """
+    Evaluates many candidate mixes at once. `quantities` is a K x P matrix (one row per
+    mix, one column per candidate product); evaluate() returns per-mix arrays of IRR,
+    NPV, acquisition cost, development cost, acreage and constraint feasibility.
+    """
+
+    def __init__(self, candidates, acq_budget=None, dev_budget=None, max_acres=None, land_cost_per_acre=0,
+                 min_share=None, discount_rate=0.08, years=20, cache=None):
+        self.products = _product_arrays(candidates)
+        if np.isnan(self.products["max"]).any() and max_acres is None:
+            raise ValueError("Give every candidate a 'max' quantity or bound the site with max_acres")
+        self.acq_budget = acq_budget
+        self.dev_budget = dev_budget
+        self.max_acres = max_acres
+        self.land_cost_per_acre = land_cost_per_acre
+        self.discount_rate = discount_rate
+        self.years = years
+        self.cache = cache if cache is not None else OccupancyCache(maxsize=65_536)
+        self.evaluations = 0
+
+        # Minimum shares of development capital, keyed by product name or category
+        self.min_share = []
+        for key, share in (min_share or {}).items():
+            if key in PRODUCT_CATEGORIES:
+                members = np.array([c == key for c in self.products["categories"]])
+            elif key in self.products["names"]:
+                members = np.array([n == key for n in self.products["names"]])
+            else:
+                raise ValueError(f"min_share key '{key}' is neither a candidate product nor a category")
+            self.min_share.append((members, share))
+
+    @property
+    def upper_bounds(self):
+        # Products without a max are bounded by the whole site
+        p = self.products
+        site = self.max_acres * p["density"] if self.max_acres is not None else np.inf
+        return np.fmin(p["max"], site)
+
+    def resources(self, quantities):
+        p = self.products
+        acres = (quantities / p["density"]).sum(axis=1)
+        dev_by_product = quantities * p["dev_cost"]
+        return acres, acres * self.land_cost_per_acre, dev_by_product
+
+    def repair(self, quantities):
+        """Snap to steps, clip to bounds and scale the part above each minimum into the budgets."""
+        p = self.products
+        quantities = np.clip(quantities, p["min"], self.upper_bounds)
+        acres, acq, dev_by_product = self.resources(quantities)
+        min_acres, min_acq, min_dev = self.resources(np.broadcast_to(p["min"], quantities.shape)[:1])
+        scale = np.ones(quantities.shape[0])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for used, floor, limit in ((acres, min_acres, self.max_acres),
+                                       (acq, min_acq, self.acq_budget),
+                                       (dev_by_product.sum(axis=1), min_dev.sum(axis=1), self.dev_budget)):
+                if limit is not None:
+                    scale = np.fmin(scale, np.clip((limit - floor) / (used - floor), 0, 1))
+        quantities = p["min"] + (quantities - p["min"]) * scale[:, None]
+        return np.maximum(np.floor(quantities / p["step"]) * p["step"], p["min"])
+
+    def evaluate(self, quantities):
+        p = self.products
+        quantities = np.atleast_2d(np.asarray(quantities, dtype=float))
+        n_mixes, n_products = quantities.shape
+        cashflows = np.zeros((n_mixes, self.years + 1))
+
+        for mask, kernel in ((p["residential"], residential_cashflows), (~p["residential"], commercial_cashflows)):
+            if not mask.any():
+                continue
+            cols = np.flatnonzero(mask)
+            flows = kernel(quantities[:, cols].reshape(-1),
+                           np.tile(p["rental_price"][cols], n_mixes),
+                           np.tile(p["dev_cost"][cols], n_mixes),
+                           np.tile(p["opex"][cols], n_mixes),
+                           np.tile(p["absorption_rate"][cols], n_mixes),
+                           self.years, cache=self.cache)["cashflows"]
+            cashflows += flows.reshape(n_mixes, cols.size, -1).sum(axis=1)
+
+        acres, acq_cost, dev_by_product = self.resources(quantities)
+        dev_cost = dev_by_product.sum(axis=1)
+        cashflows[:, 0] -= acq_cost
+
+        # An empty mix is not a development, even if it trivially meets every budget
+        feasible = np.all((quantities >= p["min"]) & (quantities <= self.upper_bounds), axis=1) & (quantities.sum(axis=1) > 0)
+        for used, limit in ((acres, self.max_acres), (acq_cost, self.acq_budget), (dev_cost, self.dev_budget)):
+            if limit is not None:
+                feasible &= used <= limit * (1 + 1e-12)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for members, share in self.min_share:
+                feasible &= dev_by_product[:, members].sum(axis=1) >= share * dev_cost
+
+        self.evaluations += n_mixes
+        return {
+            "irr": batch_irr(cashflows),
+            "npv": batch_npv(cashflows, [self.discount_rate])[:, 0],
+            "acq_cost": acq_cost,
+            "dev_cost": dev_cost,
+            "acres": acres,
+            "feasible": feasible,
+            "cashflows": cashflows,
+        }
+
+def optimize_mix(candidates: dict, objective="irr", acq_budget=None, dev_budget=None, max_acres=None,
+                 land_cost_per_acre=0, min_share=None, discount_rate=0.08, years=20,
+                 samples=2_000, rounds=20, elite_fraction=0.1, seed=0):
+    """
+    Cross-entropy search over product quantities. Each round samples `samples` mixes
+    around the current distribution, repairs them into the bounds and budgets, evaluates
+    them in one batch and refits the distribution to the best `elite_fraction`.
+    Infeasible mixes (e.g. violating min_share) and mixes without an IRR rank last.
+
+    Returns the best mix with its metrics and the residential / commercial product
+    dicts that residential_model / commercial_model accept.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unsupported objective '{objective}' (expected one of {', '.join(OBJECTIVES)})")
+    evaluator = MixEvaluator(candidates, acq_budget, dev_budget, max_acres, land_cost_per_acre,
+                             min_share, discount_rate, years)
+    p = evaluator.products
+    rng = np.random.default_rng(seed)
+    low, high = p["min"], evaluator.upper_bounds
+    mean = 0.5 * (low + high)
+    std = 0.5 * (high - low)
+    n_elite = max(1, int(samples * elite_fraction))
+
+    best_score, best = -np.inf, None
+    for _ in range(rounds):
+        mixes = evaluator.repair(rng.normal(mean, std, size=(samples, len(p["names"]))))
+        result = evaluator.evaluate(mixes)
+        score = np.where(result["feasible"], result[objective], -np.inf)
+        score = np.where(np.isnan(score), -np.inf, score)
+
+        order = np.argsort(score)[::-1]
+        if score[order[0]] > best_score:
+            best_score = score[order[0]]
+            best = {key: values[order[0]] for key, values in result.items()}
+            best["quantities"] = mixes[order[0]]
+
+        elite = mixes[order[:n_elite]][np.isfinite(score[order[:n_elite]])]
+        if elite.shape[0] == 0:
+            continue
+        # Smoothed refit keeps the search from collapsing onto the first good region
+        mean = 0.7 * elite.mean(axis=0) + 0.3 * mean
+        std = np.maximum(0.7 * elite.std(axis=0) + 0.3 * std, p["step"])
+
+    if best is None or not np.isfinite(best_score):
+        return None
+
+    residential, commercial = {}, {}
+    for i, name in enumerate(p["names"]):
+        vals = {key: value for key, value in candidates[name].items() if key not in ("density", "min", "max", "step")}
+        vals.setdefault("product_type", name.lower())
+        if p["residential"][i]:
+            residential[name] = dict(vals, units=int(best["quantities"][i]))
+        else:
+            commercial[name] = dict(vals, sqft=int(best["quantities"][i]))
+
+    return {
+        "mix": {name: int(q) for name, q in zip(p["names"], best["quantities"])},
+        "irr": float(best["irr"]),
+        "npv": float(best["npv"]),
+        "acq_cost": float(best["acq_cost"]),
+        "dev_cost": float(best["dev_cost"]),
+        "acres": float(best["acres"]),
+        "cashflows": best["cashflows"],
+        "residential": residential,
+        "commercial": commercial,
+        "evaluations": evaluator.evaluations,
+    }
@@ -0,0 +1,117 @@
+import copy
+import numpy as np
+from engine import product_cashflows
+from finance import batch_metrics
+
+class Portfolio:
+    """
+    Persistent residential or commercial portfolio for what-if loops.
+
+    Each product's cash-flow row (development outflow + yearly NOI) is kept, and the
+    portfolio cash flow is maintained as a running sum of those rows. Changing a product
+    only marks it dirty; recompute() re-runs the batched kernel for the dirty products,
+    swaps their old rows out of the running sum for the new ones and re-solves only their
+    metrics. Portfolio metrics are re-solved lazily, warm-started from the last IRR.
+    """
+
+    def __init__(self, custom_products: dict, category: str, acq_cost: float = 0, years=20):
+        self.category = category.lower()
+        self.acq_cost = acq_cost
+        self.years = years
+        self.products = copy.deepcopy(custom_products)
+        self.names = list(self.products)
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._dirty = set()
+        self._portfolio_metrics = None
+
+        if self.products:
+            self.cashflows = product_cashflows(self.products, self.category, years)["cashflows"]
+        else:
+            self.cashflows = np.zeros((0, years + 1))
+        self.totals = self.cashflows.sum(axis=0)
+        metrics = batch_metrics(self.cashflows)
+        self.irr = metrics["irr"]
+        self.equity_multiple = metrics["equity_multiple"]
+        self.break_even_year = metrics["break_even_year"]
+
+    def __len__(self):
+        return len(self.names)
+
+    def update_product(self, name, **changes):
+        """Change inputs of one product (e.g. rental_price=3400); applied on the next recompute()."""
+        self.products[name].update(changes)
+        self._dirty.add(name)
+
+    def add_product(self, name, vals):
+        if name in self._index:
+            raise ValueError(f"Product '{name}' is already in the portfolio; use update_product to change it")
+        self.products[name] = copy.deepcopy(vals)
+        self._index[name] = len(self.names)
+        self.names.append(name)
+        self.cashflows = np.vstack([self.cashflows, np.zeros(self.years + 1)])
+        for attr in ("irr", "equity_multiple", "break_even_year"):
+            setattr(self, attr, np.append(getattr(self, attr), np.nan))
+        self._dirty.add(name)
+
+    def remove_product(self, name):
+        # The row still holds what the running sum last counted for the product (zeros if
+        # it was added since), so it comes out without recomputing anything
+        self._dirty.discard(name)
+        idx = self._index.pop(name)
+        self.totals -= self.cashflows[idx]
+        self.cashflows = np.delete(self.cashflows, idx, axis=0)
+        for attr in ("irr", "equity_multiple", "break_even_year"):
+            setattr(self, attr, np.delete(getattr(self, attr), idx))
+        del self.products[name]
+        self.names.pop(idx)
+        self._index = {n: i for i, n in enumerate(self.names)}
+        self._portfolio_metrics = None
+
+    def recompute(self):
+        """Re-evaluate dirty products only; returns the names that were recomputed."""
+        if not self._dirty:
+            return []
+        names = [name for name in self.names if name in self._dirty]
+        rows = np.array([self._index[name] for name in names])
+        new_rows = product_cashflows({name: self.products[name] for name in names}, self.category, self.years)["cashflows"]
+
+        # Swap the old contributions out of the running portfolio sum
+        self.totals += new_rows.sum(axis=0) - self.cashflows[rows].sum(axis=0)
+        self.cashflows[rows] = new_rows
+
+        metrics = batch_metrics(new_rows, irr_guess=np.nan_to_num(self.irr[rows], nan=0.1))
+        self.irr[rows] = metrics["irr"]
+        self.equity_multiple[rows] = metrics["equity_multiple"]
+        self.break_even_year[rows] = metrics["break_even_year"]
+
+        self._dirty.clear()
+        self._portfolio_metrics = None
+        return names
+
+    def rebuild(self):
+        # Re-sum from the product rows to clear any floating-point drift from many updates
+        self.recompute()
+        self.totals = self.cashflows.sum(axis=0)
+        self._portfolio_metrics = None
+
+    def portfolio_cashflows(self):
+        self.recompute()
+        cashflows = self.totals.copy()
+        cashflows[0] -= self.acq_cost
+        return cashflows
+
+    def portfolio_metrics(self):
+        self.recompute()
+        if self._portfolio_metrics is None:
+            previous = getattr(self, "_last_portfolio_irr", None)
+            metrics = batch_metrics(self.portfolio_cashflows()[None, :],
+                                    irr_guess=previous if previous is not None and np.isfinite(previous) else None)
+            self._portfolio_metrics = {key: float(values[0]) for key, values in metrics.items()}
+            self._last_portfolio_irr = self._portfolio_metrics["irr"]
+        return dict(self._portfolio_metrics)
+
+    def product_metrics(self):
+        self.recompute()
+        return {name: {"irr": float(self.irr[i]), "equity_multiple": float(self.equity_multiple[i]),
+                       "break_even_year": float(self.break_even_year[i])}
+                for i, name in enumerate(self.names)}
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+from growth_helpers import DEFAULT_CHURN_RATE, DEFAULT_REABSORPTION_RATE, DEFAULT_EARLY_OCCUPANCY_RATE, inflation
+from engine import product_columns, product_cashflows
+from finance import batch_metrics
+
+# Persistent, content-addressed cache of per-product model results (SQLite).
+#
+# A product's key hashes its normalized model inputs (the kernel columns, with defaults
+# applied) together with the category, MODEL_VERSION, the horizon and the global
+# assumptions, so renamed products share entries and any change to an input or an
+# assumption misses. Entries hold the per-product metric values and the yearly cash-flow
+# row; the least recently used entries are evicted once the file outgrows max_bytes.
+
+# Bump whenever a change to the models alters their results, so older entries stop matching
+MODEL_VERSION = 1
+
+DEFAULT_CACHE_PATH = ".feasibility_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+# Per-product values stored ahead of the cash-flow row in each entry
+RESULT_FIELDS = ["total_revenue", "total_opex", "development_cost", "irr", "equity_multiple", "break_even_year"]
+
+# Hits refresh their eviction timestamp at most this often
+LRU_RESOLUTION_SECONDS = 3600
+
+# Keys per DELETE statement, under SQLite's default limit on bound parameters
+_MAX_PARAMS = 900
+
+def assumptions(years):
+    return {
+        "churn_rate": DEFAULT_CHURN_RATE,
+        "reabsorption_rate": DEFAULT_REABSORPTION_RATE,
+        "early_occupancy_rate": DEFAULT_EARLY_OCCUPANCY_RATE,
+        "inflation": inflation,
+        "years": years,
+    }
+
+def compute_product_results(custom_products: dict, category: str, years=20):
+    """Per-product totals, metrics and cash-flow rows straight from the batched engine."""
+    flows = product_cashflows(custom_products, category, years)
+    metrics = batch_metrics(flows["cashflows"])
+    return {
+        "total_revenue": flows["revenue"].sum(axis=1),
+        "total_opex": flows["opex"].sum(axis=1),
+        "development_cost": flows["development_cost"],
+        "irr": metrics["irr"],
+        "equity_multiple": metrics["equity_multiple"],
+        "break_even_year": metrics["break_even_year"],
+        "cashflows": flows["cashflows"],
+    }
+
+def product_results(custom_products: dict, category: str, years=20, cache=None):
+    """compute_product_results, served from `cache` (a ResultCache) where possible."""
+    if cache is None or not cache.enabled:
+        return compute_product_results(custom_products, category, years)
+    return cache.product_results(custom_products, category, years)
+
+class ResultCache:
+    """
+    SQLite-backed store of per-product results. enabled=False bypasses it entirely:
+    nothing is read or written and every product is recomputed.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        if enabled:
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key BLOB PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def keys(self, custom_products: dict, category: str, years=20):
+        """Stable content hash per product, in custom_products order."""
+        category = category.lower()
+        columns = product_columns(custom_products, category)
+        prefix = json.dumps({"category": category, "model_version": MODEL_VERSION, "inputs": sorted(columns),
+                             "assumptions": assumptions(years)}, sort_keys=True).encode()
+        # Rows of the column matrix (inputs in sorted name order) as little-endian float64
+        rows = np.ascontiguousarray(np.column_stack([columns[name] for name in sorted(columns)]), dtype="<f8")
+        return [hashlib.blake2b(prefix + row.tobytes(), digest_size=20).digest() for row in rows]
+
+    def product_results(self, custom_products: dict, category: str, years=20):
+        keys = self.keys(custom_products, category, years)
+        # Each entry is one float64 record: RESULT_FIELDS followed by the cash-flow row
+        width = len(RESULT_FIELDS) + years + 1
+        found = self._fetch(keys)
+        hit = np.array([key in found for key in keys], dtype=bool)
+        records = np.empty((len(keys), width))
+        if hit.any():
+            records[hit] = np.frombuffer(b"".join(found[key] for key, h in zip(keys, hit) if h),
+                                         dtype="<f8").reshape(-1, width)
+
+        missing = np.flatnonzero(~hit)
+        self.hits += int(hit.sum())
+        self.misses += missing.size
+        if missing.size:
+            names = list(custom_products)
+            computed = compute_product_results({names[i]: custom_products[names[i]] for i in missing}, category, years)
+            fresh = np.column_stack([computed[field] for field in RESULT_FIELDS] + [computed["cashflows"]])
+            records[missing] = fresh
+            self._store([keys[i] for i in missing], fresh)
+
+        results = {field: records[:, i] for i, field in enumerate(RESULT_FIELDS)}
+        results["cashflows"] = records[:, len(RESULT_FIELDS):]
+        return results
+
+    def _fetch(self, keys):
+        # Join against a temporary key table rather than binding thousands of parameters
+        db = self._db
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS lookup (key BLOB PRIMARY KEY)")
+        db.execute("DELETE FROM lookup")
+        db.executemany("INSERT OR IGNORE INTO lookup VALUES (?)", ((key,) for key in keys))
+        now = time.time()
+        found, stale = {}, []
+        for key, data, last_used in db.execute("SELECT key, data, last_used FROM results JOIN lookup USING (key)"):
+            found[key] = data
+            if now - last_used > LRU_RESOLUTION_SECONDS:
+                stale.append((now, key))
+        # Recency only needs to be coarse, so repeated runs skip rewriting every hit
+        if stale:
+            db.executemany("UPDATE results SET last_used = ? WHERE key = ?", stale)
+        db.commit()
+        return found
+
+    def _store(self, keys, records):
+        now = time.time()
+        records = np.ascontiguousarray(records, dtype="<f8")
+        size = records.shape[1] * 8 + 20
+        self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             ((key, record.tobytes(), size, now) for key, record in zip(keys, records)))
+        self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the budget so the next few writes do not evict again
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in self._db.execute("SELECT key, bytes FROM results ORDER BY last_used"):
+            victims.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+        for start in range(0, len(victims), _MAX_PARAMS):
+            chunk = victims[start:start + _MAX_PARAMS]
+            self._db.execute(f"DELETE FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+        self._db.commit()
+        self.evictions += len(victims)
+
+    def clear(self):
+        if self._db is not None:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+            self._db.execute("VACUUM")
+
+    def stats(self):
+        entries, size = (0, 0)
+        if self._db is not None:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM results").fetchone()
+        return {"enabled": self.enabled, "path": os.path.abspath(self.path), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "entries": entries, "bytes": size, "max_bytes": self.max_bytes}
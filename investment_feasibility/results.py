@@ -0,0 +1,108 @@
+import numpy as np
+
+RESIDENTIAL_COLUMNS = ["Units", "Total_Revenue", "Acquisition_Cost", "Development_Cost", "Total_OpEx", "NOI",
+                       "IRR", "Equity_Multiple", "Break_Even_Year"]
+
+COMMERCIAL_COLUMNS = ["SqFt_Planned", "Total_Revenue", "Acquisition_Cost", "Development_Cost", "Total_OpEx", "NOI",
+                      "Net_Cash_Flow", "DSCR", "Capitalization_Rate", "IRR", "Equity_Multiple", "Break_Even_Year"]
+
+# Added to the commercial columns when commercial_model is given financing terms
+LEVERED_COLUMNS = ["Levered_IRR", "Levered_Equity_Multiple"]
+
+MIXED_USE_COLUMNS = ["Total_Revenue", "Acquisition_Cost", "Development_Cost", "Total_OpEx", "NOI", "Net_Cash_Flow",
+                     "IRR", "Equity_Multiple", "Break_Even_Year"]
+
+class ResultStore:
+    """
+    Columnar model results for N products: one preallocated NumPy array per metric column
+    and an N x (years + 1) cash-flow matrix (period 0 = development outflow). The model
+    functions fill it in place; to_frame() wraps the arrays without copying them.
+    append() adds products one at a time, doubling the arrays when they run out of room;
+    `capacity` reserves rows for that up front.
+    """
+
+    def __init__(self, products, years, columns, labels=None, int_columns=(), capacity=None):
+        self.products = list(products)
+        self.years = years
+        self.labels = dict(labels or {})  # constant columns, e.g. {"Category": "Mixed-Use"}
+        capacity = max(len(self.products), capacity or 0)
+        self._column_buffers = {
+            col: np.zeros(capacity, dtype=np.int64) if col in int_columns else np.full(capacity, np.nan)
+            for col in columns
+        }
+        self._cashflow_buffer = np.zeros((capacity, years + 1))
+        self._views()
+
+    def _views(self):
+        # columns / cashflows are views of the filled rows of the (possibly larger) buffers
+        n = len(self.products)
+        self.columns = {col: buffer[:n] for col, buffer in self._column_buffers.items()}
+        self.cashflows = self._cashflow_buffer[:n]
+
+    @property
+    def capacity(self):
+        return self._cashflow_buffer.shape[0]
+
+    def _grow(self, capacity):
+        buffers = {}
+        for col, values in self.columns.items():
+            buffers[col] = np.full(capacity, 0 if values.dtype.kind == "i" else np.nan, dtype=values.dtype)
+            buffers[col][:values.size] = values
+        cashflows = np.zeros((capacity, self.years + 1))
+        cashflows[:len(self.cashflows)] = self.cashflows
+        self._column_buffers, self._cashflow_buffer = buffers, cashflows
+
+    def append(self, row: dict, cashflows=None):
+        """
+        Add one product from a dict shaped like row(): its "Product" name plus any of the
+        columns (None is stored as NaN; label keys are ignored). Columns it leaves out stay
+        NaN, or 0 for integer columns. Returns the new row's index.
+        """
+        unknown = set(row) - set(self.columns) - set(self.labels) - {"Product"}
+        if unknown:
+            raise ValueError(f"Unknown result column(s): {', '.join(sorted(unknown))}")
+        index = len(self.products)
+        # A store pointed at outside arrays (see sharding.run_shard) moves into its own first
+        if index == self.capacity or self.cashflows.base is not self._cashflow_buffer:
+            self._grow(max(2 * index, 16))
+        self.products.append(row["Product"])
+        self._views()
+        for col, values in self.columns.items():
+            if col in row:
+                values[index] = np.nan if row[col] is None else row[col]
+        if cashflows is not None:
+            self.cashflows[index] = cashflows
+        return index
+
+    def row(self, index):
+        """One product as a dict, like the models' per-product results: Python scalars, None where NaN."""
+        row = {"Product": self.products[index], **self.labels}
+        for col, values in self.columns.items():
+            value = values[index].item()
+            row[col] = None if isinstance(value, float) and np.isnan(value) else value
+        return row
+
+    def __len__(self):
+        return len(self.products)
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __setitem__(self, column, values):
+        self.columns[column][:] = values
+
+    def fill(self, **columns):
+        for column, values in columns.items():
+            self[column] = values
+
+    def portfolio_cashflows(self):
+        # Yearly cash flows summed across products, excluding the development outflow
+        return self.cashflows[:, 1:].sum(axis=0)
+
+    def to_frame(self):
+        import pandas as pd
+
+        data = {"Product": self.products}
+        data.update({label: [value] * len(self.products) for label, value in self.labels.items()})
+        data.update(self.columns)
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,121 @@
+import numpy as np
+from engine import group_sum
+from finance import batch_metrics
+
+# Hierarchical roll-up of per-deal yearly cash-flow rows (period 0 = outlay, then NOI).
+#
+# Deals are grouped along `levels`, top-down (e.g. category -> product type -> deal),
+# under a single portfolio root. Every node's cash flow is the sum of its deals' rows
+# plus any acquisition cost attached at or below it, so a land cost shared by a whole
+# category is charged once on the category (and the portfolio) rather than per product.
+# Rows are sorted once, every level is summed with one reduceat over that order, and
+# the metrics of all nodes come from a single batch_metrics call.
+
+PORTFOLIO = "portfolio"
+
+# Hierarchy main.py and sweep.py roll portfolios up along
+PORTFOLIO_LEVELS = ["category", "product_type", "deal"]
+
+def rollup(cashflows, keys: dict, levels, acquisition: dict = None):
+    """
+    Roll N deal rows (N x (T + 1) `cashflows`) up the hierarchy `levels`; keys[level]
+    labels every row at that level. `acquisition` maps a node path, the tuple of labels
+    from the top level down (() for the portfolio), to a cost charged at period 0.
+
+    Returns node arrays in top-down order (the portfolio root first): level, path,
+    parent (row of the parent node, -1 for the root), cashflows, acquisition_cost (cost
+    attached at or below the node), irr, equity_multiple and break_even_year, plus
+    `index`, mapping each path to its row.
+    """
+    cashflows = np.atleast_2d(np.asarray(cashflows, dtype=float))
+    n_rows, periods = cashflows.shape
+    labels = [np.asarray(keys[level], dtype=str).reshape(-1) for level in levels]
+    if any(column.size != n_rows for column in labels):
+        raise ValueError(f"Every level in {levels} needs one label per cash-flow row ({n_rows})")
+
+    codes = np.column_stack([np.unique(column, return_inverse=True)[1].reshape(-1) for column in labels]) \
+        if levels else np.zeros((n_rows, 0), dtype=np.int64)
+    order = np.lexsort(codes.T[::-1]) if levels else np.arange(n_rows)
+    codes, ordered = codes[order], cashflows[order]
+    labels = [column[order] for column in labels]
+
+    if not n_rows:
+        # An empty portfolio is just its root, carrying any portfolio-level cost
+        ordered = np.zeros((1, periods))
+
+    # Nodes of each depth start where the label prefix down to that depth changes
+    starts = [np.zeros(1, dtype=np.int64)]
+    for depth in range(1, len(levels) + 1):
+        changed = np.any(codes[1:, :depth] != codes[:-1, :depth], axis=1)
+        starts.append(np.flatnonzero(np.r_[True, changed]) if n_rows else np.zeros(0, dtype=np.int64))
+
+    sums, parents, paths = [], [], []
+    for depth, first in enumerate(starts):
+        sums.append(np.add.reduceat(ordered, first, axis=0) if first.size else np.zeros((0, periods)))
+        parents.append(np.searchsorted(starts[depth - 1], first, side="right") - 1 if depth else np.array([-1]))
+        paths.append(list(zip(*(labels[level][first].tolist() for level in range(depth)))) if depth else [()])
+
+    # Attach acquisition costs to their nodes, then carry them up to every ancestor
+    position = {path: (depth, i) for depth, level_paths in enumerate(paths) for i, path in enumerate(level_paths)}
+    attached = [np.zeros(len(level_paths)) for level_paths in paths]
+    for path, cost in (acquisition or {}).items():
+        path = tuple(str(label) for label in path)
+        if path not in position:
+            raise ValueError(f"Acquisition cost attached to unknown node {path}")
+        depth, i = position[path]
+        attached[depth][i] += cost
+    for depth in range(len(paths) - 1, 0, -1):
+        attached[depth - 1] += group_sum(attached[depth], parents[depth], len(paths[depth - 1]))
+
+    offsets = np.cumsum([0] + [len(level_paths) for level_paths in paths])
+    node_cashflows = np.vstack(sums)
+    acquisition_cost = np.concatenate(attached)
+    node_cashflows[:, 0] -= acquisition_cost
+    metrics = batch_metrics(node_cashflows)
+
+    all_paths = [path for level_paths in paths for path in level_paths]
+    return {
+        "level": [([PORTFOLIO] + list(levels))[len(path)] for path in all_paths],
+        "path": all_paths,
+        "parent": np.concatenate([np.where(p >= 0, p + offsets[max(depth - 1, 0)], -1)
+                                  for depth, p in enumerate(parents)]),
+        "index": {path: row for row, path in enumerate(all_paths)},
+        "cashflows": node_cashflows,
+        "acquisition_cost": acquisition_cost,
+        "irr": metrics["irr"],
+        "equity_multiple": metrics["equity_multiple"],
+        "break_even_year": metrics["break_even_year"],
+    }
+
+def portfolio_rollup(groups):
+    """
+    Roll model results up PORTFOLIO_LEVELS. `groups` holds one
+    (category, custom_products, cashflows, land_cost) tuple per category, with one
+    cash-flow row per product, acquisition excluded (as the ResultStore of
+    residential_model / commercial_model holds them).
+
+    land_cost is the category's shared land cost, charged once on the category node
+    (get_user_inputs collects one per category); the products' own acq_cost is then
+    ignored. With land_cost None every product is charged its own acq_cost instead, as
+    loaded portfolio files and mixed-use projects give them.
+    """
+    rows, acquisition = [], {}
+    keys = {level: [] for level in PORTFOLIO_LEVELS}
+    for category, custom_products, cashflows, land_cost in groups:
+        if not custom_products:
+            continue
+        rows.append(np.atleast_2d(np.asarray(cashflows, dtype=float)))
+        product_types = [str(vals.get("product_type", category)).lower() for vals in custom_products.values()]
+        keys["category"] += [category] * len(custom_products)
+        keys["product_type"] += product_types
+        keys["deal"] += list(custom_products)
+
+        if land_cost is not None:
+            acquisition[(category,)] = acquisition.get((category,), 0) + float(land_cost)
+            continue
+        for (name, vals), product_type in zip(custom_products.items(), product_types):
+            path = (category, product_type, name)
+            acquisition[path] = acquisition.get(path, 0) + float(vals.get("acq_cost", 0))
+
+    cashflows = np.vstack(rows) if rows else np.zeros((0, 1))
+    return rollup(cashflows, keys, PORTFOLIO_LEVELS, acquisition)
@@ -0,0 +1,397 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from engine import product_cashflows, DEFAULT_DEV_COST_PER_SQFT_COM
+from finance import batch_metrics
+from inputs import REQUIRED_FIELDS
+from results import ResultStore, MIXED_USE_COLUMNS
+
+# Local HTTP/JSON feasibility service.
+#
+#   python service.py --port 8765 --workers 2
+#
+#   POST /evaluate/residential  {"products": {"Detached": {...}}, "acq_cost": 1500000, "years": 20}
+#   POST /evaluate/commercial   {"products": {"Office": {...}}, "acq_cost": 826829}
+#   POST /evaluate/mixed_use    {"projects": {"Block A": {...}}, "dev_cost_per_sqft_com": 150}
+#                               (dev_cost_per_sqft_com defaults to main's 150)
+#   GET  /stats                 latency percentiles and batch sizes
+#   GET  /health
+#
+# Requests for the same category and horizon that arrive within `window` seconds are
+# coalesced into one batched engine call, which runs on a worker pool so the event loop
+# only parses, batches and replies.
+
+DEFAULT_PORT = 8765
+DEFAULT_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 256
+LATENCY_SAMPLES = 10_000
+
+ENDPOINTS = {"/evaluate/residential": "residential", "/evaluate/commercial": "commercial",
+             "/evaluate/mixed_use": "mixed_use"}
+
+class RequestError(ValueError):
+    """Client error reported back as HTTP 400."""
+
+def _clean(value):
+    # JSON has no NaN; unsolvable metrics go out as null
+    value = float(value)
+    return None if math.isnan(value) or math.isinf(value) else value
+
+def _metric_rows(names, metrics, extra):
+    return {
+        name: dict({key: _clean(values[i]) for key, values in extra.items()},
+                   irr=_clean(metrics["irr"][i]), equity_multiple=_clean(metrics["equity_multiple"][i]),
+                   break_even_year=_clean(metrics["break_even_year"][i]))
+        for i, name in enumerate(names)
+    }
+
+def evaluate_batch(category, years, payloads):
+    """
+    Evaluate several requests of one category in a single engine call. Runs in a
+    worker; returns one response dict per payload, in order.
+    """
+    if category == "mixed_use":
+        return _evaluate_mixed_use_batch(years, payloads)
+
+    # One kernel pass over every product of every request
+    merged = {(i, name): vals for i, payload in enumerate(payloads) for name, vals in payload["products"].items()}
+    flows = product_cashflows(merged, category, years)
+    metrics = batch_metrics(flows["cashflows"])
+
+    # Per-request portfolio cash flows: sum each request's rows, then charge its land cost
+    owners = np.array([i for i, _ in merged], dtype=np.int64)
+    portfolios = np.zeros((len(payloads), years + 1))
+    np.add.at(portfolios, owners, flows["cashflows"])
+    portfolios[:, 0] -= [payload.get("acq_cost", 0) for payload in payloads]
+    portfolio_metrics = batch_metrics(portfolios)
+
+    extra = {
+        "total_revenue": flows["revenue"].sum(axis=1),
+        "total_opex": flows["opex"].sum(axis=1),
+        "noi": flows["noi"].sum(axis=1),
+        "development_cost": flows["development_cost"],
+    }
+    names = [name for _, name in merged]
+    responses = []
+    for i in range(len(payloads)):
+        rows = np.flatnonzero(owners == i)
+        responses.append({
+            "category": category,
+            "products": _metric_rows([names[r] for r in rows], {k: v[rows] for k, v in metrics.items()},
+                                     {k: v[rows] for k, v in extra.items()}),
+            "portfolio": {
+                "irr": _clean(portfolio_metrics["irr"][i]),
+                "equity_multiple": _clean(portfolio_metrics["equity_multiple"][i]),
+                "break_even_year": _clean(portfolio_metrics["break_even_year"][i]),
+                "cashflows": portfolios[i].tolist(),
+            },
+        })
+    return responses
+
+def _evaluate_mixed_use_batch(years, payloads):
+    from main import mixed_use_model
+
+    merged = {(i, name): vals for i, payload in enumerate(payloads) for name, vals in payload["projects"].items()}
+    dev_cost_com = [payload.get("dev_cost_per_sqft_com", DEFAULT_DEV_COST_PER_SQFT_COM) for payload in payloads]
+    store = ResultStore(merged.keys(), years, MIXED_USE_COLUMNS)
+    # Projects carry the request's commercial dev-cost fallback so one model call serves all requests
+    projects = {key: dict(vals, commercial={name: dict({"dev_cost": dev_cost_com[key[0]]}, **com)
+                                            for name, com in (vals.get("commercial") or {}).items()})
+                for key, vals in merged.items()}
+    mixed_use_model(projects, 0, 0, None, years, store=store)
+
+    owners = np.array([i for i, _ in merged], dtype=np.int64)
+    extra = {"total_revenue": store["Total_Revenue"], "total_opex": store["Total_OpEx"], "noi": store["NOI"],
+             "development_cost": store["Development_Cost"], "acquisition_cost": store["Acquisition_Cost"]}
+    metrics = {"irr": store["IRR"], "equity_multiple": store["Equity_Multiple"],
+               "break_even_year": store["Break_Even_Year"]}
+    names = [name for _, name in merged]
+    responses = []
+    for i in range(len(payloads)):
+        rows = np.flatnonzero(owners == i)
+        responses.append({
+            "category": "mixed_use",
+            "projects": _metric_rows([names[r] for r in rows], {k: v[rows] for k, v in metrics.items()},
+                                     {k: v[rows] for k, v in extra.items()}),
+        })
+    return responses
+
+def _warm_up():
+    # Pay worker start-up and imports before the first request rather than on it
+    import main
+    return os.getpid()
+
+# Optional numeric inputs per product kind (the engine fills in defaults when absent)
+OPTIONAL_FIELDS = {
+    "residential": ["acq_cost"],
+    "commercial": ["acq_cost", "dev_cost", "opex_per_sqft"],
+}
+
+# Mixed-use components: required and optional numeric inputs, as mixed_use_components reads them
+COMPONENT_FIELDS = {
+    "residential": (["units", "rental_price", "dev_cost"], ["opex_per_unit", "absorption_rate"]),
+    "commercial": (["sqft"], ["rental_price", "dev_cost", "opex_per_sqft", "absorption_rate", "churn_rate",
+                              "reabsorption_rate", "early_occupancy_rate"]),
+}
+
+RATE_FIELDS = {"absorption_rate", "churn_rate", "reabsorption_rate", "early_occupancy_rate"}
+
+def _number(label, vals, field, required):
+    value = vals.get(field)
+    if value is None and not required:
+        return None
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+        raise RequestError(f"'{label}' is missing numeric '{field}'" if required
+                           else f"'{label}' has non-numeric '{field}'")
+    if value < 0:
+        raise RequestError(f"'{label}' has negative '{field}'")
+    if field in RATE_FIELDS and value > 1:
+        raise RequestError(f"'{label}' has '{field}' above 1")
+    return float(value)
+
+def _numeric_fields(label, vals, required, optional):
+    # Copy of vals with every known numeric input checked and converted to float
+    clean = dict(vals)
+    for field in required + optional:
+        value = _number(label, vals, field, field in required)
+        if value is not None:
+            clean[field] = value
+    return clean
+
+def _validate_product(category, name, vals):
+    vals = _numeric_fields(name, vals, REQUIRED_FIELDS[category], OPTIONAL_FIELDS[category])
+    size = "units" if category == "residential" else "sqft"
+    if vals[size] <= 0:
+        raise RequestError(f"'{name}' must have a positive '{size}'")
+    if vals["absorption_rate"] <= 0:
+        raise RequestError(f"'{name}' must have a positive 'absorption_rate'")
+    return vals
+
+def _validate_project(name, vals):
+    project = _numeric_fields(name, vals, [], ["acq_cost"])
+    for side, size in (("residential", "units"), ("commercial", "sqft")):
+        spec = vals.get(side)
+        if spec is None:
+            project[side] = {}
+            continue
+        if not isinstance(spec, dict):
+            raise RequestError(f"'{name}' {side} must be an object")
+        # One component given directly, or several keyed by name; normalized to the keyed form
+        components = {spec.get("product_type", side): spec} if size in spec else spec
+        required, optional = COMPONENT_FIELDS[side]
+        project[side] = {}
+        for component, component_vals in components.items():
+            label = f"{name} / {component}"
+            if not isinstance(component_vals, dict):
+                raise RequestError(f"'{label}' must be an object")
+            project[side][component] = _numeric_fields(label, component_vals, required, optional)
+    if not project["residential"] and not project["commercial"]:
+        raise RequestError(f"'{name}' needs residential or commercial components")
+    return project
+
+def validate_payload(category, payload):
+    """
+    Check a request body and return (years, payload) with every numeric input converted
+    to float, so a request that would fail the engine is rejected on its own instead of
+    failing the batch it would have been merged into.
+    """
+    if not isinstance(payload, dict):
+        raise RequestError("Request body must be a JSON object")
+    years = payload.get("years", 20)
+    if not isinstance(years, int) or isinstance(years, bool) or not 1 <= years <= 100:
+        raise RequestError("years must be an integer between 1 and 100")
+
+    key = "projects" if category == "mixed_use" else "products"
+    products = payload.get(key)
+    if not isinstance(products, dict) or not products:
+        raise RequestError(f"'{key}' must be a non-empty object keyed by name")
+    clean = _numeric_fields("request", payload, [], ["acq_cost", "dev_cost_per_sqft_com"])
+    clean[key] = {}
+    for name, vals in products.items():
+        if not isinstance(vals, dict):
+            raise RequestError(f"'{name}' must be an object")
+        clean[key][name] = (_validate_project(name, vals) if category == "mixed_use"
+                            else _validate_product(category, name, vals))
+    return years, clean
+
+class MicroBatcher:
+    """
+    Coalesces submissions with the same key that arrive within `window` seconds (or
+    until `max_batch` are queued) into one call of run(key, payloads) on `executor`.
+    """
+
+    def __init__(self, run, executor, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.run = run
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.batch_sizes = deque(maxlen=LATENCY_SAMPLES)
+        self._pending = {}
+        self._timers = {}
+
+    async def submit(self, key, payload):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((payload, future))
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if batch:
+            self.batch_sizes.append(len(batch))
+            asyncio.ensure_future(self._dispatch(key, batch))
+
+    async def _dispatch(self, key, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self.run, *key, [payload for payload, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            # Re-run the requests one by one so only the one that failed gets the error
+            await asyncio.gather(*[self._dispatch(key, [item]) for item in batch])
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+class FeasibilityService:
+    def __init__(self, workers=None, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, use_threads=False):
+        self.workers = workers = workers or os.cpu_count() or 1
+        if use_threads:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        else:
+            # Forking a process that is running an event loop is unsafe; start clean workers instead
+            self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.batcher = MicroBatcher(evaluate_batch, self.executor, window, max_batch)
+        self.latencies = {endpoint: deque(maxlen=LATENCY_SAMPLES) for endpoint in ENDPOINTS}
+        self.requests = 0
+        self.errors = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.executor, _warm_up) for _ in range(self.workers)])
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    def stats(self):
+        report = {"requests": self.requests, "errors": self.errors, "endpoints": {}}
+        for endpoint, samples in self.latencies.items():
+            if samples:
+                ms = np.array(samples) * 1000
+                report["endpoints"][endpoint] = {
+                    "count": len(samples),
+                    "p50_ms": float(np.percentile(ms, 50)),
+                    "p90_ms": float(np.percentile(ms, 90)),
+                    "p99_ms": float(np.percentile(ms, 99)),
+                    "max_ms": float(ms.max()),
+                }
+        sizes = np.array(self.batcher.batch_sizes)
+        report["batches"] = {
+            "count": int(sizes.size),
+            "mean_size": float(sizes.mean()) if sizes.size else None,
+            "max_size": int(sizes.max()) if sizes.size else None,
+            "size_counts": {str(size): int(n) for size, n in zip(*np.unique(sizes, return_counts=True))},
+        }
+        return report
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if path not in ENDPOINTS:
+            return 404, {"error": f"Unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        category = ENDPOINTS[path]
+        try:
+            payload = json.loads(body or b"{}")
+            years, payload = validate_payload(category, payload)
+        except (json.JSONDecodeError, RequestError) as e:
+            return 400, {"error": str(e)}
+        start = time.perf_counter()
+        try:
+            result = await self.batcher.submit((category, years), payload)
+        except (KeyError, ValueError, TypeError) as e:
+            return 400, {"error": f"Could not evaluate request: {e}"}
+        self.latencies[path].append(time.perf_counter() - start)
+        return 200, result
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            self.requests += 1
+            if len(request_line) < 2:
+                status, response = 400, {"error": "Malformed request line"}
+            else:
+                status, response = await self._route(request_line[0].upper(), request_line[1], body)
+        except Exception as e:
+            status, response = 500, {"error": str(e)}
+        if status >= 400:
+            self.errors += 1
+
+        data = json.dumps(response).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}.get(status, "Error")
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=None, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+    service = FeasibilityService(workers, window, max_batch)
+    port = await service.start(host, port)
+    print(f"Feasibility service listening on http://{host}:{port}")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local feasibility HTTP/JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW * 1000)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.window_ms / 1000, args.max_batch))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from results import ResultStore, RESIDENTIAL_COLUMNS, COMMERCIAL_COLUMNS, MIXED_USE_COLUMNS
+from rollup import rollup
+
+# Sharded execution for portfolio files too large for one process.
+#
+# The input is streamed once (loader.iter_portfolio_chunks) and cut into shards of up to
+# shard_size products of one category, each pickled into `work_dir`. Per category, the
+# per-product cash-flow matrix and result columns are preallocated as .npy files; a
+# worker runs the category's model on its shard with a ResultStore whose arrays are
+# memory-mapped views of its rows, so results land in place without passing through the
+# parent. Each shard also saves its partial rollup (cash flows and land costs summed per
+# product type) and only then an atomic done marker.
+#
+# The parent merges the partials in shard order and rolls them up to product type,
+# category and portfolio with rollup.rollup. Land is charged as portfolio_rollup charges
+# it: a category given a shared land cost is charged that once, any other category is
+# charged its products' own acq_cost. Shards are fixed by the file and
+# shard_size, not by the worker count, so results are bit-identical for any number of
+# workers. Failed shards are retried; if some still fail, rerunning with the same
+# work_dir picks up where the run stopped and only runs the missing shards.
+
+DEFAULT_SHARD_SIZE = 100_000
+DEFAULT_RETRIES = 2
+
+CATEGORY_LABELS = {"residential": "Residential", "commercial": "Commercial", "mixed_use": "Mixed-Use"}
+CATEGORY_COLUMNS = {"residential": RESIDENTIAL_COLUMNS, "commercial": COMMERCIAL_COLUMNS,
+                    "mixed_use": MIXED_USE_COLUMNS}
+
+MANIFEST = "manifest.json"
+
+class ShardError(RuntimeError):
+    """Raised when shards still fail after their retries; completed shards are kept in work_dir."""
+
+def _shard_file(work_dir, shard_id, kind):
+    return os.path.join(work_dir, f"shard_{shard_id:06d}.{kind}")
+
+def _matrix_files(work_dir, category):
+    return os.path.join(work_dir, f"{category}.cashflows.npy"), os.path.join(work_dir, f"{category}.columns.npy")
+
+def _input_signature(path, years, shard_size):
+    stat = os.stat(path)
+    return {"input": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime,
+            "years": years, "shard_size": shard_size}
+
+def plan_shards(path, work_dir, years=20, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Split a portfolio file into shard files and allocate the output arrays. Returns the
+    manifest (also written to work_dir): shards in file order with their category, row
+    offset and size, plus per-category product counts and the category land costs the
+    file gives (see loader.iter_portfolio_chunks).
+    """
+    from loader import iter_portfolio_chunks
+
+    os.makedirs(work_dir, exist_ok=True)
+    shards, counts, land_costs = [], {category: 0 for category in CATEGORY_LABELS}, {}
+    for chunk in iter_portfolio_chunks(path, shard_size, land_costs):
+        for category, products in zip(CATEGORY_LABELS, chunk):
+            names = list(products)
+            for start in range(0, len(names), shard_size):
+                piece = {name: products[name] for name in names[start:start + shard_size]}
+                shard = {"id": len(shards), "category": category, "offset": counts[category], "count": len(piece)}
+                with open(_shard_file(work_dir, shard["id"], "pkl"), "wb") as f:
+                    pickle.dump(piece, f, protocol=pickle.HIGHEST_PROTOCOL)
+                shards.append(shard)
+                counts[category] += len(piece)
+
+    for category, count in counts.items():
+        if count:
+            cashflows_file, columns_file = _matrix_files(work_dir, category)
+            np.lib.format.open_memmap(cashflows_file, mode="w+", dtype=np.float64, shape=(count, years + 1)).flush()
+            np.lib.format.open_memmap(columns_file, mode="w+", dtype=np.float64,
+                                      shape=(count, len(CATEGORY_COLUMNS[category]))).flush()
+
+    manifest = dict(_input_signature(path, years, shard_size), shards=shards, counts=counts,
+                    land_costs={category.lower(): cost for category, cost in land_costs.items()})
+    with open(os.path.join(work_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+def run_shard(work_dir, shard, years):
+    """Run one shard's model into its rows of the output arrays and save its partial rollup."""
+    from main import residential_model, commercial_model, mixed_use_model, DEFAULT_DEV_COST_PER_SQFT_COM
+
+    category, offset, count = shard["category"], shard["offset"], shard["count"]
+    with open(_shard_file(work_dir, shard["id"], "pkl"), "rb") as f:
+        products = pickle.load(f)
+
+    cashflows_file, columns_file = _matrix_files(work_dir, category)
+    cashflows = np.load(cashflows_file, mmap_mode="r+")
+    columns = np.load(columns_file, mmap_mode="r+")
+    names = CATEGORY_COLUMNS[category]
+    store = ResultStore(products.keys(), years, names)
+    store.cashflows = cashflows[offset:offset + count]
+    store.columns = {name: columns[offset:offset + count, j] for j, name in enumerate(names)}
+
+    if category == "residential":
+        residential_model(products, 0, 0, None, years, store=store)
+    elif category == "commercial":
+        commercial_model(products, years, store=store)
+    else:
+        mixed_use_model(products, 0, DEFAULT_DEV_COST_PER_SQFT_COM, None, years, store=store)
+    cashflows.flush()
+    columns.flush()
+
+    # Partial rollup: rows summed per product type, land excluded (mixed-use rows carry it)
+    rows = np.array(store.cashflows)
+    acq_cost = np.array([vals.get("acq_cost", 0) for vals in products.values()], dtype=float)
+    if category == "mixed_use":
+        rows[:, 0] += store["Acquisition_Cost"]
+    product_types = np.array([str(vals.get("product_type", CATEGORY_LABELS[category])).lower()
+                              for vals in products.values()])
+    types, inverse = np.unique(product_types, return_inverse=True)
+    sums = np.zeros((types.size, years + 1))
+    acq_sums = np.zeros(types.size)
+    np.add.at(sums, inverse, rows)
+    np.add.at(acq_sums, inverse, acq_cost)
+    partial = {"product_types": types.tolist(), "cashflows": sums, "acq_cost": acq_sums, "names": list(products)}
+
+    # Write then rename, so a done marker only ever exists for a complete shard
+    done_file = _shard_file(work_dir, shard["id"], "done")
+    with open(done_file + ".tmp", "wb") as f:
+        pickle.dump(partial, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(done_file + ".tmp", done_file)
+    return shard["id"]
+
+def _run_shards(work_dir, shards, years, workers):
+    # Returns the ids of shards that raised
+    failed = []
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(shard["id"], pool.submit(run_shard, work_dir, shard, years)) for shard in shards]
+            for shard_id, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"⚠️ Shard {shard_id} failed: {e!r}")
+                    failed.append(shard_id)
+    else:
+        for shard in shards:
+            try:
+                run_shard(work_dir, shard, years)
+            except Exception as e:
+                print(f"⚠️ Shard {shard['id']} failed: {e!r}")
+                failed.append(shard["id"])
+    return failed
+
+def merge_shards(work_dir, manifest, land_costs=None):
+    """
+    Merge the shards' partial rollups in shard order and roll them up to the portfolio.
+    land_costs maps a category ("residential", "commercial", "mixed_use") to its shared
+    land cost, charged once on the category; other categories are charged the summed
+    acq_cost of their products per product type.
+    """
+    land_costs = land_costs or {}
+    partials = {}
+    for shard in manifest["shards"]:
+        with open(_shard_file(work_dir, shard["id"], "done"), "rb") as f:
+            partials[shard["id"]] = pickle.load(f)
+
+    totals, acq_by_type, names = {}, {}, {category: [] for category in CATEGORY_LABELS}
+    for shard in manifest["shards"]:
+        category, partial = shard["category"], partials[shard["id"]]
+        names[category] += partial["names"]
+        for product_type, row, acq in zip(partial["product_types"], partial["cashflows"], partial["acq_cost"]):
+            key = (category, product_type)
+            totals[key] = totals[key] + row if key in totals else row.copy()
+            acq_by_type[key] = acq_by_type.get(key, 0) + acq
+
+    acquisition = {(CATEGORY_LABELS[category],): float(cost) for category, cost in land_costs.items()
+                   if cost is not None and any(key[0] == category for key in totals)}
+    for (category, product_type), acq in acq_by_type.items():
+        if land_costs.get(category) is None:
+            acquisition[(CATEGORY_LABELS[category], product_type)] = acq
+
+    keys = list(totals)
+    cashflows = np.array([totals[key] for key in keys]).reshape(len(keys), manifest["years"] + 1)
+    levels = {"category": [CATEGORY_LABELS[category] for category, _ in keys],
+              "product_type": [product_type for _, product_type in keys]}
+    rolled = rollup(cashflows, levels, ["category", "product_type"], acquisition)
+    return rolled, names
+
+def run_sharded(path, years=20, workers=None, shard_size=DEFAULT_SHARD_SIZE, work_dir=None,
+                retries=DEFAULT_RETRIES, land_costs=None):
+    """
+    Run a portfolio file shard by shard on `workers` processes. Returns the rollup over
+    product type, category and portfolio (see rollup.rollup) and, per category, the
+    product names with memory-mapped `cashflows` (products x years + 1) and result
+    `columns`. land_costs gives categories a shared land cost (see merge_shards), over
+    any the file itself gives. work_dir keeps the shards and outputs; rerunning on the
+    same input and work_dir resumes from the shards already done.
+    """
+    workers = workers or os.cpu_count() or 1
+    work_dir = work_dir or os.path.splitext(os.path.abspath(path))[0] + ".shards"
+    manifest_file = os.path.join(work_dir, MANIFEST)
+    manifest = None
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        if {k: manifest.get(k) for k in ("input", "size", "mtime", "years", "shard_size")} != \
+                _input_signature(path, years, shard_size):
+            manifest = None
+    if manifest is None:
+        for name in os.listdir(work_dir) if os.path.isdir(work_dir) else []:
+            if name.startswith("shard_"):
+                os.remove(os.path.join(work_dir, name))
+        manifest = plan_shards(path, work_dir, years, shard_size)
+
+    started = time.perf_counter()
+    for attempt in range(retries + 1):
+        pending = [s for s in manifest["shards"] if not os.path.exists(_shard_file(work_dir, s["id"], "done"))]
+        if not pending:
+            break
+        if attempt:
+            print(f"🔁 Retrying {len(pending)} failed shard(s) (attempt {attempt + 1} of {retries + 1})")
+        _run_shards(work_dir, pending, years, workers)
+    pending = [s["id"] for s in manifest["shards"] if not os.path.exists(_shard_file(work_dir, s["id"], "done"))]
+    if pending:
+        raise ShardError(f"{len(pending)} shard(s) failed after {retries} retries ({pending[:10]}); "
+                         f"rerun with work_dir={work_dir!r} to run only those")
+
+    rolled, names = merge_shards(work_dir, manifest, dict(manifest.get("land_costs", {}), **(land_costs or {})))
+    categories = {}
+    for category, count in manifest["counts"].items():
+        if count:
+            cashflows_file, columns_file = _matrix_files(work_dir, category)
+            columns = np.load(columns_file, mmap_mode="r")
+            categories[category] = {
+                "names": names[category],
+                "cashflows": np.load(cashflows_file, mmap_mode="r"),
+                "columns": {name: columns[:, j] for j, name in enumerate(CATEGORY_COLUMNS[category])},
+            }
+    return {"rollup": rolled, "categories": categories, "shards": len(manifest["shards"]),
+            "work_dir": work_dir, "seconds": time.perf_counter() - started}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded multi-process run of a large portfolio file")
+    parser.add_argument("portfolio")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--work-dir", default=None)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--land-cost", action="append", default=[], metavar="CATEGORY=COST",
+                        help="shared land cost charged once for a category (e.g. residential=1500000), over the "
+                             "file's land_cost; categories without one are charged their products' acq_cost")
+    args = parser.parse_args()
+
+    land_costs = {}
+    for item in args.land_cost:
+        category, _, cost = item.partition("=")
+        category = category.strip().lower().replace("-", "_")
+        if category not in CATEGORY_LABELS:
+            parser.error(f"unknown category in --land-cost {item!r} (expected one of {', '.join(CATEGORY_LABELS)})")
+        try:
+            land_costs[category] = float(cost)
+        except ValueError:
+            parser.error(f"--land-cost {item!r} needs a numeric cost")
+
+    result = run_sharded(args.portfolio, args.years, args.workers, args.shard_size, args.work_dir, args.retries,
+                         land_costs)
+    rolled = result["rollup"]
+    print(f"\nProcessed {result['shards']} shard(s) in {result['seconds']:.1f}s; outputs in {result['work_dir']}")
+    for row, path in enumerate(rolled["path"]):
+        if len(path) > 1:
+            continue
+        irr, em = rolled["irr"][row], rolled["equity_multiple"][row]
+        label = path[0] if path else "Total"
+        print(f"📊 {label} IRR: " + (f"{irr:.2%}" if not np.isnan(irr) else "Not calculable")
+              + " | Equity Multiple: " + (f"{em:.2f}x" if not np.isnan(em) else "Not calculable"))
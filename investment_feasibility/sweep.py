@@ -0,0 +1,165 @@
+import copy
+import itertools
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from main import residential_model, commercial_model, mixed_use_model
+from financing import levered_metrics
+from results import ResultStore, RESIDENTIAL_COLUMNS, COMMERCIAL_COLUMNS, MIXED_USE_COLUMNS
+from rollup import portfolio_rollup
+from engine import DEFAULT_DEV_COST_PER_SQFT_COM
+
+CATEGORIES = ["residential", "commercial", "mixed_use"]
+
+_WORKER_STATE = {}
+
+def grid_scenarios(**axes):
+    """
+    Cartesian product of override axes, e.g.
+    grid_scenarios(rental_price_multiplier=[0.9, 1.0, 1.1], **{"commercial.dev_cost": [150, 200]})
+    """
+    keys = list(axes)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*axes.values())]
+
+def _apply_to_product(vals, field, value, scale):
+    # Products may nest components (mixed-use), so apply to every dict that carries the field
+    if field in vals and not isinstance(vals[field], dict):
+        vals[field] = vals[field] * value if scale else value
+    for sub in vals.values():
+        if isinstance(sub, dict):
+            _apply_to_product(sub, field, value, scale)
+
+def apply_overrides(base, overrides):
+    """
+    Copy of a portfolio ({"residential": products, "commercial": products, "mixed_use": products})
+    with overrides applied. Keys are "field" (every category) or "category.field"; a field
+    ending in "_multiplier" scales the input instead of replacing it. "name" is ignored.
+    """
+    portfolio = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if key == "name":
+            continue
+        category, _, field = key.rpartition(".")
+        scale = field.endswith("_multiplier")
+        if scale:
+            field = field[:-len("_multiplier")]
+        for cat in ([category] if category else CATEGORIES):
+            for vals in portfolio.get(cat, {}).values():
+                _apply_to_product(vals, field, value, scale)
+    return portfolio
+
+def evaluate_scenario(base, overrides, years=20, acq_costs=None, zip_code="80302", financing=None):
+    """
+    Inputs totals and category metrics for one scenario. acq_costs, e.g.
+    {"residential": 1500000}, gives a category one shared land cost; categories without
+    one charge each product its own acq_cost (see rollup.portfolio_rollup).
+    """
+    portfolio = apply_overrides(base, overrides)
+    acq_costs = acq_costs or {}
+    row = {}
+    groups = []
+
+    if portfolio.get("residential"):
+        store = ResultStore(portfolio["residential"].keys(), years, RESIDENTIAL_COLUMNS, int_columns=["Units"])
+        df_res, _ = residential_model(portfolio["residential"], shared_acq_cost=0, dev_cost_per_sqft=200,
+                                      zip_code=zip_code, years=years, store=store)
+        groups.append(("residential", portfolio["residential"], store.cashflows, acq_costs.get("residential")))
+        row.update({"residential_total_revenue": df_res["Total_Revenue"].sum(),
+                    "residential_development_cost": df_res["Development_Cost"].sum(),
+                    "residential_noi": df_res["NOI"].sum()})
+
+    if portfolio.get("commercial"):
+        store = ResultStore(portfolio["commercial"].keys(), years, COMMERCIAL_COLUMNS, int_columns=["SqFt_Planned"])
+        df_com, _ = commercial_model(portfolio["commercial"], years=years, store=store)
+        groups.append(("commercial", portfolio["commercial"], store.cashflows, acq_costs.get("commercial")))
+        row.update({"commercial_total_revenue": df_com["Total_Revenue"].sum(),
+                    "commercial_development_cost": df_com["Development_Cost"].sum(),
+                    "commercial_noi": df_com["NOI"].sum()})
+
+    if portfolio.get("mixed_use"):
+        store = ResultStore(portfolio["mixed_use"].keys(), years, MIXED_USE_COLUMNS)
+        df_mix = mixed_use_model(portfolio["mixed_use"], dev_cost_per_sqft_res=200,
+                                 dev_cost_per_sqft_com=DEFAULT_DEV_COST_PER_SQFT_COM,
+                                 zip_code=zip_code, years=years, store=store)
+        # Project land costs go back on the deal nodes, as in main.py
+        rows = store.cashflows.copy()
+        rows[:, 0] += store["Acquisition_Cost"]
+        groups.append(("mixed_use", portfolio["mixed_use"], rows, acq_costs.get("mixed_use")))
+        row.update({"mixed_use_total_revenue": df_mix["Total_Revenue"].sum(),
+                    "mixed_use_development_cost": df_mix["Development_Cost"].sum(),
+                    "mixed_use_noi": df_mix["NOI"].sum()})
+
+    if groups:
+        rolled = portfolio_rollup(groups)
+        labels = [category for category, *_ in groups]
+        nodes = [rolled["index"][(label,)] for label in labels]
+        for label, node in zip(labels, nodes):
+            row[f"{label}_irr"] = rolled["irr"][node]
+            row[f"{label}_equity_multiple"] = rolled["equity_multiple"][node]
+            row[f"{label}_break_even_year"] = rolled["break_even_year"][node]
+        if financing is not None:
+            # Same loan terms (see financing.finance_cashflows) on every category's flows
+            levered = levered_metrics(rolled["cashflows"][nodes], **financing)
+            for i, label in enumerate(labels):
+                row[f"{label}_levered_irr"] = levered["levered_irr"][i]
+                row[f"{label}_min_dscr"] = levered["min_dscr"][i]
+    return row
+
+def _init_worker(base, years, acq_costs, zip_code, financing=None):
+    # The base portfolio is shipped once per worker instead of once per task
+    _WORKER_STATE.update(base=base, years=years, acq_costs=acq_costs, zip_code=zip_code, financing=financing)
+
+def _evaluate_chunk(chunk):
+    state = _WORKER_STATE
+    rows = []
+    for scenario_id, overrides in chunk:
+        row = {"scenario": scenario_id, "name": overrides.get("name", f"Scenario {scenario_id}")}
+        row.update({k: v for k, v in overrides.items() if k != "name"})
+        row.update(evaluate_scenario(state["base"], overrides, state["years"], state["acq_costs"], state["zip_code"],
+                                     state["financing"]))
+        rows.append(row)
+    return rows
+
+def run_sweep(base, scenarios, years=20, acq_costs=None, zip_code="80302", workers=None, chunk_size=None,
+              financing=None):
+    """
+    Evaluate a list of override dicts (see grid_scenarios / apply_overrides) against a base
+    portfolio and return one tidy DataFrame of inputs and portfolio metrics, one row per
+    scenario. Scenarios are submitted to a process pool in chunks; workers=1 runs in-process.
+    With financing (loan terms, see financing.py) rows also carry levered IRR and min DSCR.
+    """
+    workers = workers or os.cpu_count() or 1
+    indexed = list(enumerate(scenarios))
+    if chunk_size is None:
+        # A few chunks per worker keeps the pool balanced without per-scenario overhead
+        chunk_size = max(1, -(-len(indexed) // (workers * 4)))
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+
+    rows = []
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(base, years, acq_costs, zip_code, financing)) as pool:
+            for chunk_rows in pool.map(_evaluate_chunk, chunks):
+                rows.extend(chunk_rows)
+    else:
+        _init_worker(base, years, acq_costs, zip_code, financing)
+        for chunk in chunks:
+            rows.extend(_evaluate_chunk(chunk))
+    return pd.DataFrame(rows)
+
+if __name__ == "__main__":
+    base_portfolio = {
+        "residential": {
+            "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000,
+                         "opex_per_unit": 5000, "absorption_rate": 0.15, "product_type": "detached"},
+            "Multi-Family": {"units": 150, "rental_price": 1925, "dev_cost": 190000,
+                             "opex_per_unit": 5000, "absorption_rate": 0.25, "product_type": "multi-family"},
+        },
+        "commercial": {
+            "Office": {"sqft": 20000, "rental_price": 33.5, "dev_cost": 250, "opex_per_sqft": 6.45,
+                       "absorption_rate": 0.25, "product_type": "office"},
+        },
+    }
+    grid = grid_scenarios(rental_price_multiplier=[0.9, 1.0, 1.1], dev_cost_multiplier=[0.9, 1.0, 1.1])
+    results = run_sweep(base_portfolio, grid, acq_costs={"residential": 1500000, "commercial": 826829}, workers=2)
+    print(results.to_string(index=False))
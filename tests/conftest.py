@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The package modules import each other script-style (from engine import ...), as main.py runs them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "investment_feasibility"))
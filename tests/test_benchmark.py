@@ -0,0 +1,33 @@
+import pytest
+from benchmark import compare_runs
+
+def report(*rows):
+    return {"results": [{"name": name, "products": 10, "years": 20, "seconds": seconds, "peak_memory_bytes": peak}
+                        for name, seconds, peak in rows]}
+
+def regressions(baseline, candidate, **kwargs):
+    return {row["name"]: row["regression"] for row in compare_runs(baseline, candidate, **kwargs)}
+
+def test_timing_changes_below_the_noise_floor_are_not_regressions():
+    baseline = report(("tiny", 0.001, 10**6), ("large", 1.0, 10**6))
+    candidate = report(("tiny", 0.004, 10**6), ("large", 1.2, 10**6))
+    assert regressions(baseline, candidate) == {"tiny": False, "large": True}
+    # Within the threshold is fine however large the absolute change
+    assert regressions(baseline, report(("tiny", 0.004, 10**6), ("large", 1.05, 10**6)), threshold=0.10) == {
+        "tiny": False, "large": False}
+    assert regressions(baseline, candidate, min_seconds=0.0) == {"tiny": True, "large": True}
+
+def test_memory_changes_below_the_noise_floor_are_not_regressions():
+    baseline = report(("tiny", 1.0, 2_000), ("large", 1.0, 50 * 10**6))
+    candidate = report(("tiny", 1.0, 8_000), ("large", 1.0, 60 * 10**6))
+    rows = {row["name"]: row for row in compare_runs(baseline, candidate)}
+    assert rows["tiny"]["memory_change"] == 3.0 and not rows["tiny"]["regression"]
+    assert rows["large"]["memory_change"] == pytest.approx(0.2) and rows["large"]["regression"]
+    assert regressions(baseline, candidate, min_memory_bytes=0) == {"tiny": True, "large": True}
+    assert regressions(baseline, candidate, min_memory_bytes=20 * 10**6) == {"tiny": False, "large": False}
+
+def test_unmatched_and_zero_baselines():
+    baseline = report(("zero", 0.0, 0))
+    candidate = report(("zero", 1.0, 10**9), ("new", 1.0, 10**9))
+    rows = compare_runs(baseline, candidate)
+    assert [row["name"] for row in rows] == ["zero"] and not rows[0]["regression"]
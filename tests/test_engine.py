@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from engine import commercial_cashflows, residential_cashflows
+from growth_helpers import (cap_net_occupancy, net_occupancy, net_sqft_occupancy, phase_absorption,
+                            phase_sqft_absorption)
+
+# Per-product loops as residential_model / commercial_model computed them before the kernels
+
+def residential_reference(units, rent, dev_cost, opex_per_unit, absorption_rate, years, churn, reabsorption, early):
+    occupied = cap_net_occupancy(net_occupancy(phase_absorption(units, absorption_rate, years),
+                                               churn, reabsorption, early), units)
+    noi = [u * rent * 12 - opex_per_unit * u for u in occupied]
+    return occupied, [-units * dev_cost] + noi
+
+def commercial_reference(sqft, rent, dev_cost, opex_per_sqft, absorption_rate, years, churn, reabsorption, early):
+    absorbed = phase_sqft_absorption(sqft, absorption_rate, years)
+    leased = cap_net_occupancy(net_sqft_occupancy(absorbed, sqft, churn, reabsorption, early), sqft)
+    noi = [round(sf * rent * 12, 2) - a * opex_per_sqft for sf, a in zip(leased, absorbed)]
+    return leased, [-sqft * dev_cost] + noi
+
+def random_inputs(seed, n, size_range, rent_range, cost_range, opex_range):
+    rng = np.random.default_rng(seed)
+    return [(int(rng.integers(*size_range)), round(float(rng.uniform(*rent_range)), 2),
+             round(float(rng.uniform(*cost_range)), 2), round(float(rng.uniform(*opex_range)), 2),
+             float(rng.choice([0.1, 0.15, 0.2, 0.25, 0.33])),
+             *(round(float(rate), 3) for rate in rng.uniform(0, 0.5, 3))) for _ in range(n)]
+
+@pytest.mark.parametrize("kernel, reference, ranges", [
+    (residential_cashflows, residential_reference, ((10, 500), (1000, 4000), (1e5, 5e5), (2000, 9000))),
+    (commercial_cashflows, commercial_reference, ((5000, 250000), (1, 40), (100, 400), (2, 9))),
+])
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("cached", [True, False])
+def test_kernels_match_per_product_loops(kernel, reference, ranges, seed, cached):
+    inputs = random_inputs(seed, 150, *ranges)
+    size, rent, dev_cost, opex, absorption, churn, reabsorption, early = (np.array(col) for col in zip(*inputs))
+    extra = {} if cached else {"cache": None}
+    flows = kernel(size, rent, dev_cost, opex, absorption, 20, churn, reabsorption, early, **extra)
+    for i, row in enumerate(inputs):
+        occupied, cashflows = reference(*row[:5], 20, *row[5:])
+        np.testing.assert_array_equal(flows["occupancy"][i], occupied)
+        np.testing.assert_allclose(flows["cashflows"][i], cashflows, rtol=1e-12, atol=1e-6)
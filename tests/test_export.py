@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+import export
+from export import export_matrices, export_results, numeric_results, open_matrices
+
+def test_matrix_export_does_not_import_pandas(tmp_path):
+    probe = ("import sys, numpy as np, export\n"
+             f"export.export_matrices({str(tmp_path / 'm.feas')!r}, {{'noi': np.ones((2, 3))}}, ['a', 'b'])\n"
+             "print('pandas' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", probe], cwd=os.path.dirname(export.__file__), capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+def test_matrix_round_trip(tmp_path):
+    rng = np.random.default_rng(3)
+    matrices = {"revenue": rng.normal(size=(5, 20)), "cashflows": rng.normal(size=(5, 21))}
+    names = [f"P{i}" for i in range(5)]
+    path = export_matrices(str(tmp_path / "m.feas"), matrices, names, {"category": "residential"}, chunk_rows=2)
+    with open_matrices(path) as stored:
+        assert stored.products == names and stored.header["category"] == "residential"
+        assert "cashflows" in stored and "noi" not in stored
+        for field, array in matrices.items():
+            np.testing.assert_array_equal(stored[field], array)
+        np.testing.assert_array_equal(stored["cashflows"][stored.row("P3")], matrices["cashflows"][3])
+
+def test_results_keep_numbers_and_not_calculable_metrics(tmp_path):
+    import pandas as pd
+    df = pd.DataFrame({"Product": ["A", "B"], "IRR": [0.1234567, None], "NOI": [1234.5, 99.25]})
+    numeric = numeric_results(df)
+    assert numeric["IRR"].dtype == float and np.isnan(numeric["IRR"][1])
+    path = export_results(df, str(tmp_path / "r.csv"), chunk_rows=1)
+    pd.testing.assert_frame_equal(pd.read_csv(path), numeric)
+    with pytest.raises(ValueError):
+        export_results(df, str(tmp_path / "r.xlsx"))
+
+def test_product_matrices_have_the_same_fields_and_conventions_in_every_category(tmp_path):
+    from engine import mixed_use_cashflows, product_cashflows
+    residential = {"Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000,
+                                "absorption_rate": 0.15},
+                   "Attached": {"units": 90, "rental_price": 2625, "dev_cost": 350000, "opex_per_unit": 5000,
+                                "absorption_rate": 0.20}}
+    commercial = {"Retail": {"sqft": 50000, "rental_price": 35, "dev_cost": 150, "absorption_rate": 0.2},
+                  "Office": {"sqft": 80000, "rental_price": 30, "dev_cost": 170, "absorption_rate": 0.15}}
+    mixed_use = {"Homes only": {"acq_cost": 2_000_000, "residential": residential["Detached"]},
+                 "Tower": {"acq_cost": 5_000_000, "residential": residential["Attached"],
+                           "commercial": {"sqft": 20000, "rental_price": 40, "absorption_rate": 0.3}}}
+    stored = {}
+    for category, products in [("residential", residential), ("commercial", commercial), ("mixed-use", mixed_use)]:
+        path = export.export_product_matrices(str(tmp_path / f"{category}.fmat"), products, category, years=12)
+        stored[category] = open_matrices(path)
+
+    for matrices in stored.values():
+        assert matrices.fields == export.MATRIX_FIELDS
+        assert {field: matrices.header["matrices"][field]["shape"] for field in matrices.fields} == {
+            field: [2, 13 if field == "cashflows" else 12] for field in export.MATRIX_FIELDS}
+        assert matrices.header["conventions"]["period_0"] == "development cost"
+    assert stored["mixed-use"].header["category"] == "mixed_use"
+
+    # Period 0 is the development outflow alone, acquisition included nowhere
+    for category, products in [("residential", residential), ("commercial", commercial)]:
+        flows = product_cashflows(products, category, 12)
+        np.testing.assert_array_equal(stored[category]["cashflows"][:, 0], -flows["development_cost"])
+    flows = mixed_use_cashflows(mixed_use, 150, 12)
+    np.testing.assert_array_equal(stored["mixed-use"]["cashflows"][:, 0], -flows["development_cost"])
+    np.testing.assert_array_equal(stored["mixed-use"]["cashflows"][:, 1:], flows["noi"])
+
+    # Economic occupancy: a residential-only project's share equals its occupied units over units
+    occupied = product_cashflows({"Detached": residential["Detached"]}, "residential", 12)["occupancy"][0]
+    np.testing.assert_allclose(stored["mixed-use"]["occupancy"][0], occupied / 150)
+    assert np.all((stored["mixed-use"]["occupancy"] >= 0) & (stored["mixed-use"]["occupancy"] <= 1))
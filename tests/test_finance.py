@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from finance import batch_irr, batch_equity_multiple, batch_break_even_year, batch_npv
+
+npf = pytest.importorskip("numpy_financial")
+
+def random_cashflows(seed, n=300, years=20):
+    rng = np.random.default_rng(seed)
+    outlay = -rng.uniform(1e5, 5e7, n)
+    noi = rng.uniform(-0.05, 0.25, (n, years)) * -outlay[:, None]
+    return np.hstack([outlay[:, None], noi])
+
+def reference_irr(cashflows):
+    irr = npf.irr(cashflows)
+    return np.nan if irr is None or isinstance(irr, complex) else irr
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_irr_matches_numpy_financial(seed):
+    cashflows = random_cashflows(seed)
+    expected = np.array([reference_irr(row) for row in cashflows])
+    np.testing.assert_allclose(batch_irr(cashflows), expected, rtol=1e-8, atol=1e-10)
+
+def test_batch_irr_rows_without_irr_are_nan():
+    cashflows = np.array([[-100.0, -10, -10], [100.0, 10, 10], [0.0, 0, 0], [-100.0, 60, 60]])
+    irr = batch_irr(cashflows)
+    assert np.isnan(irr[:3]).all()
+    assert irr[3] == pytest.approx(reference_irr(cashflows[3]))
+
+def test_batch_metrics_match_scalar_definitions():
+    cashflows = random_cashflows(7, n=50)
+    for row, em, be in zip(cashflows, batch_equity_multiple(cashflows), batch_break_even_year(cashflows)):
+        assert em == pytest.approx(row[1:].sum() / -row[0])
+        cumulative = np.cumsum(row)
+        expected = next((year for year, total in enumerate(cumulative) if total >= 0), None)
+        assert (np.isnan(be) and expected is None) or be == expected
+    rates = [0.0, 0.05, 0.1]
+    expected = [[npf.npv(rate, row) for rate in rates] for row in cashflows]
+    np.testing.assert_allclose(batch_npv(cashflows, rates), expected, rtol=1e-10)
+
+def test_example_scenarios_keep_the_module_level_list():
+    import finance
+    assert finance.scenarios == finance.example_scenarios()
+    assert [s["name"] for s in finance.scenarios] == ["Base Case", "High Rent", "Low Rent, High Cost"]
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from finance import batch_metrics
+from financing import finance_cashflows, levered_metrics
+
+def reference_schedule(cashflows, ltc, construction_rate, construction_years, ltv, perm_rate, amort_years,
+                       io_years, cap_rate, exit_year):
+    # Year-by-year loop over one deal, as a lender's amortization table would be built
+    years = len(cashflows) - 1
+    noi = cashflows[1:]
+    construction_loan = ltc * max(-cashflows[0], 0)
+    conversion = min(construction_years, exit_year)
+    refinanced = conversion < exit_year
+    permanent_loan = ltv * max(noi[min(conversion, years - 1)], 0) / cap_rate if refinanced else 0.0
+    payment = (permanent_loan * perm_rate / (1 - (1 + perm_rate) ** -amort_years) if perm_rate
+               else permanent_loan / amort_years)
+
+    levered = list(cashflows)
+    levered[0] += construction_loan
+    interest, principal, balance = [], [], []
+    outstanding = construction_loan
+    for year in range(1, years + 1):
+        paid_interest = paid_principal = 0.0
+        if year <= conversion:
+            paid_interest = construction_loan * construction_rate
+        elif year <= exit_year:
+            age = year - conversion
+            paid_interest = outstanding * perm_rate
+            paid_principal = 0.0 if age <= io_years else min(payment - paid_interest, outstanding)
+            outstanding -= paid_principal
+        levered[year] -= paid_interest + paid_principal
+        if year == conversion:
+            # Take-out: the permanent loan repays the construction loan
+            levered[year] += permanent_loan - construction_loan
+            outstanding = permanent_loan
+        if year == exit_year:
+            levered[year] -= outstanding
+            outstanding = 0.0
+        interest.append(paid_interest)
+        principal.append(paid_principal)
+        balance.append(outstanding)
+    return {"interest": interest, "principal": principal, "balance": balance, "levered_cashflows": levered,
+            "permanent_loan": permanent_loan}
+
+TERMS = [
+    dict(ltc=0.65, construction_rate=0.08, construction_years=2, ltv=0.65, perm_rate=0.065, amort_years=30,
+         io_years=0, cap_rate=0.06, exit_year=20),
+    dict(ltc=0.5, construction_rate=0.07, construction_years=3, ltv=0.7, perm_rate=0.05, amort_years=25,
+         io_years=2, cap_rate=0.055, exit_year=12),
+    dict(ltc=0.6, construction_rate=0.09, construction_years=1, ltv=0.6, perm_rate=0.0, amort_years=10,
+         io_years=0, cap_rate=0.07, exit_year=20),
+    dict(ltc=0.7, construction_rate=0.08, construction_years=5, ltv=0.65, perm_rate=0.06, amort_years=30,
+         io_years=0, cap_rate=0.06, exit_year=4),
+]
+
+@pytest.mark.parametrize("terms", TERMS)
+def test_schedule_matches_loop(terms):
+    rng = np.random.default_rng(0)
+    outlay = rng.uniform(5e6, 2e7, 5)
+    cashflows = np.hstack([-outlay[:, None], outlay[:, None] * rng.uniform(0.02, 0.12, (5, 20))])
+    financed = finance_cashflows(cashflows, **terms)
+    for row, flows in enumerate(cashflows):
+        expected = reference_schedule(flows, **terms)
+        for key in ("interest", "principal", "balance", "levered_cashflows"):
+            np.testing.assert_allclose(financed[key][row], expected[key], rtol=1e-9, atol=1e-4, err_msg=key)
+        assert financed["permanent_loan"][row] == pytest.approx(expected["permanent_loan"])
+
+def test_balance_carries_permanent_loan_in_conversion_year():
+    cashflows = np.array([[-10e6] + [1e6] * 20])
+    financed = finance_cashflows(cashflows, ltc=0.65, construction_years=2, ltv=0.6, cap_rate=0.06)
+    assert financed["balance"][0, 0] == pytest.approx(6.5e6)
+    assert financed["balance"][0, 1] == pytest.approx(financed["permanent_loan"][0]) == pytest.approx(10e6)
+
+def test_levered_metrics_use_levered_cashflows():
+    cashflows = np.array([[-10e6] + [1e6] * 20])
+    levered = levered_metrics(cashflows, ltc=0.6)
+    expected = batch_metrics(levered["financing"]["levered_cashflows"])
+    assert levered["levered_irr"][0] == pytest.approx(expected["irr"][0])
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from engine import product_cashflows
+from finance import batch_break_even_year, batch_irr
+from goal_seek import goal_seek
+
+RESIDENTIAL = {
+    "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15},
+    "Attached": {"units": 150, "rental_price": 2625, "dev_cost": 350000, "opex_per_unit": 5000, "absorption_rate": 0.20},
+    "Multi-Family": {"units": 150, "rental_price": 1925, "dev_cost": 190000, "opex_per_unit": 5000, "absorption_rate": 0.25},
+}
+COMMERCIAL = {
+    "Office": {"sqft": 50000, "rental_price": 2.5, "dev_cost": 150, "opex_per_sqft": 6, "absorption_rate": 0.25},
+    "Retail": {"sqft": 30000, "rental_price": 2.2, "dev_cost": 120, "opex_per_sqft": 6, "absorption_rate": 0.33},
+}
+
+def with_values(products, field, values):
+    return {name: dict(vals, **{field: float(value)}) for (name, vals), value in zip(products.items(), values)}
+
+def test_rent_for_target_irr():
+    result = goal_seek(RESIDENTIAL, "residential", "rental_price", "irr", 0.12)
+    assert result["converged"].all()
+    cashflows = product_cashflows(with_values(RESIDENTIAL, "rental_price", result["value"]), "residential")["cashflows"]
+    np.testing.assert_allclose(batch_irr(cashflows), 0.12, atol=1e-6)
+    np.testing.assert_allclose(result["achieved"], 0.12, atol=1e-6)
+    # The solution lies inside the default bracket, not on one of its ends
+    current = np.array([vals["rental_price"] for vals in RESIDENTIAL.values()])
+    assert np.all((result["value"] > 0) & (result["value"] < 20 * current))
+
+def test_dev_cost_for_break_even_year():
+    result = goal_seek(COMMERCIAL, "commercial", "dev_cost", "break_even_year", 8)
+    assert result["converged"].all()
+    solved = product_cashflows(with_values(COMMERCIAL, "dev_cost", result["value"]), "commercial")["cashflows"]
+    assert np.all(batch_break_even_year(solved) <= 8)
+    # The solved cost is the threshold: a little more and the products miss year 8
+    dearer = product_cashflows(with_values(COMMERCIAL, "dev_cost", result["value"] * (1 + 1e-6)), "commercial")
+    assert not np.any(batch_break_even_year(dearer["cashflows"]) <= 8)
+
+@pytest.mark.parametrize("target, bounds", [(5.0, None), (0.12, (1.0, 1.01))])
+def test_unbracketable_target_returns_nan(target, bounds):
+    result = goal_seek(RESIDENTIAL, "residential", "rental_price", "irr", target, bounds=bounds, max_iter=20)
+    assert not result["converged"].any()
+    assert np.isnan(result["value"]).all() and np.isnan(result["achieved"]).all()
+
+def test_only_unreachable_products_are_nan():
+    products = dict(RESIDENTIAL, Shed=dict(RESIDENTIAL["Detached"], rental_price=1.0, dev_cost=5e6))
+    result = goal_seek(products, "residential", "rental_price", "irr", 0.12)
+    assert result["converged"].tolist() == [True, True, True, False]
+    assert np.isnan(result["value"][3]) and np.isfinite(result["value"][:3]).all()
+
+def test_unknown_variable_and_metric_are_rejected():
+    with pytest.raises(ValueError):
+        goal_seek(RESIDENTIAL, "residential", "units", "irr", 0.12)
+    with pytest.raises(ValueError):
+        goal_seek(RESIDENTIAL, "residential", "rental_price", "npv", 0.12)
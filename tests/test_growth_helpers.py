@@ -0,0 +1,84 @@
+import pickle
+import numpy as np
+import pytest
+from growth_helpers import (OccupancyCache, batch_occupancy, cap_net_occupancy, net_occupancy, net_sqft_occupancy,
+                            phase_absorption, phase_sqft_absorption, round_like_python)
+
+def residential_reference(units, absorption_rate, years, churn, reabsorption, early):
+    absorbed = phase_absorption(units, absorption_rate, years)
+    return cap_net_occupancy(net_occupancy(absorbed, churn, reabsorption, early), units)
+
+def commercial_reference(sqft, absorption_rate, years, churn, reabsorption, early):
+    absorbed = phase_sqft_absorption(sqft, absorption_rate, years)
+    return cap_net_occupancy(net_sqft_occupancy(absorbed, sqft, churn, reabsorption, early), sqft)
+
+def random_cases(seed, n):
+    rng = np.random.default_rng(seed)
+    return [(int(rng.integers(1, 2000)), float(rng.choice([0.05, 0.1, 0.15, 0.2, 0.25, 0.33, 0.5])),
+             *(round(float(rate), 3) for rate in rng.uniform(0, 0.6, 3))) for _ in range(n)]
+
+@pytest.mark.parametrize("commercial, reference", [(False, residential_reference), (True, commercial_reference)])
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_occupancy_matches_reference_loop(commercial, reference, seed):
+    cases = random_cases(seed, 200)
+    totals, rates, churn, reabsorption, early = (np.array(column) for column in zip(*cases))
+    batched = batch_occupancy(totals, rates, 20, churn, reabsorption, early, commercial=commercial)
+    expected = np.array([reference(*case[:2], 20, *case[2:]) for case in cases], dtype=float)
+    np.testing.assert_array_equal(batched, expected)
+
+@pytest.mark.parametrize("commercial, reference", [(False, residential_reference), (True, commercial_reference)])
+def test_batch_occupancy_default_rates(commercial, reference):
+    batched = batch_occupancy([150, 150, 7], [0.15, 0.25, 1.0], 20, commercial=commercial)
+    defaults = (0.2, 0.5, 0.25)
+    expected = [reference(total, rate, 20, *defaults) for total, rate in [(150, 0.15), (150, 0.25), (7, 1.0)]]
+    np.testing.assert_array_equal(batched, np.array(expected, dtype=float))
+
+@pytest.mark.parametrize("value", [2.675, 1.005, 0.125, 0.375, -2.675, 12.345, 1e6 + 0.005, 37.5 * 0.33])
+def test_round_like_python(value):
+    assert round_like_python(np.array([value]))[0] == round(value, 2)
+
+def test_occupancy_cache_matches_batch_occupancy_and_counts_rows():
+    cache = OccupancyCache()
+    totals, rates = [150, 150, 90, 150], [0.15, 0.15, 0.25, 0.15]
+    np.testing.assert_array_equal(cache.occupancy(totals, rates, 20), batch_occupancy(totals, rates, 20))
+    # Four rows, two distinct schedules: computed once each, repeats count as hits
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 0, "size": 2, "maxsize": 4096}
+    cache.occupancy([90, 150], [0.25, 0.15], 20)
+    assert cache.stats()["hits"] == 4 and cache.stats()["misses"] == 2
+    # Horizon and category are part of the key
+    cache.occupancy([150], [0.15], 10)
+    np.testing.assert_array_equal(cache.occupancy([150], [0.15], 20, commercial=True),
+                                  batch_occupancy([150], [0.15], 20, commercial=True))
+    assert cache.stats()["misses"] == 4 and len(cache) == 4
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "maxsize": 4096}
+
+def test_occupancy_cache_evicts_least_recently_used():
+    cache = OccupancyCache(maxsize=2)
+    cache.occupancy([100], [0.1], 20)
+    cache.occupancy([200], [0.1], 20)
+    cache.occupancy([100], [0.1], 20)  # 100 is now the most recent entry
+    cache.occupancy([300], [0.1], 20)  # evicts 200
+    assert cache.stats()["evictions"] == 1 and len(cache) == 2
+    misses = cache.stats()["misses"]
+    cache.occupancy([100, 300], [0.1, 0.1], 20)
+    assert cache.stats()["misses"] == misses
+    cache.occupancy([200], [0.1], 20)
+    assert cache.stats()["misses"] == misses + 1 and cache.stats()["evictions"] == 2
+
+def test_occupancy_cache_arrays_are_read_only():
+    cache = OccupancyCache()
+    matrix = cache.occupancy([150, 90], [0.15, 0.25], 20)
+    with pytest.raises(ValueError):
+        matrix[0, 0] = -1
+    entry = next(iter(cache._entries.values()))
+    with pytest.raises(ValueError):
+        entry[0] = -1
+    np.testing.assert_array_equal(cache.occupancy([150, 90], [0.15, 0.25], 20), batch_occupancy([150, 90], [0.15, 0.25], 20))
+
+def test_occupancy_cache_pickles_with_its_entries():
+    cache = OccupancyCache()
+    cache.occupancy([150], [0.15], 20)
+    copy = pickle.loads(pickle.dumps(cache))
+    copy.occupancy([150], [0.15], 20)
+    assert copy.stats()["hits"] == 1 and copy.stats()["misses"] == 1
@@ -0,0 +1,7 @@
+from benchmark import CORE_MODULES, IMPORT_BUDGET_SECONDS, LAZY_MODULES, check_import_budget
+
+def test_core_imports_within_budget_without_heavy_modules():
+    result = check_import_budget(IMPORT_BUDGET_SECONDS, repeat=3)
+    assert not result["eagerly_loaded"], f"{CORE_MODULES} eagerly import {result['eagerly_loaded']} of {LAZY_MODULES}"
+    assert result["seconds"] <= IMPORT_BUDGET_SECONDS, (
+        f"Core import took {result['seconds']:.3f}s, over the {IMPORT_BUDGET_SECONDS:.3f}s budget")
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import pytest
+import instrumentation
+from finance import batch_irr
+from instrumentation import count, snapshot, stage
+
+@pytest.fixture
+def profiling():
+    was_enabled = instrumentation.ENABLED
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.reset()
+    if not was_enabled:
+        instrumentation.disable()
+
+def test_stages_record_and_nest(profiling):
+    with stage("outer", rows=10):
+        with stage("inner", rows=4):
+            time.sleep(0.01)
+        with stage("inner", rows=6):
+            pass
+    stages = snapshot()["stages"]
+    assert stages["outer"]["calls"] == 1 and stages["outer"]["rows"] == 10
+    assert stages["inner"]["calls"] == 2 and stages["inner"]["rows"] == 10
+    assert stages["outer"]["seconds"] >= stages["inner"]["seconds"] >= 0.01
+
+def test_stage_records_when_the_block_raises(profiling):
+    with pytest.raises(RuntimeError):
+        with stage("failing", rows=3):
+            raise RuntimeError("boom")
+    assert snapshot()["stages"]["failing"]["calls"] == 1
+
+def test_counters_accumulate_and_reset(profiling):
+    count("rows", 5)
+    count("rows")
+    count("failures", 0)
+    state = snapshot()
+    assert state["counters"] == {"rows": 6, "failures": 0}
+    # Snapshots are copies, not live views
+    state["counters"]["rows"] = 100
+    assert snapshot()["counters"]["rows"] == 6
+    batch_irr(np.array([[-100.0, 60, 60], [100.0, 10, 10]]))
+    state = snapshot()
+    assert state["stages"]["irr_solve"]["rows"] == 2
+    assert state["counters"]["irr_rows"] == 2 and state["counters"]["irr_failures"] == 1
+    instrumentation.reset()
+    assert snapshot() == {"stages": {}, "counters": {}}
+
+def test_disabled_instrumentation_records_nothing(profiling):
+    instrumentation.disable()
+    with stage("ignored", rows=5) as block:
+        count("ignored")
+        batch_irr(np.array([[-100.0, 60, 60]]))
+    assert block is stage("other")  # the shared no-op stage
+    assert snapshot() == {"stages": {}, "counters": {}}
+
+def test_disabled_instrumentation_adds_no_output(tmp_path):
+    entries = [{"category": "Residential", "product": "Detached", "acq cost": 1500000, "units": 150,
+                "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15}]
+    portfolio = tmp_path / "portfolio.json"
+    portfolio.write_text(json.dumps(entries))
+    main = os.path.join(os.path.dirname(instrumentation.__file__), "main.py")
+    env = {k: v for k, v in os.environ.items() if k != "FEASIBILITY_PROFILE"}
+
+    def run(**extra):
+        return subprocess.run([sys.executable, main, str(portfolio), "--no-cache"], cwd=tmp_path,
+                              env=dict(env, **extra), capture_output=True, text=True, check=True).stdout
+
+    plain = run()
+    assert not (tmp_path / "feasibility_profile.json").exists()
+    profiled = run(FEASIBILITY_PROFILE="1")
+    profile = json.loads((tmp_path / "feasibility_profile.json").read_text())
+    assert profile["stages"]["irr_solve"]["calls"] > 0
+    # Profiling adds only the pointer to the profile file
+    extra = [line for line in profiled.splitlines() if line not in plain.splitlines()]
+    assert extra == ["⏱️ Stage timings written to: feasibility_profile.json"]
+    assert "Stage timings" not in plain
@@ -0,0 +1,81 @@
+import json
+import pytest
+import loader
+from loader import iter_portfolio_chunks, load_portfolio
+
+ROWS = [
+    {"category": "Residential", "product": "Detached", "units": 100, "rental_price": 3000, "dev_cost": 400000,
+     "opex_per_unit": 5000, "absorption_rate": 0.2},
+    {"category": "Commercial", "product": "Office", "sqft": 20000, "rental_price": 3, "dev_cost": 200,
+     "opex_per_sqft": 6, "absorption_rate": 0.25},
+    {"category": "Residential", "product": "Attached", "units": 80, "rental_price": 2500, "dev_cost": 300000,
+     "opex_per_unit": 5000, "absorption_rate": 0.2},
+    {"category": "Residential", "product": "Detached", "units": 50, "rental_price": 2000, "dev_cost": 250000,
+     "opex_per_unit": 4000, "absorption_rate": 0.1},
+    {"category": "Mixed-Use", "project": "Hub", "component": "residential", "product": "Flats", "acq_cost": 1e6,
+     "units": 40, "rental_price": 2200, "dev_cost": 280000, "opex_per_unit": 5000, "absorption_rate": 0.25},
+    {"category": "Mixed-Use", "project": "Hub", "component": "commercial", "product": "Retail", "sqft": 8000,
+     "rental_price": 2.5, "dev_cost": 180, "opex_per_sqft": 5, "absorption_rate": 0.2},
+    {"category": "Mixed-Use", "project": "Hub", "component": "commercial", "product": "Retail", "sqft": 9000,
+     "rental_price": 2.5, "dev_cost": 180, "opex_per_sqft": 5, "absorption_rate": 0.2},
+]
+
+@pytest.fixture(params=[".csv", ".json", ".jsonl"])
+def portfolio_file(request, tmp_path):
+    path = tmp_path / f"portfolio{request.param}"
+    if request.param == ".csv":
+        import pandas as pd
+        pd.DataFrame(ROWS).to_csv(path, index=False)
+    elif request.param == ".json":
+        path.write_text(json.dumps(ROWS, indent=2))
+    else:
+        path.write_text("\n".join(json.dumps(row) for row in ROWS))
+    return str(path)
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 50_000])
+def test_duplicate_names_keep_first_row_in_every_chunking(portfolio_file, chunksize, capsys):
+    residential, commercial, mixed_use = load_portfolio(portfolio_file, chunksize=chunksize)
+    assert sorted(residential) == ["Attached", "Detached"]
+    assert residential["Detached"]["units"] == 100
+    assert list(commercial) == ["Office"]
+    assert mixed_use["Hub"]["commercial"]["Retail"]["sqft"] == 8000
+    assert "duplicate product name: 2" in capsys.readouterr().out
+
+def test_json_entries_are_streamed(tmp_path, monkeypatch):
+    path = tmp_path / "portfolio.json"
+    path.write_text(json.dumps(ROWS[:3], indent=4))
+    monkeypatch.setattr(loader, "JSON_BLOCK_SIZE", 16)
+    entries = list(loader._iter_json_entries(str(path), block_size=16))
+    assert entries == ROWS[:3]
+
+def test_truncated_json_fails(tmp_path):
+    path = tmp_path / "portfolio.json"
+    path.write_text(json.dumps(ROWS[:2])[:-20])
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_portfolio_chunks(str(path)))
+
+def test_nested_json_entries(tmp_path):
+    nested = [dict(ROWS[0]), dict(ROWS[0], units=10), {
+        "category": "Mixed-Use", "product": "Hub", "acq_cost": 1e6,
+        "residential": {"Flats": {"units": 40, "rental_price": 2200, "dev_cost": 280000, "opex_per_unit": 5000,
+                                  "absorption_rate": 0.25}},
+        "commercial": {"Retail": {"sqft": 8000, "rental_price": 2.5, "dev_cost": 180, "absorption_rate": 0.2}},
+    }]
+    path = tmp_path / "portfolio.json"
+    path.write_text(json.dumps(nested))
+    residential, commercial, mixed_use = load_portfolio(str(path))
+    assert residential["Detached"]["units"] == 100
+    assert list(mixed_use) == ["Hub"]
+
+def test_category_land_cost_is_recorded_once_and_conflicts_rejected(tmp_path, capsys):
+    import pandas as pd
+    rows = [dict(row, **{"acq cost": 1.5e6}) for row in ROWS[:3]]
+    rows[1]["acq cost"] = 8e5
+    rows.append(dict(ROWS[0], product="Cottage", **{"acq cost": 2e6}))
+    path = tmp_path / "portfolio.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    land_costs = {}
+    residential, commercial, _ = load_portfolio(str(path), land_costs=land_costs)
+    assert land_costs == {"Residential": 1.5e6, "Commercial": 8e5}
+    assert set(residential) == {"Detached", "Attached"} and set(commercial) == {"Office"}
+    assert "land_cost differs from the category's land cost: 1" in capsys.readouterr().out
@@ -0,0 +1,48 @@
+import json
+import pytest
+import inputs
+from main import portfolio_inputs, residential_model, commercial_model
+from results import ResultStore, RESIDENTIAL_COLUMNS, COMMERCIAL_COLUMNS
+from rollup import portfolio_rollup
+
+ENTRIES = [
+    {"category": "Residential", "product": product, "acq cost": 1500000, "units": units, "rental_price": rent,
+     "dev_cost": dev_cost, "opex_per_unit": 5000, "product_type": product.lower(), "absorption_rate": rate}
+    for product, units, rent, dev_cost, rate in [("Detached", 150, 3250, 450000, 0.15),
+                                                 ("Attached", 150, 2625, 350000, 0.20),
+                                                 ("Multi-Family", 150, 1925, 190000, 0.25)]
+] + [
+    {"category": "Commercial", "product": "Office", "acq cost": 826829, "sqft": 50000, "rental_price": 2.5,
+     "dev_cost": 300, "opex_per_sqft": 6, "product_type": "office", "absorption_rate": 0.25},
+    {"category": "Commercial", "product": "Retail", "acq cost": 826829, "sqft": 30000, "rental_price": 2.2,
+     "dev_cost": 250, "opex_per_sqft": 6, "product_type": "retail", "absorption_rate": 0.25},
+]
+
+def run(residential, commercial, land_costs):
+    res_store = ResultStore(residential.keys(), 20, RESIDENTIAL_COLUMNS, int_columns=["Units"])
+    residential_model(residential, 0, 200, "80302", store=res_store)
+    com_store = ResultStore(commercial.keys(), 20, COMMERCIAL_COLUMNS, int_columns=["SqFt_Planned"])
+    commercial_model(commercial, store=com_store)
+    return portfolio_rollup([("Residential", residential, res_store.cashflows, land_costs.get("Residential")),
+                             ("Commercial", commercial, com_store.cashflows, land_costs.get("Commercial"))])
+
+def write(path, suffix):
+    path = path.with_suffix(suffix)
+    text = json.dumps(ENTRIES) if suffix == ".json" else "\n".join(map(json.dumps, ENTRIES))
+    path.write_text(text)
+    return str(path)
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_file_and_interactive_runs_charge_the_same_land(tmp_path, monkeypatch, suffix):
+    monkeypatch.setattr(inputs, "get_user_inputs", lambda: [dict(entry) for entry in ENTRIES])
+    interactive = portfolio_inputs()
+    from_file = portfolio_inputs(write(tmp_path / "portfolio", suffix))
+    assert interactive[3] == from_file[3] == {"Residential": 1500000, "Commercial": 826829}
+
+    expected = run(interactive[0], interactive[1], interactive[3])
+    rolled = run(from_file[0], from_file[1], from_file[3])
+    for path in [(), ("Residential",), ("Commercial",)]:
+        row = rolled["index"][path]
+        assert rolled["acquisition_cost"][row] == expected["acquisition_cost"][expected["index"][path]]
+        assert rolled["irr"][row] == pytest.approx(expected["irr"][expected["index"][path]], abs=1e-12)
+    assert rolled["acquisition_cost"][rolled["index"][("Residential",)]] == 1500000
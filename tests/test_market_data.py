@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+import main
+import market_data
+from market_data import (DEFAULT_AVERAGE_SQFT, FALLBACK_AVERAGE_SQFT, FIELDS, MarketData, bulk_average_sqft,
+                         compile_market_data, fetch_average_sqft, load_market_data, zip_index)
+
+SOURCE = """zip_code,product_type,avg_sqft,rental_price,dev_cost,opex
+02134,Detached,1850,3400,460000,5200
+02134,Townhouse,1400,2800,,5000
+90210,multi family,900,4100,520000,
+00501,Retail,12000,35,150,6
+"""
+
+@pytest.fixture
+def compiled(tmp_path):
+    source = tmp_path / "market.csv"
+    source.write_text(SOURCE)
+    path = str(tmp_path / "market.bin")
+    assert compile_market_data(str(source), path) == 4
+    return MarketData(path)
+
+def test_compiled_file_is_memory_mapped(compiled):
+    assert len(compiled) == 4
+    assert compiled.fields == FIELDS
+    assert compiled.product_types == ["attached", "detached", "multi-family", "retail"]
+    assert isinstance(compiled.index, np.memmap) and isinstance(compiled.records, np.memmap)
+    assert not compiled.records.flags.writeable
+
+def test_lookup_by_zip_and_type(compiled):
+    assert compiled.lookup("02134", "detached") == {"avg_sqft": 1850.0, "rental_price": 3400.0,
+                                                   "dev_cost": 460000.0, "opex": 5200.0}
+    # Integer ZIPs are zero-padded and ZIP+4 is accepted
+    assert compiled.lookup(501, "retail")["avg_sqft"] == 12000.0
+    assert compiled.lookup("02134-1234", "Detached")["rental_price"] == 3400.0
+    # Blank source cells come back as NaN
+    assert np.isnan(compiled.lookup("02134", "attached")["dev_cost"])
+    assert compiled.lookup("02134", "multi-family") is None
+    assert compiled.lookup("99999", "detached") is None
+    assert compiled.lookup("not-a-zip", "detached") is None
+    assert compiled.lookup("02134", "castle") is None
+
+def test_product_type_aliases(compiled):
+    assert compiled.lookup("02134", "Townhome")["avg_sqft"] == compiled.lookup("02134", "attached")["avg_sqft"] == 1400.0
+    assert compiled.lookup("90210", "Multifamily")["avg_sqft"] == 900.0
+    assert zip_index("2134") == -1 and zip_index(2134) == 2134
+
+def test_bulk_lookup_matches_scalar_lookups(compiled):
+    zips = np.array(["02134", "02134", "90210", "00501", "12345", "02134"])
+    types = np.array(["detached", "townhouse", "multi-family", "retail", "detached", "castle"])
+    out = compiled.bulk_lookup(zips, types)
+    for i, (zip_code, product_type) in enumerate(zip(zips, types)):
+        entry = compiled.lookup(zip_code, product_type)
+        for field in FIELDS:
+            expected = np.nan if entry is None else entry[field]
+            np.testing.assert_equal(out[field][i], expected)
+    np.testing.assert_equal(compiled.bulk_lookup(zips, types, "avg_sqft"), out["avg_sqft"])
+    # Integer ZIPs broadcast against a single product type
+    np.testing.assert_equal(compiled.bulk_lookup(np.array([2134, 90210, 100000]), "detached", "avg_sqft"),
+                            [1850.0, np.nan, np.nan])
+
+def test_unknown_zip_falls_back_to_defaults(compiled):
+    assert fetch_average_sqft("02134", "detached", compiled) == 1850.0
+    assert fetch_average_sqft("12345", "detached", compiled) == DEFAULT_AVERAGE_SQFT["detached"]
+    assert fetch_average_sqft("12345", "townhome", compiled) == DEFAULT_AVERAGE_SQFT["attached"]
+    assert fetch_average_sqft("12345", "retail", compiled) == FALLBACK_AVERAGE_SQFT
+    np.testing.assert_equal(
+        bulk_average_sqft(["02134", "12345", "90210", "00501"], ["detached", "detached", "multifamily", "castle"],
+                          compiled),
+        [1850.0, DEFAULT_AVERAGE_SQFT["detached"], 900.0, FALLBACK_AVERAGE_SQFT])
+
+def test_without_a_compiled_file_everything_uses_defaults(tmp_path, monkeypatch):
+    missing = str(tmp_path / "missing.bin")
+    monkeypatch.setattr(market_data, "DEFAULT_MARKET_DATA_PATH", missing)
+    monkeypatch.setattr(market_data, "_MARKET_DATA", {})
+    assert load_market_data() is None
+    assert fetch_average_sqft("02134", "detached") == DEFAULT_AVERAGE_SQFT["detached"]
+    assert main.fetch_average_sqft("02134", "multi family") == DEFAULT_AVERAGE_SQFT["multi-family"]
+    np.testing.assert_equal(bulk_average_sqft(["02134", "90210"], "attached"), [DEFAULT_AVERAGE_SQFT["attached"]] * 2)
+
+def test_main_wrapper_reads_the_default_dataset(compiled, monkeypatch):
+    monkeypatch.setattr(market_data, "_MARKET_DATA", {market_data.DEFAULT_MARKET_DATA_PATH: compiled})
+    assert main.fetch_average_sqft("02134", "Detached") == 1850.0
+
+def test_compile_rejects_bad_rows(tmp_path):
+    source = tmp_path / "bad.csv"
+    for body, message in [("zip_code,avg_sqft\n02134,1000\n", "missing column"),
+                          ("zip_code,product_type\n2134,detached\n", "5-digit"),
+                          ("zip_code,product_type\n02134,detached\n02134,Detached\n", "duplicate"),
+                          ("zip_code,product_type,avg_sqft\n02134,detached,big\n", "numeric")]:
+        source.write_text(body)
+        with pytest.raises(ValueError, match=message):
+            compile_market_data(str(source), str(tmp_path / "bad.bin"))
+
+def test_empty_dataset_loads(tmp_path):
+    source = tmp_path / "empty.csv"
+    source.write_text("zip_code,product_type\n")
+    path = str(tmp_path / "empty.bin")
+    assert compile_market_data(str(source), path) == 0
+    data = MarketData(path)
+    assert len(data) == 0 and data.lookup("02134", "detached") is None
+    assert np.isnan(data.bulk_lookup(["02134"], ["detached"], "avg_sqft")).all()
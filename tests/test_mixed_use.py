@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from engine import mixed_use_cashflows
+from growth_helpers import (cap_net_occupancy, net_occupancy, net_sqft_occupancy, phase_absorption,
+                            phase_sqft_absorption, DEFAULT_CHURN_RATE, DEFAULT_REABSORPTION_RATE,
+                            DEFAULT_EARLY_OCCUPANCY_RATE)
+
+def reference_project(vals, dev_cost_per_sqft_com, years):
+    # Component-by-component loop as mixed_use_model ran before the batched engine
+    res_spec, com_spec = vals.get("residential") or {}, vals.get("commercial") or {}
+    residential = [res_spec] if "units" in res_spec else list(res_spec.values())
+    commercial = [com_spec] if "sqft" in com_spec else list(com_spec.values())
+    revenue, opex, dev_cost = np.zeros(years), np.zeros(years), 0.0
+    for res in residential:
+        if res.get("units", 0) <= 0:
+            continue
+        units = res["units"]
+        occupied = cap_net_occupancy(net_occupancy(phase_absorption(units, res.get("absorption_rate", 0.25), years),
+                                                   DEFAULT_CHURN_RATE, DEFAULT_REABSORPTION_RATE,
+                                                   DEFAULT_EARLY_OCCUPANCY_RATE), units)
+        revenue += [u * res["rental_price"] * 12 for u in occupied]
+        opex += [u * res.get("opex_per_unit", 5000) for u in occupied]
+        dev_cost += units * res["dev_cost"]
+    for com in commercial:
+        sqft = com.get("sqft", 0)
+        if sqft <= 0:
+            continue
+        absorbed = phase_sqft_absorption(sqft, com.get("absorption_rate", 0.25), years)
+        leased = cap_net_occupancy(net_sqft_occupancy(
+            absorbed, sqft, com.get("churn_rate", DEFAULT_CHURN_RATE),
+            com.get("reabsorption_rate", DEFAULT_REABSORPTION_RATE),
+            com.get("early_occupancy_rate", DEFAULT_EARLY_OCCUPANCY_RATE)), sqft)
+        revenue += [sf * com.get("rental_price", 0) * 12 for sf in leased]
+        opex += [a * com.get("opex_per_sqft", 6.0) for a in absorbed]
+        dev_cost += sqft * com.get("dev_cost", dev_cost_per_sqft_com)
+    noi = revenue - opex
+    return revenue, opex, np.concatenate([[-(vals.get("acq_cost", 0) + dev_cost)], noi])
+
+def random_projects(seed, n):
+    rng = np.random.default_rng(seed)
+
+    def residential():
+        return {"units": int(rng.integers(0, 300)), "rental_price": float(rng.uniform(1500, 4000)),
+                "dev_cost": float(rng.uniform(1.5e5, 4e5)), "opex_per_unit": float(rng.uniform(3000, 7000)),
+                "absorption_rate": float(rng.choice([0.1, 0.2, 0.25, 0.33]))}
+
+    def commercial():
+        com = {"sqft": int(rng.integers(0, 80000)), "rental_price": float(rng.uniform(1, 5)),
+               "absorption_rate": float(rng.choice([0.1, 0.2, 0.25]))}
+        if rng.random() < 0.5:
+            com["dev_cost"] = float(rng.uniform(100, 300))
+        if rng.random() < 0.5:
+            com.update(churn_rate=round(float(rng.uniform(0, 0.4)), 3),
+                       early_occupancy_rate=round(float(rng.uniform(0, 0.4)), 3))
+        return com
+
+    projects = {}
+    for i in range(n):
+        res = residential() if i % 3 else {f"R{j}": residential() for j in range(int(rng.integers(1, 4)))}
+        com = commercial() if i % 4 == 0 else {f"C{j}": commercial() for j in range(int(rng.integers(0, 4)))}
+        projects[f"Project {i}"] = {"acq_cost": float(rng.uniform(0, 5e6)), "residential": res, "commercial": com}
+    return projects
+
+@pytest.mark.parametrize("seed", range(3))
+def test_mixed_use_cashflows_match_component_loop(seed):
+    projects = random_projects(seed, 60)
+    flows = mixed_use_cashflows(projects, 150, 20, cache=None)
+    for row, vals in enumerate(projects.values()):
+        revenue, opex, cashflows = reference_project(vals, 150, 20)
+        np.testing.assert_allclose(flows["revenue"][row], revenue, rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(flows["opex"][row], opex, rtol=1e-12, atol=1e-6)
+        np.testing.assert_allclose(flows["cashflows"][row], cashflows, rtol=1e-12, atol=1e-6)
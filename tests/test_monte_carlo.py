@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from monte_carlo import (DEFAULT_DISTRIBUTIONS, StreamingHistogram, chunk_rng, evaluate_draws, run_monte_carlo,
+                         sample_deal_inputs)
+
+RESIDENTIAL = {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15}
+COMMERCIAL = {"sqft": 50000, "rental_price": 2.5, "dev_cost": 150, "opex_per_sqft": 6, "absorption_rate": 0.25}
+# Cheap to build, so most draws return well over 100%
+HIGH_IRR = dict(COMMERCIAL, dev_cost=3)
+
+def raw_irr(deal, category, draws, chunk_size, seed):
+    return np.concatenate([
+        evaluate_draws(deal, category, sample_deal_inputs(deal, DEFAULT_DISTRIBUTIONS, min(chunk_size, draws - start),
+                                                          chunk_rng(seed, i)))["irr"]
+        for i, start in enumerate(range(0, draws, chunk_size))])
+
+@pytest.mark.parametrize("deal, category", [(RESIDENTIAL, "residential"), (COMMERCIAL, "commercial")])
+def test_parallel_run_matches_serial(deal, category):
+    serial = run_monte_carlo(deal, category, draws=3000, chunk_size=700, seed=11)
+    parallel = run_monte_carlo(deal, category, draws=3000, chunk_size=700, seed=11, workers=2)
+    for metric in ("irr", "equity_multiple", "break_even_year"):
+        assert serial[metric] == parallel[metric]
+        np.testing.assert_array_equal(serial["histograms"][metric].counts, parallel["histograms"][metric].counts)
+    assert serial["irr"]["count"] + serial["irr"]["not_calculable"] == 3000
+
+def test_quantiles_above_100_percent_are_not_clipped():
+    report = run_monte_carlo(HIGH_IRR, "commercial", draws=2000, chunk_size=500, seed=3)
+    irr = raw_irr(HIGH_IRR, "commercial", 2000, 500, 3)
+    irr = irr[np.isfinite(irr)]
+    assert np.median(irr) > 1.5
+    for q in (0.25, 0.5, 0.75, 0.95):
+        assert report["irr"][f"p{round(q * 100)}"] == pytest.approx(np.quantile(irr, q), abs=0.01)
+    assert report["irr"]["out_of_range"] == 0
+
+def test_overflow_share_is_reported_and_interpolated():
+    hist = StreamingHistogram(np.linspace(0.0, 1.0, 11)).update([0.05, 0.5, 0.95, 2.0, 3.0, -1.0, np.nan])
+    assert hist.count == 6 and hist.missing == 1
+    assert hist.summary()["out_of_range"] == pytest.approx(0.5)
+    assert 1.0 <= hist.quantile(0.9) <= 3.0
+    assert -1.0 <= hist.quantile(0.1) <= 0.0
+    assert hist.quantile(1.0) == 3.0 and hist.quantile(0.0) == -1.0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from engine import mixed_use_cashflows, product_cashflows
+from finance import batch_irr, batch_xirr
+from monthly import mixed_use_monthly, month_dates, product_monthly, to_annual
+
+RESIDENTIAL = {
+    "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15},
+    "Attached": {"units": 121, "rental_price": 2625.35, "dev_cost": 350000, "opex_per_unit": 5000, "absorption_rate": 0.20},
+}
+COMMERCIAL = {
+    "Office": {"sqft": 51235, "rental_price": 2.515, "dev_cost": 150, "opex_per_sqft": 6, "absorption_rate": 0.25},
+    "Retail": {"sqft": 30007, "rental_price": 2.205, "dev_cost": 120, "opex_per_sqft": 5.5, "absorption_rate": 0.33},
+}
+PROJECT = {"Hub": {"acq_cost": 1e6, "residential": {"Flats": dict(RESIDENTIAL["Attached"])},
+                   "commercial": {"Retail": dict(COMMERCIAL["Retail"])}}}
+
+def test_xirr_zeroes_npv_on_irregular_dates():
+    rng = np.random.default_rng(5)
+    days = np.sort(rng.choice(np.arange(1, 3000), 14, replace=False))
+    dates = np.datetime64("2024-01-15") + np.r_[0, days]
+    cashflows = np.hstack([-rng.uniform(5e5, 1e6, (20, 1)), rng.uniform(0, 2e5, (20, 14))])
+    rates = batch_xirr(cashflows, dates)
+    assert np.isfinite(rates).all()
+    years = np.r_[0, days] / 365.0
+    npv = (cashflows / (1 + rates[:, None]) ** years).sum(axis=1)
+    np.testing.assert_allclose(npv, 0, atol=1e-4)
+
+def test_xirr_on_365_day_periods_equals_irr():
+    cashflows = product_cashflows(RESIDENTIAL, "residential")["cashflows"]
+    dates = np.datetime64("2023-01-01") + 365 * np.arange(cashflows.shape[1])
+    np.testing.assert_allclose(batch_xirr(cashflows, dates), batch_irr(cashflows), atol=1e-9)
+
+@pytest.mark.parametrize("lease_up", ["flat", "linear"])
+@pytest.mark.parametrize("category, products", [("residential", RESIDENTIAL), ("commercial", COMMERCIAL)])
+def test_to_annual_reproduces_annual_engine(category, products, lease_up):
+    monthly = product_monthly(products, category, lease_up=lease_up)
+    expected = product_cashflows(products, category)
+    annual = to_annual(monthly)
+    for key in ("occupancy", "revenue", "opex", "noi", "cashflows"):
+        np.testing.assert_array_equal(annual[key], expected[key])
+    # The months themselves add up to the yearly flows
+    months = monthly["revenue"].reshape(len(products), -1, 12).sum(axis=2)
+    np.testing.assert_allclose(months, expected["revenue"], rtol=1e-12)
+
+@pytest.mark.parametrize("lease_up", ["flat", "linear"])
+def test_mixed_use_to_annual_reproduces_annual_engine(lease_up):
+    monthly = mixed_use_monthly(PROJECT, 150, lease_up=lease_up)
+    np.testing.assert_array_equal(to_annual(monthly)["cashflows"], mixed_use_cashflows(PROJECT, 150)["cashflows"])
+    assert monthly["cashflows"].shape == (1, 12 * 20 + 1)
+
+def test_round_revenue_rounds_half_cents_like_builtin_round():
+    ties = [0.005, 0.075, 0.215, 1.055, 2.675, 1234.565]
+    revenue = np.zeros((len(ties), 12))
+    revenue[:, 0] = ties
+    monthly = {"revenue": revenue, "opex": np.zeros_like(revenue), "cashflows": np.zeros((len(ties), 13))}
+    annual = to_annual(monthly, round_revenue=True)
+    assert annual["revenue"][:, 0].tolist() == [round(value, 2) for value in ties]
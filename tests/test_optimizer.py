@@ -0,0 +1,54 @@
+import itertools
+import numpy as np
+import pytest
+from optimizer import MixEvaluator, optimize_mix
+
+CANDIDATES = {
+    "Detached": {"category": "Residential", "rental_price": 3200, "dev_cost": 15000, "opex_per_unit": 5000,
+                 "absorption_rate": 0.2, "max": 200, "step": 50},
+    "Multi-Family": {"category": "Residential", "rental_price": 1900, "dev_cost": 9000, "opex_per_unit": 5000,
+                     "absorption_rate": 0.25, "max": 200, "step": 50},
+    "Office": {"category": "Commercial", "rental_price": 3.5, "dev_cost": 8, "opex_per_sqft": 6.0,
+               "absorption_rate": 0.25, "max": 40_000, "step": 10_000},
+}
+CONSTRAINTS = {"dev_budget": 3_500_000, "max_acres": 30, "land_cost_per_acre": 20_000}
+
+def brute_force(objective, **constraints):
+    evaluator = MixEvaluator(CANDIDATES, **constraints)
+    axes = [np.arange(0, vals["max"] + 1, vals["step"]) for vals in CANDIDATES.values()]
+    grid = np.array(list(itertools.product(*axes)), dtype=float)
+    result = evaluator.evaluate(grid)
+    score = np.where(result["feasible"] & np.isfinite(result[objective]), result[objective], -np.inf)
+    return grid[np.argmax(score)], score.max()
+
+@pytest.mark.parametrize("objective", ["npv", "irr"])
+def test_finds_brute_force_optimum(objective):
+    expected, score = brute_force(objective, **CONSTRAINTS)
+    best = optimize_mix(CANDIDATES, objective, samples=500, rounds=20, seed=1, **CONSTRAINTS)
+    assert best[objective] == pytest.approx(score)
+    if objective == "npv":
+        # IRR is nearly scale-free, so only the NPV optimum is a unique mix
+        assert list(best["mix"].values()) == expected.astype(int).tolist()
+    # Seeded runs repeat exactly
+    assert optimize_mix(CANDIDATES, objective, samples=500, rounds=20, seed=1, **CONSTRAINTS)["mix"] == best["mix"]
+
+def test_bounds_and_constraints_hold():
+    candidates = {name: dict(vals, min=vals["step"]) for name, vals in CANDIDATES.items()}
+    constraints = dict(CONSTRAINTS, dev_budget=40_000_000, acq_budget=6_000_000, min_share={"Commercial": 0.2})
+    best = optimize_mix(candidates, "npv", samples=300, rounds=10, seed=2, **constraints)
+    assert best is not None
+    mix = np.array(list(best["mix"].values()), dtype=float)
+    for quantity, vals in zip(mix, candidates.values()):
+        assert vals["min"] <= quantity <= vals["max"] and quantity % vals["step"] == 0
+    assert best["dev_cost"] <= 40_000_000 and best["acq_cost"] <= 6_000_000 and best["acres"] <= 30
+    assert candidates["Office"]["dev_cost"] * best["mix"]["Office"] >= 0.2 * best["dev_cost"]
+    assert set(best["residential"]) == {"Detached", "Multi-Family"} and set(best["commercial"]) == {"Office"}
+
+    # Repair always lands inside the bounds and budgets, whatever it is given
+    evaluator = MixEvaluator(candidates, **{k: v for k, v in constraints.items() if k != "min_share"})
+    repaired = evaluator.repair(np.random.default_rng(0).normal(0, 1e5, (500, 3)))
+    result = evaluator.evaluate(repaired)
+    assert result["feasible"].all()
+
+def test_infeasible_problem_returns_none():
+    assert optimize_mix(CANDIDATES, "npv", dev_budget=1, samples=50, rounds=3) is None
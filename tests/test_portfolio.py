@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from engine import product_cashflows
+from finance import batch_metrics
+from portfolio import Portfolio
+
+PRODUCTS = {
+    "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15},
+    "Attached": {"units": 150, "rental_price": 2625, "dev_cost": 350000, "opex_per_unit": 5000, "absorption_rate": 0.20},
+    "Multi-Family": {"units": 150, "rental_price": 1925, "dev_cost": 190000, "opex_per_unit": 5000, "absorption_rate": 0.25},
+}
+EXTRA = {"units": 60, "rental_price": 2100, "dev_cost": 250000, "opex_per_unit": 4500, "absorption_rate": 0.3}
+
+def assert_matches_fresh_run(portfolio, acq_cost=1.5e6):
+    cashflows = product_cashflows(portfolio.products, "residential")["cashflows"]
+    expected = cashflows.sum(axis=0)
+    expected[0] -= acq_cost
+    np.testing.assert_allclose(portfolio.portfolio_cashflows(), expected, rtol=1e-12)
+    metrics = batch_metrics(cashflows)
+    np.testing.assert_allclose(portfolio.irr, metrics["irr"], rtol=1e-9)
+    assert portfolio.names == list(portfolio.products)
+    assert not portfolio._dirty
+
+def test_update_and_add_match_fresh_run():
+    portfolio = Portfolio(PRODUCTS, "residential", acq_cost=1.5e6)
+    portfolio.update_product("Attached", rental_price=2900)
+    portfolio.add_product("Cottage", EXTRA)
+    assert sorted(portfolio.recompute()) == ["Attached", "Cottage"]
+    assert_matches_fresh_run(portfolio)
+
+def test_add_then_remove_without_recompute():
+    portfolio = Portfolio(PRODUCTS, "residential", acq_cost=1.5e6)
+    portfolio.add_product("Cottage", EXTRA)
+    portfolio.remove_product("Cottage")
+    assert "Cottage" not in portfolio.products
+    assert_matches_fresh_run(portfolio)
+
+def test_update_then_remove_without_recompute():
+    portfolio = Portfolio(PRODUCTS, "residential", acq_cost=1.5e6)
+    portfolio.update_product("Attached", rental_price=2900)
+    portfolio.update_product("Detached", units=200)
+    portfolio.remove_product("Attached")
+    assert portfolio.recompute() == ["Detached"]
+    assert_matches_fresh_run(portfolio)
+
+def test_remove_unknown_product_leaves_portfolio_intact():
+    portfolio = Portfolio(PRODUCTS, "residential", acq_cost=1.5e6)
+    with pytest.raises(KeyError):
+        portfolio.remove_product("Missing")
+    assert_matches_fresh_run(portfolio)
+
+def test_add_existing_product_is_rejected():
+    portfolio = Portfolio(PRODUCTS, "residential", acq_cost=1.5e6)
+    with pytest.raises(ValueError):
+        portfolio.add_product("Detached", EXTRA)
+    assert portfolio.products["Detached"] == PRODUCTS["Detached"]
+    assert_matches_fresh_run(portfolio)
+
+def test_add_remove_and_add_again():
+    portfolio = Portfolio(PRODUCTS, "residential", acq_cost=1.5e6)
+    portfolio.add_product("Cottage", EXTRA)
+    portfolio.portfolio_cashflows()
+    portfolio.remove_product("Cottage")
+    portfolio.add_product("Cottage", dict(EXTRA, rental_price=2400))
+    assert portfolio.names[-1] == "Cottage" and len(portfolio) == 4
+    assert_matches_fresh_run(portfolio)
+    portfolio.remove_product("Detached")
+    portfolio.add_product("Detached", PRODUCTS["Detached"])
+    assert_matches_fresh_run(portfolio)
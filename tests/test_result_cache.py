@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+import result_cache
+from result_cache import ResultCache, compute_product_results, product_results
+
+PRODUCTS = {
+    "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15},
+    "Attached": {"units": 150, "rental_price": 2625, "dev_cost": 350000, "opex_per_unit": 5000, "absorption_rate": 0.20},
+}
+
+def products(n, offset=0):
+    return {f"P{i}": dict(PRODUCTS["Detached"], rental_price=3000.0 + offset + i) for i in range(n)}
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResultCache(str(tmp_path / "cache.sqlite")) as cache:
+        yield cache
+
+def test_keys_ignore_field_order_names_and_int_float_spelling(cache):
+    reordered = {"Renamed": dict(reversed(list(PRODUCTS["Detached"].items()))),
+                 "Attached": {k: float(v) for k, v in PRODUCTS["Attached"].items()}}
+    assert cache.keys(PRODUCTS, "residential") == cache.keys(reordered, "Residential")
+
+def test_keys_change_with_inputs_category_horizon_and_model_version(cache, monkeypatch):
+    base = cache.keys(PRODUCTS, "residential")
+    nudged = {name: dict(vals) for name, vals in PRODUCTS.items()}
+    nudged["Detached"]["rental_price"] = 3250.000001
+    assert cache.keys(nudged, "residential")[0] != base[0] and cache.keys(nudged, "residential")[1] == base[1]
+    assert cache.keys(PRODUCTS, "residential", years=25) != base
+    monkeypatch.setattr(result_cache, "MODEL_VERSION", result_cache.MODEL_VERSION + 1)
+    assert not set(cache.keys(PRODUCTS, "residential")) & set(base)
+
+def test_hits_match_fresh_results_and_changed_input_misses(cache):
+    first = cache.product_results(PRODUCTS, "residential")
+    assert (cache.hits, cache.misses) == (0, 2)
+    again = cache.product_results(PRODUCTS, "residential")
+    assert (cache.hits, cache.misses) == (2, 2)
+    fresh = compute_product_results(PRODUCTS, "residential")
+    for field, values in fresh.items():
+        np.testing.assert_array_equal(again[field], values)
+        np.testing.assert_array_equal(first[field], values)
+
+    changed = {name: dict(vals) for name, vals in PRODUCTS.items()}
+    changed["Attached"]["dev_cost"] = 360000
+    results = cache.product_results(changed, "residential")
+    assert (cache.hits, cache.misses) == (3, 3)
+    np.testing.assert_array_equal(results["cashflows"], compute_product_results(changed, "residential")["cashflows"])
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    entry = (len(result_cache.RESULT_FIELDS) + 21) * 8 + 20
+    with ResultCache(str(tmp_path / "cache.sqlite"), max_bytes=10 * entry) as cache:
+        old, new = products(6), products(6, offset=100)
+        cache.product_results(old, "residential")
+        cache._db.execute("UPDATE results SET last_used = last_used - 10")
+        cache.product_results(new, "residential")
+        # 12 entries overflow the 10-entry budget, which is trimmed to 9 by dropping the oldest
+        assert cache.stats()["entries"] == 9 and cache.evictions == 3
+        cache.hits = cache.misses = 0
+        cache.product_results(new, "residential")
+        assert cache.misses == 0
+        cache.product_results(old, "residential")
+        assert (cache.hits, cache.misses) == (9, 3)
+
+def test_disabled_cache_bypasses_storage(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ResultCache(str(path), enabled=False)
+    results = product_results(PRODUCTS, "residential", cache=cache)
+    np.testing.assert_array_equal(results["irr"], compute_product_results(PRODUCTS, "residential")["irr"])
+    assert not path.exists() and cache.stats()["entries"] == 0 and cache.hits == cache.misses == 0
+
+@pytest.mark.parametrize("flags, cached", [([], True), (["--no-cache"], False)])
+def test_main_no_cache_flag(tmp_path, flags, cached):
+    portfolio = tmp_path / "portfolio.csv"
+    pd.DataFrame([dict(vals, category="Residential", product=name) for name, vals in PRODUCTS.items()]).to_csv(
+        portfolio, index=False)
+    main = os.path.join(os.path.dirname(result_cache.__file__), "main.py")
+    subprocess.run([sys.executable, main, str(portfolio), *flags], cwd=tmp_path, check=True, capture_output=True)
+    assert (tmp_path / result_cache.DEFAULT_CACHE_PATH).exists() == cached
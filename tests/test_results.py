@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from finance import calculate_equity_multiple, calculate_irr, find_break_even_year
+from growth_helpers import (cap_net_occupancy, net_occupancy, phase_absorption, DEFAULT_CHURN_RATE,
+                            DEFAULT_REABSORPTION_RATE, DEFAULT_EARLY_OCCUPANCY_RATE)
+from main import residential_model
+from results import ResultStore, RESIDENTIAL_COLUMNS, MIXED_USE_COLUMNS
+
+PRODUCTS = {
+    "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15},
+    "Attached": {"units": 90, "rental_price": 2625, "dev_cost": 350000, "opex_per_unit": 5000, "absorption_rate": 0.20},
+    "Vacant": {"units": 40, "rental_price": 0, "dev_cost": 200000, "opex_per_unit": 5000, "absorption_rate": 0.25},
+}
+
+def reference_rows(products, years=20):
+    # The per-product dicts residential_model built before the columnar store
+    rows, flows = [], []
+    for name, vals in products.items():
+        occupied = cap_net_occupancy(net_occupancy(phase_absorption(vals["units"], vals["absorption_rate"], years),
+                                                   DEFAULT_CHURN_RATE, DEFAULT_REABSORPTION_RATE,
+                                                   DEFAULT_EARLY_OCCUPANCY_RATE), vals["units"])
+        revenue = [units * vals["rental_price"] * 12 for units in occupied]
+        opex = [vals["opex_per_unit"] * units for units in occupied]
+        cashflows = [-vals["units"] * vals["dev_cost"]] + [r - o for r, o in zip(revenue, opex)]
+        rows.append({"Product": name, "Units": vals["units"], "Total_Revenue": sum(revenue), "Acquisition_Cost": 0,
+                     "Development_Cost": vals["units"] * vals["dev_cost"], "Total_OpEx": sum(opex),
+                     "NOI": sum(revenue) - sum(opex), "IRR": calculate_irr(cashflows),
+                     "Equity_Multiple": calculate_equity_multiple(cashflows),
+                     "Break_Even_Year": find_break_even_year(cashflows)})
+        flows.append(cashflows)
+    return rows, np.array(flows, dtype=float)
+
+def test_model_rows_match_the_old_result_dicts():
+    store = ResultStore(PRODUCTS.keys(), 20, RESIDENTIAL_COLUMNS, int_columns=["Units"])
+    residential_model(PRODUCTS, 0, 200, "80302", store=store)
+    expected, flows = reference_rows(PRODUCTS)
+    for i, row in enumerate(expected):
+        assert store.row(i) == pytest.approx(row, rel=1e-12)
+    assert store.row(2)["IRR"] is None and type(store.row(0)["Units"]) is int
+    np.testing.assert_allclose(store.cashflows, flows, rtol=1e-12)
+
+def test_append_round_trips_rows_and_grows_past_capacity():
+    expected, flows = reference_rows(PRODUCTS)
+    store = ResultStore([], 20, RESIDENTIAL_COLUMNS, int_columns=["Units"], capacity=2)
+    assert len(store) == 0 and store.capacity == 2
+    buffer = store._cashflow_buffer
+    for row, cashflows in zip(expected * 7, np.tile(flows, (7, 1))):
+        store.append(row, cashflows)
+    assert len(store) == 21 and store.capacity >= 21 and store._cashflow_buffer is not buffer
+    assert store.products == [row["Product"] for row in expected] * 7
+    for i in range(len(store)):
+        assert store.row(i) == expected[i % 3]
+    np.testing.assert_array_equal(store.cashflows, np.tile(flows, (7, 1)))
+    assert store["Units"].dtype == np.int64 and np.isnan(store["IRR"][2])
+    frame = store.to_frame()
+    assert len(frame) == 21 and np.shares_memory(frame["NOI"].to_numpy(), store["NOI"])
+
+def test_append_fills_missing_columns_and_rejects_unknown_ones():
+    store = ResultStore(["A"], 5, MIXED_USE_COLUMNS, labels={"Category": "Mixed-Use"})
+    store["NOI"] = 10.0
+    assert store.append({"Product": "B", "Category": "Mixed-Use", "NOI": 5.0}) == 1
+    assert store.row(0)["NOI"] == 10.0 and store.row(1) == dict(
+        {column: None for column in MIXED_USE_COLUMNS}, Product="B", Category="Mixed-Use", NOI=5.0)
+    np.testing.assert_array_equal(store.cashflows[1], np.zeros(6))
+    with pytest.raises(ValueError, match="Cap_Rate"):
+        store.append({"Product": "C", "Cap_Rate": 0.05})
+    assert len(store) == 2
+
+def test_append_copies_a_store_backed_by_outside_arrays():
+    outside = np.arange(12.0).reshape(2, 6)
+    store = ResultStore(["A", "B"], 5, ["NOI"], capacity=8)
+    store.cashflows = outside
+    store.columns = {"NOI": np.array([1.0, 2.0])}
+    store.append({"Product": "C", "NOI": 3.0}, np.ones(6))
+    np.testing.assert_array_equal(store.cashflows, np.vstack([outside, np.ones(6)]))
+    np.testing.assert_array_equal(store["NOI"], [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(outside, np.arange(12.0).reshape(2, 6))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from finance import batch_metrics
+from rollup import PORTFOLIO_LEVELS, portfolio_rollup, rollup
+
+def deals(n, acq_cost, seed=0):
+    rng = np.random.default_rng(seed)
+    products = {f"Deal {i}": {"acq_cost": acq_cost, "product_type": rng.choice(["detached", "attached"])}
+                for i in range(n)}
+    cashflows = np.hstack([-rng.uniform(1e6, 5e6, (n, 1)), rng.uniform(1e5, 6e5, (n, 20))])
+    return products, cashflows
+
+def test_equal_per_deal_costs_are_charged_per_deal():
+    products, cashflows = deals(3000, 1e6)
+    rolled = portfolio_rollup([("Residential", products, cashflows, None)])
+    assert rolled["acquisition_cost"][rolled["index"][()]] == pytest.approx(3000 * 1e6)
+    products["Deal 0"]["acq_cost"] = 2e6
+    rolled = portfolio_rollup([("Residential", products, cashflows, None)])
+    assert rolled["acquisition_cost"][rolled["index"][()]] == pytest.approx(3001 * 1e6)
+
+def test_category_land_cost_is_charged_once():
+    products, cashflows = deals(50, 1e6)
+    rolled = portfolio_rollup([("Residential", products, cashflows, 1.5e6)])
+    category = rolled["index"][("Residential",)]
+    assert rolled["acquisition_cost"][category] == 1.5e6
+    expected = cashflows.sum(axis=0)
+    expected[0] -= 1.5e6
+    np.testing.assert_allclose(rolled["cashflows"][category], expected)
+    assert rolled["irr"][category] == pytest.approx(batch_metrics(expected)["irr"][0])
+    deal = rolled["index"][("Residential", products["Deal 3"]["product_type"], "Deal 3")]
+    np.testing.assert_allclose(rolled["cashflows"][deal], cashflows[3])
+
+def test_rollup_nodes_sum_their_deals():
+    products, cashflows = deals(40, 2e5, seed=1)
+    commercial, commercial_flows = deals(10, 5e5, seed=2)
+    rolled = portfolio_rollup([("Residential", products, cashflows, None),
+                               ("Commercial", commercial, commercial_flows, 3e6)])
+    assert rolled["level"][0] == "portfolio" and set(rolled["level"][1:]) == set(PORTFOLIO_LEVELS)
+    total = cashflows.sum(axis=0) + commercial_flows.sum(axis=0)
+    total[0] -= 40 * 2e5 + 3e6
+    np.testing.assert_allclose(rolled["cashflows"][rolled["index"][()]], total)
+    for row, parent in enumerate(rolled["parent"]):
+        if parent >= 0:
+            assert rolled["path"][row][:-1] == rolled["path"][parent]
+
+def test_unknown_acquisition_node_is_rejected():
+    with pytest.raises(ValueError):
+        rollup(np.zeros((1, 3)), {"category": ["A"]}, ["category"], {("B",): 1.0})
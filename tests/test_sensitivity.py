@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from engine import product_cashflows
+from finance import batch_metrics
+from sensitivity import sensitivity_grid
+
+PRODUCTS = {
+    "Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000, "absorption_rate": 0.15},
+    "Attached": {"units": 150, "rental_price": 2625, "dev_cost": 350000, "opex_per_unit": 5000, "absorption_rate": 0.20},
+    "Multi-Family": {"units": 150, "rental_price": 1925, "dev_cost": 190000, "opex_per_unit": 5000, "absorption_rate": 0.25},
+}
+RENT = np.linspace(0.8, 1.2, 7)
+COST = np.linspace(0.8, 1.2, 5)
+
+def rerun(products, rent, cost):
+    scaled = {name: dict(vals, rental_price=vals["rental_price"] * rent, dev_cost=vals["dev_cost"] * cost)
+              for name, vals in products.items()}
+    return product_cashflows(scaled, "residential")["cashflows"]
+
+@pytest.mark.parametrize("chunk_cells", [1, 7, 50_000])
+def test_by_product_grid_matches_full_reruns(chunk_cells):
+    grids = sensitivity_grid(PRODUCTS, "residential", RENT, COST, by_product=True, chunk_cells=chunk_cells)
+    for i, rent in enumerate(RENT):
+        for j, cost in enumerate(COST):
+            metrics = batch_metrics(rerun(PRODUCTS, rent, cost))
+            for row, name in enumerate(PRODUCTS):
+                for metric in ("irr", "equity_multiple", "break_even_year"):
+                    assert grids[name][metric].iloc[i, j] == pytest.approx(metrics[metric][row], rel=1e-9, nan_ok=True)
+
+def test_portfolio_grid_is_independent_of_chunking():
+    whole = sensitivity_grid(PRODUCTS, "residential", RENT, COST, acq_cost=1.5e6)
+    chunked = sensitivity_grid(PRODUCTS, "residential", RENT, COST, acq_cost=1.5e6, chunk_cells=3)
+    for metric in whole:
+        pd.testing.assert_frame_equal(whole[metric], chunked[metric])
+
+def test_requested_metrics_only():
+    grids = sensitivity_grid(PRODUCTS, "residential", RENT, COST, metrics=["equity_multiple"])
+    assert list(grids) == ["equity_multiple"]
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+import numpy as np
+import pytest
+from engine import product_cashflows
+from finance import batch_metrics
+from growth_helpers import OccupancyCache, batch_occupancy
+from service import FeasibilityService, MicroBatcher, RequestError, validate_payload
+
+RESIDENTIAL = {"Detached": {"units": 150, "rental_price": 3250, "dev_cost": 450000, "opex_per_unit": 5000,
+                            "absorption_rate": 0.15}}
+COMMERCIAL = {"Office": {"sqft": 20000, "rental_price": 3, "dev_cost": 200, "absorption_rate": 0.25}}
+PROJECT = {"acq_cost": 1e6,
+           "residential": {"units": 40, "rental_price": 2200, "dev_cost": 280000},
+           "commercial": {"Retail": {"sqft": 8000, "rental_price": 2.5, "absorption_rate": 0.2}}}
+
+async def request(port, path, payload):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    head, _, body = (await reader.read()).partition(b"\r\n\r\n")
+    writer.close()
+    return int(head.split()[1]), json.loads(body)
+
+def run_concurrently(category, payloads):
+    async def main():
+        service = FeasibilityService(workers=2, window=0.05, use_threads=True)
+        port = await service.start(port=0)
+        try:
+            return await asyncio.gather(*[request(port, f"/evaluate/{category}", p) for p in payloads])
+        finally:
+            await service.close()
+    return asyncio.run(main())
+
+@pytest.mark.parametrize("category, key, good, bad", [
+    ("commercial", "products", COMMERCIAL, {"Office": dict(COMMERCIAL["Office"], dev_cost="abc")}),
+    ("residential", "products", RESIDENTIAL, {"Detached": dict(RESIDENTIAL["Detached"], units=True)}),
+    ("mixed_use", "projects", {"Hub": PROJECT},
+     {"Hub": dict(PROJECT, residential={"units": 40, "dev_cost": 280000})}),
+])
+def test_bad_request_does_not_fail_its_batch(category, key, good, bad):
+    responses = run_concurrently(category, [{key: good}, {key: bad}, {key: good}])
+    assert [status for status, _ in responses] == [200, 400, 200]
+    assert responses[0][1] == responses[2][1]
+
+def test_response_matches_engine():
+    (status, body), = run_concurrently("residential", [{"products": RESIDENTIAL, "acq_cost": 1.5e6}])
+    cashflows = product_cashflows(RESIDENTIAL, "residential")["cashflows"]
+    portfolio = cashflows.sum(axis=0)
+    portfolio[0] -= 1.5e6
+    assert status == 200
+    assert body["portfolio"]["irr"] == pytest.approx(batch_metrics(portfolio)["irr"][0])
+    assert body["products"]["Detached"]["irr"] == pytest.approx(batch_metrics(cashflows)["irr"][0])
+
+def test_validate_payload_coerces_numbers():
+    years, payload = validate_payload("mixed_use", {"projects": {"Hub": PROJECT}, "dev_cost_per_sqft_com": 150})
+    assert years == 20
+    hub = payload["projects"]["Hub"]
+    assert hub["acq_cost"] == 1e6 and isinstance(hub["residential"]["residential"]["units"], float)
+    assert hub["commercial"]["Retail"]["sqft"] == 8000.0
+    for bad in [{"products": {"Office": dict(COMMERCIAL["Office"], opex_per_sqft="x")}},
+                {"products": {"Office": dict(COMMERCIAL["Office"], absorption_rate=1.5)}},
+                {"products": {"Office": dict(COMMERCIAL["Office"], sqft=0)}},
+                {"products": COMMERCIAL, "acq_cost": "1e6"}]:
+        with pytest.raises(RequestError):
+            validate_payload("commercial", bad)
+
+def test_micro_batcher_isolates_failing_request():
+    def run(category, years, payloads):
+        if any(payload == "bad" for payload in payloads):
+            raise ValueError("bad payload")
+        return [payload.upper() for payload in payloads]
+
+    async def main():
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(2) as executor:
+            batcher = MicroBatcher(run, executor, window=0.05)
+            return await asyncio.gather(*[batcher.submit(("x", 20), p) for p in ["a", "bad", "c"]],
+                                        return_exceptions=True)
+
+    first, failed, last = asyncio.run(main())
+    assert (first, last) == ("A", "C")
+    assert isinstance(failed, ValueError)
+
+def test_occupancy_cache_is_thread_safe():
+    cache = OccupancyCache(maxsize=64)
+    rng = np.random.default_rng(0)
+    inputs = [(rng.integers(10, 500, 50).astype(float), rng.choice([0.1, 0.2, 0.25], 50)) for _ in range(16)]
+    errors = []
+
+    def work(totals, rates):
+        try:
+            for _ in range(20):
+                np.testing.assert_array_equal(cache.occupancy(totals, rates, 20), batch_occupancy(totals, rates, 20))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=args) for args in inputs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(cache) <= 64
+
+def test_mixed_use_defaults_match_main():
+    from main import mixed_use_model
+    (status, body), = run_concurrently("mixed_use", [{"projects": {"Hub": PROJECT}}])
+    expected = mixed_use_model({"Hub": PROJECT}, 200, 150, "80302")
+    assert status == 200
+    hub = body["projects"]["Hub"]
+    assert hub["development_cost"] == pytest.approx(expected["Development_Cost"][0])
+    assert hub["irr"] == pytest.approx(expected["IRR"][0])
+    assert hub["equity_multiple"] == pytest.approx(expected["Equity_Multiple"][0])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from loader import load_portfolio
+from main import residential_model, commercial_model
+from results import ResultStore, RESIDENTIAL_COLUMNS, COMMERCIAL_COLUMNS
+from rollup import portfolio_rollup
+from sharding import run_sharded
+
+@pytest.fixture
+def portfolio_file(tmp_path):
+    rng = np.random.default_rng(7)
+    rows = [{"category": "Residential", "product": f"R{i}", "acq_cost": 1_500_000, "units": int(rng.integers(50, 200)),
+             "rental_price": rng.uniform(1800, 3200), "dev_cost": rng.uniform(2e5, 4.5e5), "opex_per_unit": 5000,
+             "absorption_rate": 0.2, "product_type": rng.choice(["detached", "attached"])} for i in range(23)]
+    rows += [{"category": "Commercial", "product": f"C{i}", "acq_cost": rng.uniform(5e5, 1e6),
+              "sqft": int(rng.integers(10_000, 90_000)), "rental_price": rng.uniform(1.5, 3.5), "dev_cost": 250,
+              "opex_per_sqft": 6, "absorption_rate": 0.25, "product_type": rng.choice(["office", "retail"])}
+             for i in range(11)]
+    path = tmp_path / "portfolio.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+def in_memory_rollup(path, land_costs):
+    residential, commercial, _ = load_portfolio(str(path))
+    res_store = ResultStore(residential.keys(), 20, RESIDENTIAL_COLUMNS, int_columns=["Units"])
+    residential_model(residential, 0, 0, None, store=res_store)
+    com_store = ResultStore(commercial.keys(), 20, COMMERCIAL_COLUMNS)
+    commercial_model(commercial, store=com_store)
+    return portfolio_rollup([("Residential", residential, res_store.cashflows, land_costs.get("residential")),
+                             ("Commercial", commercial, com_store.cashflows, land_costs.get("commercial"))])
+
+@pytest.mark.parametrize("land_costs", [{}, {"residential": 1_500_000}])
+def test_sharded_land_matches_portfolio_rollup(portfolio_file, tmp_path, land_costs):
+    result = run_sharded(str(portfolio_file), workers=1, shard_size=5, work_dir=str(tmp_path / "shards"),
+                         land_costs=land_costs)
+    rolled, expected = result["rollup"], in_memory_rollup(portfolio_file, land_costs)
+    for path in [(), ("Residential",), ("Commercial",), ("Commercial", "office")]:
+        row, ref = rolled["index"][path], expected["index"][path]
+        assert rolled["acquisition_cost"][row] == pytest.approx(expected["acquisition_cost"][ref])
+        np.testing.assert_allclose(rolled["cashflows"][row], expected["cashflows"][ref], rtol=1e-9)
+
+def test_equal_acquisition_costs_are_not_shared_by_default(portfolio_file, tmp_path):
+    result = run_sharded(str(portfolio_file), workers=1, shard_size=5, work_dir=str(tmp_path / "shards"))
+    rolled = result["rollup"]
+    assert rolled["acquisition_cost"][rolled["index"][("Residential",)]] == pytest.approx(23 * 1_500_000)
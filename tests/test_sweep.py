@@ -0,0 +1,96 @@
+import copy
+import numpy as np
+import pytest
+from finance import calculate_equity_multiple, calculate_irr, find_break_even_year
+from main import commercial_model, mixed_use_model, residential_model
+from results import ResultStore, RESIDENTIAL_COLUMNS, COMMERCIAL_COLUMNS, MIXED_USE_COLUMNS
+from sweep import grid_scenarios, run_sweep
+
+BASE = {
+    "residential": {
+        "Detached": {"units": 150, "rental_price": 4500, "dev_cost": 350000, "opex_per_unit": 5000,
+                     "absorption_rate": 0.15, "product_type": "detached"},
+        "Multi-Family": {"units": 150, "rental_price": 2600, "dev_cost": 190000, "opex_per_unit": 5000,
+                         "absorption_rate": 0.25, "product_type": "multi-family"},
+    },
+    "commercial": {
+        "Office": {"sqft": 20000, "rental_price": 33.5, "dev_cost": 250, "opex_per_sqft": 6.45,
+                   "absorption_rate": 0.25, "acq_cost": 400000, "product_type": "office"},
+        "Retail": {"sqft": 15000, "rental_price": 38, "dev_cost": 210, "opex_per_sqft": 6.0,
+                   "absorption_rate": 0.3, "acq_cost": 250000, "product_type": "retail"},
+    },
+    "mixed_use": {
+        "Main Street": {"acq_cost": 3_000_000, "product_type": "mixed-use",
+                        "residential": {"units": 80, "rental_price": 2400, "dev_cost": 300000},
+                        "commercial": {"sqft": 12000, "rental_price": 36, "absorption_rate": 0.3}},
+    },
+}
+LAND = {"residential": 1_500_000}
+
+def scalar_point(rent_multiplier, commercial_dev_cost, years=20):
+    # One point evaluated the long way: edit the inputs by hand, run each model, roll up by hand.
+    # "commercial.dev_cost" targets standalone commercial products, not mixed-use components
+    portfolio = copy.deepcopy(BASE)
+    for vals in portfolio["residential"].values():
+        vals["rental_price"] *= rent_multiplier
+    for vals in portfolio["commercial"].values():
+        vals["rental_price"] *= rent_multiplier
+        vals["dev_cost"] = commercial_dev_cost
+    project = portfolio["mixed_use"]["Main Street"]
+    for part in ("residential", "commercial"):
+        project[part]["rental_price"] *= rent_multiplier
+
+    stores = {}
+    for category, columns, extra in [("residential", RESIDENTIAL_COLUMNS, ["Units"]),
+                                     ("commercial", COMMERCIAL_COLUMNS, ["SqFt_Planned"]),
+                                     ("mixed_use", MIXED_USE_COLUMNS, [])]:
+        stores[category] = ResultStore(portfolio[category].keys(), years, columns, int_columns=extra)
+    residential_model(portfolio["residential"], 0, 200, "80302", years, store=stores["residential"])
+    commercial_model(portfolio["commercial"], years, store=stores["commercial"])
+    mixed_use_model(portfolio["mixed_use"], 200, 150, "80302", years, store=stores["mixed_use"])
+
+    # Land: one shared residential cost, each commercial product's own acq_cost, and the
+    # mixed-use project's acq_cost already in its period 0
+    res_flows = stores["residential"].cashflows.sum(axis=0)
+    res_flows[0] -= LAND["residential"]
+    com_flows = stores["commercial"].cashflows.sum(axis=0)
+    com_flows[0] -= sum(vals["acq_cost"] for vals in portfolio["commercial"].values())
+    mix_flows = stores["mixed_use"].cashflows[0]
+
+    row = {}
+    for label, flows in [("residential", res_flows), ("commercial", com_flows), ("mixed_use", mix_flows)]:
+        row[f"{label}_irr"] = calculate_irr(flows)
+        row[f"{label}_equity_multiple"] = calculate_equity_multiple(flows)
+        row[f"{label}_break_even_year"] = find_break_even_year(flows)
+    return row
+
+def same(obtained, expected):
+    # The scalar helpers report a metric that cannot be calculated as None, the sweep as NaN
+    return obtained == pytest.approx(np.nan if expected is None else expected, rel=1e-9, nan_ok=True)
+
+def test_grid_matches_per_point_model_runs():
+    grid = grid_scenarios(rental_price_multiplier=[0.9, 1.1], **{"commercial.dev_cost": [150, 220]})
+    results = run_sweep(BASE, grid, acq_costs=LAND, workers=1)
+    assert len(results) == 4 and list(results["scenario"]) == [0, 1, 2, 3]
+    for _, row in results.iterrows():
+        expected = scalar_point(row["rental_price_multiplier"], row["commercial.dev_cost"])
+        for key, value in expected.items():
+            assert same(row[key], value), key
+
+def test_process_pool_matches_in_process_run():
+    grid = grid_scenarios(rental_price_multiplier=[0.9, 1.0, 1.1])
+    serial = run_sweep(BASE, grid, acq_costs=LAND, workers=1)
+    pooled = run_sweep(BASE, grid, acq_costs=LAND, workers=2, chunk_size=1)
+    assert serial.equals(pooled)
+
+def test_empty_and_single_value_axes():
+    assert grid_scenarios(rental_price_multiplier=[0.9, 1.1], dev_cost_multiplier=[]) == []
+    assert run_sweep(BASE, [], workers=1).empty
+    # No axes at all is the base case alone
+    assert grid_scenarios() == [{}]
+    single = grid_scenarios(rental_price_multiplier=[1.0], **{"commercial.dev_cost": [220]})
+    assert single == [{"rental_price_multiplier": 1.0, "commercial.dev_cost": 220}]
+    results = run_sweep(BASE, single, acq_costs=LAND, workers=4)
+    assert len(results) == 1 and results.loc[0, "name"] == "Scenario 0"
+    for key, value in scalar_point(1.0, 220).items():
+        assert same(results.loc[0, key], value), key